@@ -0,0 +1,223 @@
+"""
+Historical backtest of the auto-hedge rule over the tick archive.
+
+Replays an asset's ticks through the same rule the bot applies on a breach:
+once exposure (size x price) is above both the alert threshold and the
+auto-hedge threshold, sell min(size, (exposure - threshold) / price), which
+brings exposure back to the auto-hedge threshold. Hedges pay the
+simulator's taker fee (plus optional slippage).
+
+Hedging only ever shrinks the position, so the position size is a function
+of the running maximum price: with the alert threshold at or below the
+auto-hedge threshold it is min(size, threshold / running max) for every
+tick at once, and otherwise the next hedge is a binary search on the
+running maximum. Either way a replay costs a few array passes instead of a
+Python loop over ticks. The alert cooldown is not modelled: every breaching
+tick may hedge.
+
+    python backtest.py <asset> <size> <threshold> [<threshold> ...] [--alert <threshold>]
+"""
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from exchange_sim import TAKER_FEE
+from tick_log import TickLog, TICK_LOG_DIR, SOURCES
+
+LEGACY_CACHE = "cache/live_data.json"
+
+_sweep_prices = None  # per worker process, set by _init_worker
+_sweep_running_max = None
+
+
+def load_prices(asset: str, path: str = TICK_LOG_DIR) -> tuple:
+    """
+    Tick timestamps and prices for asset, oldest first.
+
+    Args:
+        asset (str): Asset symbol.
+        path (str): Tick log directory, or a legacy JSON cache file.
+
+    Returns:
+        tuple: (int64 epoch ns, float64 price) arrays; the price of a tick
+            is the highest venue price, as in the bot's breach checks
+    """
+    if path.endswith(".json"):
+        return _load_json(asset, path)
+
+    ticks = TickLog(path).read(asset)
+    venues = np.column_stack([ticks[source] for source in SOURCES])
+    priced = ~np.isnan(venues).all(axis=1)
+    prices = np.nanmax(venues[priced], axis=1) if priced.any() else np.empty(0)
+    return np.asarray(ticks["timestamp"][priced]), prices
+
+
+def hedge_path(prices: np.ndarray, size: float, threshold: float, alert_threshold: float = None,
+               running_max: np.ndarray = None) -> tuple:
+    """
+    Position size after every tick under the auto-hedge rule.
+
+    Args:
+        prices (np.ndarray): Tick prices, oldest first.
+        size (float): Starting position size.
+        threshold (float): Auto-hedge threshold; hedges bring exposure back to it.
+        alert_threshold (float): Position alert threshold; no hedge fires
+            below it. Defaults to threshold.
+        running_max (np.ndarray): np.maximum.accumulate(prices), if already known.
+
+    Returns:
+        tuple: (size after each tick, indices of the ticks that hedged)
+    """
+    if threshold < 0:
+        raise ValueError("threshold must be non-negative")
+    prices = np.asarray(prices, dtype=float)
+    if running_max is None:
+        running_max = np.maximum.accumulate(prices)
+    trigger = threshold if alert_threshold is None else max(threshold, alert_threshold)
+
+    if trigger == threshold:
+        # Every new high above threshold / size hedges back to the threshold
+        sizes = np.minimum(size, threshold / running_max)
+        hedges = np.flatnonzero(np.diff(sizes, prepend=size) < 0)
+        return sizes, hedges
+
+    # Hedges land on the first running max above trigger / size, each one
+    # moving that level up by trigger / threshold
+    hedges, after = [], []
+    current = size
+    while current > 0:
+        i = int(np.searchsorted(running_max, trigger / current, side="right"))
+        if i >= len(prices):
+            break
+        hedges.append(i)
+        current = min(current, threshold / prices[i])
+        after.append(current)
+
+    hedges = np.asarray(hedges, dtype=np.intp)
+    levels = np.concatenate(([size], after))
+    sizes = levels[np.searchsorted(hedges, np.arange(len(prices)), side="right")]
+    return sizes, hedges
+
+
+def backtest(prices: np.ndarray, size: float, threshold: float, alert_threshold: float = None,
+             fee_rate: float = TAKER_FEE, slippage_bps: float = 0.0, running_max: np.ndarray = None) -> dict:
+    """
+    Replay prices through the auto-hedge rule and score the result.
+
+    Returns:
+        dict: ticks, hedges, hedged size, hedging cost, final size, max
+            exposure, and P&L of the position with and without hedging
+            (hedged P&L is net of cost)
+    """
+    prices = np.asarray(prices, dtype=float)
+    if not len(prices):
+        raise ValueError("no prices to backtest")
+    sizes, hedges = hedge_path(prices, size, threshold, alert_threshold, running_max)
+
+    before = np.concatenate(([size], sizes[:-1]))
+    hedged = before[hedges] - sizes[hedges]
+    cost = float(np.dot(hedged, prices[hedges])) * (fee_rate + slippage_bps / 10_000)
+    # The size held after a tick carries the move to the next one
+    pnl = float(np.dot(sizes[:-1], np.diff(prices)))
+
+    return {
+        "threshold": threshold,
+        "ticks": len(prices),
+        "hedges": len(hedges),
+        "hedged_size": float(hedged.sum()),
+        "cost": cost,
+        "final_size": float(sizes[-1]),
+        "max_exposure": float(np.max(sizes * prices)),
+        "pnl_unhedged": size * float(prices[-1] - prices[0]),
+        "pnl_hedged": pnl - cost,
+    }
+
+
+def sweep(prices: np.ndarray, size: float, thresholds, alert_threshold: float = None,
+          processes: int = None, **costs) -> list:
+    """
+    Backtest many auto-hedge thresholds on the same prices.
+
+    Thresholds are spread over a process pool (processes=1 runs them
+    in-process); each worker receives the prices once, not per threshold.
+
+    Returns:
+        list: backtest() results in the order of thresholds
+    """
+    prices = np.ascontiguousarray(prices, dtype=float)
+    thresholds = [float(threshold) for threshold in thresholds]
+    processes = processes or os.cpu_count() or 1
+    jobs = [(size, threshold, alert_threshold, costs) for threshold in thresholds]
+
+    if processes == 1 or len(thresholds) == 1:
+        _init_worker(prices)
+        try:
+            return [_run_one(job) for job in jobs]
+        finally:
+            _init_worker(None)
+
+    chunksize = max(1, len(jobs) // (processes * 4))
+    with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(prices,)) as pool:
+        return list(pool.map(_run_one, jobs, chunksize=chunksize))
+
+
+def _init_worker(prices):
+    global _sweep_prices, _sweep_running_max
+    _sweep_prices = prices
+    _sweep_running_max = None if prices is None else np.maximum.accumulate(prices)
+
+
+def _run_one(job) -> dict:
+    size, threshold, alert_threshold, costs = job
+    return backtest(_sweep_prices, size, threshold, alert_threshold, running_max=_sweep_running_max, **costs)
+
+
+def _load_json(asset: str, path: str) -> tuple:
+    with open(path, "r") as f:
+        asset_data = json.load(f).get(asset.upper(), {})
+    if "latest" not in asset_data:
+        asset_data = {"latest": asset_data, "history": []}
+
+    rows = []
+    for entry in asset_data.get("history", []) + [asset_data["latest"]]:
+        venue_prices = [entry.get(source) for source in SOURCES]
+        venue_prices = [float(price) for price in venue_prices if price]
+        try:
+            ts = datetime.strptime(entry["timestamp"], "%Y-%m-%d %H:%M:%S")
+        except (KeyError, TypeError, ValueError):
+            continue
+        if venue_prices:
+            rows.append((int(ts.replace(tzinfo=timezone.utc).timestamp()) * 1_000_000_000, max(venue_prices)))
+    rows.sort()
+    return np.array([ts for ts, _ in rows], dtype=np.int64), np.array([price for _, price in rows], dtype=float)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    alert = None
+    if "--alert" in args:
+        i = args.index("--alert")
+        alert = float(args[i + 1])
+        del args[i:i + 2]
+    if len(args) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    asset, size, thresholds = args[0].upper(), float(args[1]), [float(arg) for arg in args[2:]]
+    timestamps, prices = load_prices(asset)
+    if not len(prices):
+        timestamps, prices = load_prices(asset, LEGACY_CACHE)
+    if not len(prices):
+        print(f"No ticks for {asset}")
+        sys.exit(1)
+
+    print(f"{asset}: {len(prices):,} ticks, size {size}, starting exposure ${size * prices[0]:,.2f}")
+    print(f"{'threshold':>12} {'hedges':>7} {'hedged':>9} {'cost':>10} {'max exposure':>13} {'P&L hedged':>12} {'unhedged':>12}")
+    for result in sweep(prices, size, thresholds, alert):
+        print(f"{result['threshold']:>12,.0f} {result['hedges']:>7} {result['hedged_size']:>9.4f} "
+              f"${result['cost']:>9,.2f} ${result['max_exposure']:>12,.2f} "
+              f"${result['pnl_hedged']:>11,.2f} ${result['pnl_unhedged']:>11,.2f}")
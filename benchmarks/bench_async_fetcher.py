@@ -0,0 +1,119 @@
+"""
+Event-loop latency while an exchange is slow: blocking vs aiohttp fetcher.
+
+A local stub server answers the Deribit ticker instantly and stalls the Bybit
+ticker for SLOW_DELAY seconds. A heartbeat coroutine stands in for every other
+user's handler and records how late it gets scheduled while update_cache runs.
+
+    python benchmarks/bench_async_fetcher.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import asyncio
+import statistics
+import tempfile
+import threading
+import time
+
+from aiohttp import web
+
+import data_fetcher
+
+SLOW_DELAY = 1.0  # seconds the stubbed Bybit endpoint stalls
+HEARTBEAT = 0.01  # seconds between heartbeat ticks
+ROUNDS = 3
+
+
+async def bybit_tickers(request):
+    await asyncio.sleep(SLOW_DELAY)
+    tickers = [
+        {"symbol": "BTCUSDT", "lastPrice": "117551.8"},
+        {"symbol": "ETHUSDT", "lastPrice": "2950.1"},
+    ]
+    symbol = request.query.get("symbol")
+    if symbol:
+        tickers = [t for t in tickers if t["symbol"] == symbol]
+    return web.json_response({"result": {"list": tickers}})
+
+
+async def deribit_ticker(request):
+    return web.json_response({"result": {"last_price": 117648.5}})
+
+
+def start_stub_server():
+    """Run the stub exchange on its own thread so a blocking client can't stall it"""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    holder = {}
+
+    async def serve():
+        app = web.Application()
+        app.router.add_get("/v5/market/tickers", bybit_tickers)
+        app.router.add_get("/api/v2/public/ticker", deribit_ticker)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        holder["port"] = site._server.sockets[0].getsockname()[1]
+        started.set()
+
+    thread = threading.Thread(target=lambda: (loop.run_until_complete(serve()), loop.run_forever()), daemon=True)
+    thread.start()
+    started.wait()
+    return holder["port"]
+
+
+async def heartbeat(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT)
+        lags.append(time.perf_counter() - start - HEARTBEAT)
+
+
+async def measure(label: str, fetch):
+    lags = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await fetch()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    p99 = lags_ms[int(len(lags_ms) * 0.99) - 1] if lags_ms else 0.0
+    print(
+        f"{label:<22} fetch {elapsed / ROUNDS * 1000:8.1f} ms/round | "
+        f"handler lag p50 {statistics.median(lags_ms):8.2f} ms "
+        f"p99 {p99:8.2f} ms max {lags_ms[-1]:8.2f} ms"
+    )
+
+
+async def main():
+    port = start_stub_server()
+    data_fetcher.BYBIT_API = f"http://127.0.0.1:{port}"
+    data_fetcher.DERIBIT_API = f"http://127.0.0.1:{port}"
+
+    async def blocking():
+        # What the handlers did before: a blocking call on the event loop
+        data_fetcher.update_cache("BTC")
+
+    async def non_blocking():
+        await data_fetcher.update_cache_async("BTC")
+
+    print(f"Bybit stub stalls {SLOW_DELAY:.1f}s per request, {ROUNDS} rounds each\n")
+    await measure("update_cache (sync)", blocking)
+    await measure("update_cache_async", non_blocking)
+    await data_fetcher.close_session()
+    data_fetcher.get_price_store().flush()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        data_fetcher.CACHE_PATH = os.path.join(tmp, "live_data.json")
+        asyncio.run(main())
@@ -0,0 +1,103 @@
+"""
+DeltaHedger per-tick cost and the executions a rebalance band saves.
+
+* per tick: USERS delta-neutral users in BTC (plus one ETH position each),
+  one BTC price update reprices only the BTC positions; reports the time
+  per update when nobody needs rebalancing;
+* band: one user over a TICKS-tick random walk, rebalanced on every tick
+  (band 0) versus increasingly wide bands: executions, units traded, fees
+  at the taker rate and the average absolute delta left unhedged. Positions
+  are struck at the money (greeks.atm_strike), so delta per unit only moves
+  with the strike's rounding to the dollar: band 0 churns on that noise,
+  any band hedges once.
+
+    python benchmarks/bench_delta_hedger.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bot")))
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from delta_hedger import DeltaHedger
+from positions import Position
+
+USERS = 10_000
+UPDATES = 200
+TICKS = 20_000
+BANDS = [0, 500, 2_000, 5_000, 20_000]
+TAKER_FEE = 0.00075
+
+
+class FakePoller:
+    def subscribe(self, asset, queue):
+        pass
+
+    def unsubscribe(self, asset, queue):
+        pass
+
+
+async def per_tick():
+    rng = np.random.default_rng(0)
+
+    async def never(key, trades):
+        raise AssertionError("no rebalance expected")
+
+    hedger = DeltaHedger(FakePoller(), never)
+    for user_id in range(USERS):
+        btc = Position("BTC", rng.uniform(0.1, 3), 1e9, rng.uniform(100_000, 130_000))
+        eth = Position("ETH", rng.uniform(1, 30), 1e9, rng.uniform(2_500, 3_500))
+        hedger.watch(user_id, btc, float("inf"))
+        hedger.watch(user_id, eth, float("inf"))
+    await hedger.evaluate("ETH", 3_000.0)
+
+    start = time.perf_counter()
+    for i in range(UPDATES):
+        await hedger.evaluate("BTC", 117_000.0 + i)
+    elapsed = (time.perf_counter() - start) / UPDATES
+    hedger.stop()
+    print(f"{USERS:,} users x 2 assets: {elapsed * 1000:.2f} ms per BTC update "
+          f"({elapsed / USERS * 1e6:.2f} us per position)\n")
+
+
+async def band_run(band: float, prices: np.ndarray) -> dict:
+    stats = {"executions": 0, "units": 0.0, "fees": 0.0, "drift": []}
+    position = Position("BTC", 2.0, 1e9, float(prices[0]))
+
+    async def rebalance(key, trades):
+        units, price = trades["BTC"]
+        stats["executions"] += 1
+        stats["units"] += abs(units)
+        stats["fees"] += abs(units) * price * TAKER_FEE
+        position.hedge += units
+        hedger.watch(1, position, band)
+
+    hedger = DeltaHedger(FakePoller(), rebalance)
+    hedger.watch(1, position, band)
+    for price in prices.tolist():
+        await hedger.evaluate("BTC", price)
+        stats["drift"].append(abs(hedger.portfolio_delta(1)))
+    hedger.stop()
+    return stats
+
+
+async def main():
+    await per_tick()
+
+    rng = np.random.default_rng(1)
+    prices = 117_000.0 * np.exp(np.cumsum(rng.normal(0, 2e-4, TICKS)))
+    print(f"one user, 2 BTC of 7-day calls, {TICKS:,} ticks:")
+    print(f"{'band':>8} {'executions':>11} {'units traded':>13} {'fees':>10} {'avg |delta|':>12}")
+    for band in BANDS:
+        stats = await band_run(band, prices)
+        print(f"${band:>7,} {stats['executions']:>11,} {stats['units']:>13.3f} "
+              f"${stats['fees']:>9,.2f} ${np.mean(stats['drift']):>11,.2f}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""
+Scalar calculate_greeks vs vectorized calculate_greeks_batch.
+
+The scalar path is timed on at most SCALAR_CAP options and extrapolated
+linearly beyond that (marked "est.").
+
+    python benchmarks/bench_greeks.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bot")))
+import time
+
+import numpy as np
+
+from greeks import calculate_greeks, calculate_greeks_batch
+
+SIZES = [1, 1_000, 1_000_000]
+SCALAR_CAP = 20_000
+
+
+def make_book(n: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    spot = rng.uniform(1_000, 120_000, n)
+    return {
+        "spot": spot,
+        "strike": spot * rng.uniform(0.8, 1.2, n),
+        "days": rng.integers(1, 90, n).astype(float),
+        "vol": rng.uniform(0.2, 1.2, n),
+        "rate": np.full(n, 0.05),
+        "is_call": rng.random(n) < 0.5,
+    }
+
+
+def time_scalar(book: dict, n: int) -> float:
+    count = min(n, SCALAR_CAP)
+    option_types = np.where(book["is_call"][:count], "call", "put")
+    start = time.perf_counter()
+    for i in range(count):
+        calculate_greeks(
+            book["spot"][i], book["strike"][i], book["days"][i],
+            book["vol"][i], book["rate"][i], option_types[i],
+        )
+    return (time.perf_counter() - start) * n / count
+
+
+def time_batch(book: dict) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        calculate_greeks_batch(
+            book["spot"], book["strike"], book["days"],
+            book["vol"], book["rate"], book["is_call"],
+        )
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'options':>10} {'scalar':>14} {'batch':>12} {'speedup':>9}")
+    for n in SIZES:
+        book = make_book(n)
+        scalar = time_scalar(book, n)
+        batch = time_batch(book)
+        note = " est." if n > SCALAR_CAP else ""
+        print(f"{n:>10,} {scalar * 1000:>10.2f} ms{note:<4} {batch * 1000:>9.3f} ms {scalar / batch:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Memoized greeks for the dashboard, /portfolio_metrics, /greeks_auto and
+the analytics view.
+
+* accuracy: a cache hit returns exactly what pricing the quantized inputs
+  directly gives, for the scalar and batch paths, and the quantized spot
+  moves the greeks by less than one price tick would;
+* invalidation: a recorded tick drops the asset's entries, an entry past
+  its TTL is recomputed and the LRU stays within its size;
+* session: VIEWS dashboard-style requests with a recorded tick every
+  POLL_INTERVAL seconds, with prices that only change on those ticks and
+  with streamed quotes in between; hit rate and cost per request through
+  the cache and with it disabled (direct pricing in the same loop).
+
+    python benchmarks/bench_greeks_cache.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bot")))
+import time
+
+import numpy as np
+
+from greeks import GreeksCache, calculate_greeks, calculate_greeks_batch, prewarm, TICK_SIZES
+
+SPOTS = {"BTC": 117_000.0, "ETH": 3_100.0}
+DAYS = 7
+VOL = 0.35
+VIEWS = 20_000
+REQUEST_SECONDS = 0.5  # a view every half second across all users
+QUOTE_SECONDS = 0.2  # streamed quotes between recorded ticks
+POLL_INTERVAL = 30
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def check_accuracy():
+    cache = GreeksCache()
+    spot = 117_000.37
+    quantized = cache.quantize("BTC", spot)
+    first = cache.greeks("BTC", spot, 117_000, DAYS, VOL)
+    again = cache.greeks("BTC", 117_000.45, 117_000, DAYS, VOL)
+    assert again is first and first == calculate_greeks(quantized, 117_000, DAYS, VOL)
+
+    spots = np.array([117_000.37, 3_100.01])
+    assets = list(SPOTS)
+    cold = cache.batch(assets, spots, np.round(spots), DAYS, [VOL, 0.6])
+    warm = cache.batch(assets, spots, np.round(spots), DAYS, [VOL, 0.6])
+    direct = calculate_greeks_batch([quantized, 3_100.0], np.round(spots), DAYS, [VOL, 0.6])
+    for name in direct:
+        assert np.array_equal(cold[name], direct[name]) and np.array_equal(warm[name], direct[name])
+
+    exact = calculate_greeks_batch(spots, np.round(spots), DAYS, [VOL, 0.6])
+    half_tick = np.array([TICK_SIZES[a] for a in assets]) / 2
+    drift = np.abs(cold["price"] - exact["price"])
+    assert np.all(drift <= exact["delta"] * half_tick + 1e-9)
+    print(f"accuracy: hits = direct pricing at the quantized inputs; quantization moves prices by at most "
+          f"${drift.max():.2f} (half a tick x delta): ok")
+
+
+def check_invalidation():
+    clock = Clock()
+    cache = GreeksCache(size=4, ttl=60, clock=clock)
+    cache.greeks("BTC", 117_000, 117_000, DAYS, VOL)
+    cache.greeks("ETH", 3_100, 3_100, DAYS, VOL)
+    cache.on_tick("BTC", 0.0, {})
+    assert cache.stats["invalidated"] == 1 and len(cache._entries) == 1
+    cache.greeks("ETH", 3_100, 3_100, DAYS, VOL)
+    assert cache.stats["hits"] == 1
+
+    clock.now = 61
+    cache.greeks("ETH", 3_100, 3_100, DAYS, VOL)
+    assert cache.stats["expired"] == 1
+
+    for strike in range(3_000, 3_010):
+        cache.greeks("ETH", 3_100, strike, DAYS, VOL)
+    assert len(cache._entries) == 4 and cache.stats["evicted"] == 7
+    print("invalidation: recorded tick drops the asset, TTL expiry, LRU bound: ok\n")
+
+
+def price_path(quote_seconds):
+    """BTC and ETH at each request time; quotes move them every quote_seconds, or only on recorded ticks"""
+    rng = np.random.default_rng(0)
+    times = np.arange(1, VIEWS + 1) * REQUEST_SECONDS
+    step = quote_seconds or POLL_INTERVAL
+    quotes = np.floor(times / step).astype(int)
+    moves = np.cumsum(rng.standard_normal((quotes[-1] + 1, 2)) * 1e-5 * np.sqrt(step / QUOTE_SECONDS), axis=0)
+    prices = np.array(list(SPOTS.values())) * np.exp(moves[quotes])
+    return times, np.round(prices, 2)
+
+
+def session(cache, times, prices):
+    """VIEWS requests alternating between a single-asset view and a two-asset batch"""
+    polls = np.floor(times / POLL_INTERVAL).astype(int).tolist()
+    clock = Clock()
+    cache.clock = clock
+    assets = list(SPOTS)
+    last_poll = -1
+    started = time.perf_counter()
+    for i, (t, poll, row) in enumerate(zip(times.tolist(), polls, prices)):
+        if poll != last_poll:
+            for asset in assets:
+                cache.on_tick(asset, t, {})
+            last_poll = poll
+        clock.now = t
+        if i % 2:
+            spot = float(row[0])
+            cache.greeks("BTC", spot, round(spot), DAYS, VOL)
+        else:
+            cache.batch(assets, row, np.round(row), DAYS, VOL)
+    return (time.perf_counter() - started) / VIEWS
+
+
+def main():
+    prewarm()
+    check_accuracy()
+    check_invalidation()
+
+    print(f"session: {VIEWS:,} requests, one every {REQUEST_SECONDS}s, ticks recorded every {POLL_INTERVAL}s")
+    modes = (
+        ("polled prices only", None),
+        (f"streamed quotes every {QUOTE_SECONDS}s", QUOTE_SECONDS),
+    )
+    for label, quote_seconds in modes:
+        times, prices = price_path(quote_seconds)
+        direct = session(GreeksCache(enabled=False), times, prices)
+        cache = GreeksCache()
+        cached = session(cache, times, prices)
+        print(f"  {label}: hit rate {cache.hit_rate:.1%}, per request direct {direct * 1e6:.1f} us, "
+              f"through the cache {cached * 1e6:.1f} us ({direct / cached:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Greeks kernels on a direct normal CDF (bot/greeks_kernel.py) against scipy.
+
+* accuracy: the NumPy erfc against math.erfc and scipy.special.erfc, and
+  every pricing path (scalar math.erfc, numba loop, NumPy with scipy's
+  ndtr, NumPy with the Cody erfc) against a scipy.stats.norm reference on
+  a random book of calls and puts, deep in and out of the money;
+* latency: one normal CDF and one option's greeks per call, the original
+  scipy.stats.norm path next to ndtr and math.erfc;
+* arrays: calculate_greeks_batch per backend, 1 to 1M options.
+
+Backends that aren't installed (numba) are skipped.
+
+    python benchmarks/bench_greeks_kernel.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bot")))
+import math
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from scipy.special import erfc as scipy_erfc, ndtr
+from scipy.stats import norm
+
+import greeks_kernel
+from greeks import calculate_greeks, calculate_greeks_batch, prewarm
+
+BOOK = 200_000
+SIZES = [1, 100, 10_000, 1_000_000]
+CALLS = 20_000
+GREEKS = ("price", "delta", "gamma", "theta", "vega")
+
+
+@contextmanager
+def backend(name: str):
+    """Route the array kernel through one backend for the duration"""
+    jit, ndtr_ = greeks_kernel.JIT, greeks_kernel._ndtr
+    greeks_kernel.JIT = name == "numba"
+    greeks_kernel._ndtr = greeks_kernel.norm_cdf_array if name == "numpy + Cody erfc" else ndtr
+    try:
+        yield
+    finally:
+        greeks_kernel.JIT, greeks_kernel._ndtr = jit, ndtr_
+
+
+def backends() -> list:
+    names = ["numpy + scipy ndtr", "numpy + Cody erfc"]
+    return (["numba"] if greeks_kernel.JIT else []) + names
+
+
+def make_book(n: int, seed: int = 11) -> dict:
+    rng = np.random.default_rng(seed)
+    spot = rng.uniform(1_000, 120_000, n)
+    return {
+        "spot": spot,
+        "strike": spot * np.exp(rng.normal(0, 0.6, n)),
+        "days": rng.integers(1, 366, n).astype(float),
+        "vol": rng.uniform(0.1, 2.0, n),
+        "rate": np.full(n, 0.05),
+        "is_call": rng.random(n) < 0.5,
+    }
+
+
+def stats_greeks(S, K, days, sigma, r, call) -> dict:
+    """The original implementation's formulas on scipy.stats.norm, vectorized"""
+    T = days / 365
+    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+    d2 = d1 - sigma * np.sqrt(T)
+    pdf_d1 = norm.pdf(d1)
+    decay = -S * pdf_d1 * sigma / (2 * np.sqrt(T))
+    discounted = K * np.exp(-r * T)
+    return {
+        "price": np.where(call, S * norm.cdf(d1) - discounted * norm.cdf(d2),
+                          discounted * norm.cdf(-d2) - S * norm.cdf(-d1)),
+        "delta": np.where(call, norm.cdf(d1), -norm.cdf(-d1)),
+        "gamma": pdf_d1 / (S * sigma * np.sqrt(T)),
+        "theta": np.where(call, decay - r * discounted * norm.cdf(d2), decay + r * discounted * norm.cdf(-d2)) / 365,
+        "vega": S * pdf_d1 * np.sqrt(T) / 100,
+    }
+
+
+def stats_greeks_scalar(S, K, days, sigma, r=0.05, option_type="call") -> dict:
+    """The original calculate_greeks: scipy.stats.norm five times per option"""
+    T = days / 365
+    d1 = (math.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * math.sqrt(T))
+    d2 = d1 - sigma * math.sqrt(T)
+    pdf_d1 = norm.pdf(d1)
+    cdf_d1, cdf_d2, cdf_neg_d1, cdf_neg_d2 = norm.cdf(d1), norm.cdf(d2), norm.cdf(-d1), norm.cdf(-d2)
+    if option_type == "call":
+        price, delta = S * cdf_d1 - K * math.exp(-r * T) * cdf_d2, cdf_d1
+    else:
+        price, delta = K * math.exp(-r * T) * cdf_neg_d2 - S * cdf_neg_d1, -cdf_neg_d1
+    return {"price": round(price, 2), "delta": round(delta, 4), "gamma": round(pdf_d1 / (S * sigma * math.sqrt(T)), 4)}
+
+
+def max_error(values: dict, reference: dict) -> float:
+    """Largest error over the greeks, relative to each greek's largest magnitude in the book"""
+    return max(float(np.max(np.abs(values[g] - reference[g])) / np.max(np.abs(reference[g]))) for g in GREEKS)
+
+
+def check_erfc():
+    x = np.linspace(-30, 30, 600_001)
+    ours = greeks_kernel.erfc(x)
+    libm = np.array([math.erfc(v) for v in x.tolist()])
+    normal = libm > 1e-300  # subnormal results carry few significant bits
+    vs_libm = float(np.max(np.abs(ours - libm)[normal] / libm[normal]))
+    vs_scipy = float(np.max(np.abs(ours - scipy_erfc(x))[normal] / libm[normal]))
+    edge = greeks_kernel.erfc(np.array([np.inf, -np.inf, np.nan] + [0.0] * greeks_kernel.SMALL_ARRAY))
+    assert edge[0] == 0 and edge[1] == 2 and np.isnan(edge[2]) and np.all(edge[3:] == 1)
+    print(f"erfc on [-30, 30]: max relative error {vs_libm:.1e} vs math.erfc, {vs_scipy:.1e} vs scipy "
+          f"(scipy and libm differ by as much in the far tail)")
+    assert vs_libm < 1e-14
+
+
+def check_accuracy():
+    book = make_book(BOOK)
+    inputs = (book["spot"], book["strike"], book["days"], book["vol"], book["rate"], book["is_call"])
+    reference = stats_greeks(*inputs)
+
+    scalar = {g: np.empty(1_000) for g in GREEKS}
+    for i in range(1_000):
+        values = greeks_kernel.black_scholes(book["spot"][i], book["strike"][i], book["days"][i] / 365,
+                                             book["vol"][i], 0.05, bool(book["is_call"][i]))
+        for g, value in zip(GREEKS, values):
+            scalar[g][i] = value
+    errors = {"scalar math.erfc": max_error(scalar, {g: reference[g][:1_000] for g in GREEKS})}
+    for name in backends():
+        with backend(name):
+            errors[name] = max_error(calculate_greeks_batch(*inputs), reference)
+
+    first = {k: book[k][0] for k in ("spot", "strike", "days", "vol")}
+    old = stats_greeks_scalar(first["spot"], first["strike"], first["days"], first["vol"])
+    new = calculate_greeks(first["spot"], first["strike"], first["days"], first["vol"])
+    assert all(old[g] == new[g] for g in old)
+
+    print(f"greeks on {BOOK:,} options vs scipy.stats.norm (max error / largest value):")
+    for name, error in errors.items():
+        print(f"  {name:<20} {error:.1e}")
+        assert error < 1e-12, name
+    print("  rounded calculate_greeks output unchanged: ok\n")
+
+
+def per_call(fn, calls: int = CALLS) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls
+
+
+def latency():
+    print("latency per call:")
+    x = 0.3
+    rows = [
+        ("normal CDF, scipy.stats.norm.cdf", per_call(lambda: norm.cdf(x), 5_000)),
+        ("normal CDF, scipy.special.ndtr", per_call(lambda: float(ndtr(x)))),
+        ("normal CDF, math.erfc", per_call(lambda: 0.5 * math.erfc(-x / greeks_kernel.SQRT_2))),
+        ("greeks, scipy.stats.norm (original)", per_call(lambda: stats_greeks_scalar(117_000, 117_000, 7, 0.35), 5_000)),
+        ("greeks, calculate_greeks", per_call(lambda: calculate_greeks(117_000, 117_000, 7, 0.35))),
+        ("greeks, black_scholes kernel", per_call(lambda: greeks_kernel.black_scholes(117_000, 117_000, 7 / 365, 0.35, 0.05, True))),
+    ]
+    for label, seconds in rows:
+        print(f"  {label:<38} {seconds * 1e6:8.2f} us")
+
+
+def arrays():
+    print(f"\ncalculate_greeks_batch:\n  {'options':>10}" + "".join(f"{name:>22}" for name in backends()))
+    for n in SIZES:
+        book = make_book(n)
+        inputs = (book["spot"], book["strike"], book["days"], book["vol"], book["rate"], book["is_call"])
+        cells = []
+        for name in backends():
+            with backend(name):
+                runs = max(3, 20_000 // n)
+                calculate_greeks_batch(*inputs)
+                best = min(per_call(lambda: calculate_greeks_batch(*inputs), 1) for _ in range(runs))
+            cells.append(f"{best * 1e6:>16.1f} us" if best < 1e-2 else f"{best * 1e3:>16.1f} ms")
+        print(f"  {n:>10,}" + "".join(f"{cell:>22}" for cell in cells))
+
+
+def main():
+    prewarm()
+    check_erfc()
+    check_accuracy()
+    latency()
+    arrays()
+
+
+if __name__ == "__main__":
+    main()
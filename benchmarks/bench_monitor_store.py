@@ -0,0 +1,89 @@
+"""
+Write-through cost and startup rehydration time of the SQLite monitor store.
+
+Writes POSITIONS monitored positions (spread over several assets and
+POSITIONS / 4 users) plus auto-hedge configs one transaction at a time, as
+the handlers do. Then it times what on_startup does after a restart: load()
+the database into the in-memory layout and re-register every position with
+the risk evaluator.
+
+    python benchmarks/bench_monitor_store.py [positions]
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bot")))
+import asyncio
+import random
+import tempfile
+import time
+
+from monitor_store import MonitorStore
+from positions import Position
+from risk_engine import RiskEvaluator
+
+POSITIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+ASSETS = ["BTC", "ETH", "SOL", "XRP"]
+
+
+class NullPoller:
+    def subscribe(self, asset, queue):
+        pass
+
+    def unsubscribe(self, asset, queue):
+        pass
+
+
+async def on_breach(key, asset, price):
+    pass
+
+
+async def rehydrate(path: str):
+    start = time.perf_counter()
+    store = MonitorStore(path)
+    monitors, auto_hedge = store.load()
+    loaded = time.perf_counter()
+
+    evaluator = RiskEvaluator(NullPoller(), on_breach)
+    for user_id, monitor in monitors.items():
+        for asset, position in monitor["assets"].items():
+            evaluator.watch(user_id, asset, position.size, position.threshold)
+    indexed = time.perf_counter()
+
+    evaluator.stop()
+    store.close()
+    assert len(evaluator.index) == POSITIONS
+    return loaded - start, indexed - loaded
+
+
+def main():
+    rng = random.Random(7)
+    users = max(1, POSITIONS // len(ASSETS))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "monitors.db")
+        store = MonitorStore(path)
+        start = time.perf_counter()
+        for i in range(POSITIONS):
+            user_id = i % users
+            store.save_position(user_id, 100 + user_id, Position(
+                asset=ASSETS[i // users % len(ASSETS)],
+                size=rng.uniform(0.1, 5.0),
+                threshold=rng.uniform(10_000, 500_000),
+                entry_price=117_000.0,
+            ))
+        for user_id in range(0, users, 2):
+            store.save_auto_hedge(user_id, {"strategy": "delta_neutral", "threshold": 250_000.0, "enabled": True})
+        write = (time.perf_counter() - start) / (POSITIONS + (users + 1) // 2)
+        store.close()
+
+        load_time, index_time = asyncio.run(rehydrate(path))
+
+    print(f"{POSITIONS:,} positions, {users:,} users")
+    print(f"write-through: {write * 1000:.3f} ms per change")
+    print(f"rehydrate: load {load_time * 1000:.1f} ms + re-index {index_time * 1000:.1f} ms "
+          f"= {(load_time + index_time) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Hedge netting across users against the local exchange simulator.
+
+USERS users breach on the same BTC move at once; UNWIND_SHARE of them are
+unwinding an earlier hedge (buy) rather than adding one (sell). Compared:
+
+* one hedge per user, all in flight together, each journaled with its own
+  fsync (the behaviour before netting);
+* HedgeNetter: intents collected for one window, opposite sides crossed
+  internally, the net executed as one order and the allocations journaled
+  in one write.
+
+Reports orders sent, market volume, fees, time until every user has an
+allocation and journal fsyncs, and checks that allocations are pro rata
+and add up to what was crossed and filled.
+
+    python benchmarks/bench_netting.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bot")))
+import asyncio
+import logging
+import random
+import tempfile
+import time
+
+import hedge_logger
+from exchange_sim import SimulatedVenue
+from hedge_engine import ExecutionPipeline
+from hedge_logger import HedgeJournal, log_hedge, log_hedges
+from hedge_netter import HedgeNetter
+
+PRICE = 117_000.0
+USERS = 500
+UNWIND_SHARE = 0.2
+
+
+class CountingJournal(HedgeJournal):
+    def __init__(self, path):
+        super().__init__(path, legacy_path=None)
+        self.writes = 0
+
+    def append(self, record):
+        self.writes += 1
+        super().append(record)
+
+    def extend(self, records):
+        self.writes += 1
+        super().extend(records)
+
+
+def make_intents(seed: int = 5) -> list:
+    rng = random.Random(seed)
+    return [
+        (user_id, "buy" if rng.random() < UNWIND_SHARE else "sell", rng.uniform(0.001, 0.05))
+        for user_id in range(USERS)
+    ]
+
+
+def pipeline() -> ExecutionPipeline:
+    return ExecutionPipeline([SimulatedVenue("bybit", seed=1), SimulatedVenue("deribit", seed=2)])
+
+
+async def one_per_user(intents: list, journal: CountingJournal) -> dict:
+    venues = pipeline()
+
+    async def hedge(user_id, side, size):
+        result = await venues.hedge("BTC", size, PRICE, side)
+        log_hedge("BTC", result["size"], PRICE, "auto")
+        return result
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(hedge(*intent) for intent in intents))
+    elapsed = time.perf_counter() - start
+    return {
+        "orders": sum(len(result["reports"]) for result in results),
+        "volume": sum(result["size"] for result in results),
+        "fees": sum(result["cost"] for result in results),
+        "elapsed": elapsed,
+        "fsyncs": journal.writes,
+    }
+
+
+async def netted(intents: list, journal: CountingJournal) -> dict:
+    venues = pipeline()
+    reports = []
+
+    async def execute(asset, size, price, side):
+        report = await venues.hedge(asset, size, price, side)
+        reports.append(report)
+        return report
+
+    netter = HedgeNetter(execute, log=log_hedges)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        netter.submit(user_id, "BTC", size, PRICE, side) for user_id, side, size in intents
+    ))
+    elapsed = time.perf_counter() - start
+
+    # Pro rata: every user on a side gets the same fraction of what they asked for
+    batch = results[0]["batch"]
+    filled = sum(report["size"] for report in reports)
+    for side in ("sell", "buy"):
+        fractions = [result["size"] / size for (_, s, size), result in zip(intents, results) if s == side]
+        assert max(fractions) - min(fractions) < 1e-9, side
+    allocated = sum(result["size"] for result in results)
+    assert abs(allocated - (2 * batch["crossed"] + filled)) < 1e-9
+
+    return {
+        "orders": sum(len(report["reports"]) for report in reports),
+        "volume": filled,
+        "fees": sum(report["cost"] for report in reports),
+        "elapsed": elapsed,
+        "fsyncs": journal.writes,
+        "crossed": batch["crossed"],
+        "net": batch["net_size"],
+    }
+
+
+async def main():
+    intents = make_intents()
+    requested = sum(size for _, _, size in intents)
+    print(f"{USERS} users breach at once ({UNWIND_SHARE:.0%} unwinding), {requested:.2f} BTC requested\n")
+    print(f"{'':>14} {'orders':>7} {'market BTC':>11} {'fees':>10} {'all allocated':>14} {'fsyncs':>7}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, run in (("one per user", one_per_user), ("netted", netted)):
+            journal = hedge_logger._journal = CountingJournal(os.path.join(tmp, f"{name}.jsonl"))
+            stats = await run(intents, journal)
+            journal.close()
+            print(f"{name:>14} {stats['orders']:>7} {stats['volume']:>11.3f} ${stats['fees']:>9,.2f} "
+                  f"{stats['elapsed'] * 1000:>11.1f} ms {stats['fsyncs']:>7}")
+
+    print(f"\nnetted: {stats['crossed']:.3f} BTC crossed internally, {stats['net']:.3f} BTC net on market")
+    print("allocations pro rata and fully accounted for: ok")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    asyncio.run(main())
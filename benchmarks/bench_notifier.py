@@ -0,0 +1,110 @@
+"""
+Notification latency and rate-limit compliance of the NotificationDispatcher.
+
+A fake bot takes SEND_LATENCY per call and answers with RetryAfter for a
+small share of calls. The benchmark measures:
+
+* how long a hedge's three notifications keep the caller busy, before (awaited
+  sends with sleep(1) between them) and after (enqueue);
+* ALERTS alerts over CHATS chats, arriving at ALERT_RATE: messages actually sent after
+  coalescing, time to drain, and the peak global and per-chat send rates,
+  which must stay within the token buckets.
+
+    python benchmarks/bench_notifier.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bot")))
+import asyncio
+import random
+import time
+from collections import Counter
+
+from telegram.error import RetryAfter
+
+import notifier as notifier_module
+from notifier import NotificationDispatcher, GLOBAL_RATE, CHAT_RATE
+
+SEND_LATENCY = 0.05  # seconds per Telegram round trip
+RETRY_SHARE = 0.02  # share of sends answered with 429
+CHATS = 200
+ALERTS = 2_000
+ALERT_RATE = 400  # alerts/s arriving from the risk evaluator
+
+
+class FakeBot:
+    def __init__(self, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.log = []  # (monotonic time, chat_id, text)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(SEND_LATENCY)
+        if self.rng.random() < RETRY_SHARE:
+            raise RetryAfter(1)
+        self.log.append((time.monotonic(), chat_id, text))
+
+
+async def hedge_latency():
+    bot = FakeBot()
+
+    start = time.perf_counter()
+    for i, text in enumerate(["confirmation", "cost", "performance"]):
+        await bot.send_message(chat_id=1, text=text)
+        if i < 2:
+            await asyncio.sleep(1)
+    before = time.perf_counter() - start
+
+    bot = FakeBot()
+    dispatcher = NotificationDispatcher(bot)
+    start = time.perf_counter()
+    for text in ["confirmation", "cost", "performance"]:
+        dispatcher.send(1, text)
+    after = time.perf_counter() - start
+    await dispatcher.drain()
+    dispatcher.stop()
+    return before, after, len(bot.log)
+
+
+async def burst():
+    bot = FakeBot()
+    dispatcher = NotificationDispatcher(bot)
+    rng = random.Random(11)
+
+    start = time.monotonic()
+    for i in range(ALERTS):
+        dispatcher.send(rng.randrange(CHATS), f"🚨 alert {i}")
+        if i % 10 == 9:
+            await asyncio.sleep(10 / ALERT_RATE)
+    await dispatcher.drain(timeout=120)
+    elapsed = time.monotonic() - start
+    dispatcher.stop()
+
+    delivered = sum(text.count("🚨 alert") for _, _, text in bot.log)
+    # Sends can only start once a token is taken, so count by one-second windows
+    per_second = Counter(int(t - start) for t, _, _ in bot.log)
+    gaps = []
+    last = {}
+    for t, chat_id, _ in bot.log:
+        if chat_id in last:
+            gaps.append(t - last[chat_id])
+        last[chat_id] = t
+    return elapsed, len(bot.log), delivered, max(per_second.values()), min(gaps) if gaps else None
+
+
+async def main():
+    before, after, sent = await hedge_latency()
+    print("hedge notifications (3 messages):")
+    print(f"  awaited + sleep(1): caller busy {before * 1000:8.1f} ms")
+    print(f"  dispatcher.send:    caller busy {after * 1000:8.3f} ms  ({sent} message(s) sent)\n")
+
+    elapsed, messages, delivered, peak, min_gap = await burst()
+    print(f"{ALERTS:,} alerts over {CHATS} chats at {ALERT_RATE}/s ({RETRY_SHARE:.0%} answered with 429):")
+    print(f"  delivered {delivered:,} alerts in {messages:,} messages, drained in {elapsed:.1f}s")
+    print(f"  peak {peak} msg/s (limit {GLOBAL_RATE}), min gap per chat {min_gap:.2f}s (limit {1 / CHAT_RATE:.2f}s)")
+    assert delivered == ALERTS
+
+
+if __name__ == "__main__":
+    notifier_module.logger.disabled = True  # 429 warnings would flood the output
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""
+Route computation time of order_router.route() on deep books.
+
+Two synthetic venues with different spreads, depth and fees are routed
+against for growing book depths and order sizes (up to half the combined
+depth), with books given as the (n, 2) arrays data_fetcher caches and as
+plain lists of pairs. Every plan is checked against a plain heap-merge walk of the same
+books, and its expected cost is compared with the old behaviour: the whole
+hedge on the first venue (n/a when that venue is too thin), or split evenly.
+
+    python benchmarks/bench_order_router.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import heapq
+import time
+
+import numpy as np
+
+from order_router import route, TAKER_FEES
+
+MID = 117_000.0
+DEPTHS = [200, 1_000, 10_000, 100_000]  # levels per side per venue
+FILL_SHARES = [0.01, 0.1, 0.5]  # order size as a share of the combined depth
+REPEAT = 20
+
+
+def make_books(levels: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    books = {}
+    # Bybit: tight and thin; Deribit: a wider touch but more size per level
+    for venue, half_spread, tick, mean_size in (("bybit", 0.05, 0.1, 0.8), ("deribit", 0.5, 0.5, 2.0)):
+        steps = np.arange(levels) * tick
+        size = rng.exponential(mean_size, levels) + 0.001
+        books[venue] = {
+            "bids": np.column_stack([MID - half_spread - steps, size]),
+            "asks": np.column_stack([MID + half_spread + steps, size[::-1]]),
+        }
+    return books
+
+
+def as_lists(books: dict) -> dict:
+    """The same books as [[price, size]] lists"""
+    return {venue: {side: levels.tolist() for side, levels in book.items()} for venue, book in books.items()}
+
+
+def heap_route(side: str, size: float, books: dict) -> dict:
+    """Reference greedy walk: pop the best fee-adjusted level across venues"""
+    sign = 1.0 if side == "sell" else -1.0
+    book_side = "bids" if side == "sell" else "asks"
+    heap = []
+    for venue, book in books.items():
+        fee = TAKER_FEES[venue]
+        for price, qty in book[book_side]:
+            heap.append((-sign * price * (1 - sign * fee), venue, price, qty))
+    heapq.heapify(heap)
+    sizes = {}
+    while size > 1e-12 and heap:
+        _, venue, price, qty = heapq.heappop(heap)
+        take = min(qty, size)
+        sizes[venue] = sizes.get(venue, 0.0) + take
+        size -= take
+    return sizes
+
+
+def walk_cost(side: str, size: float, books: dict, split: dict) -> float:
+    """Fees plus slippage (USD, vs the best touch) of taking split[venue] on each venue"""
+    sign = 1.0 if side == "sell" else -1.0
+    book_side = "bids" if side == "sell" else "asks"
+    reference = sign * max(sign * book[book_side][0][0] for book in books.values())
+    cost = 0.0
+    for venue, wanted in split.items():
+        for price, qty in books[venue][book_side]:
+            if wanted <= 1e-12:
+                break
+            take = min(qty, wanted)
+            cost += take * price * TAKER_FEES[venue] + sign * take * (reference - price)
+            wanted -= take
+        if wanted > 1e-9:
+            return None  # the venue cannot absorb its share
+    return cost
+
+
+def timed(fn, repeat: int = REPEAT):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def dollars(cost) -> str:
+    return "n/a" if cost is None else f"${cost:,.0f}"
+
+
+def main():
+    print(f"{'levels':>8} {'size':>9} {'route(arrays)':>14} {'route(lists)':>13} {'heap walk':>10}  "
+          f"{'cost: routed':>14} {'first venue':>14} {'even split':>14}")
+    for levels in DEPTHS:
+        arrays = make_books(levels)
+        lists = as_lists(arrays)
+        depth = sum(float(book["bids"][:, 1].sum()) for book in arrays.values())
+        for share in FILL_SHARES:
+            size = depth * share
+
+            plan, on_arrays = timed(lambda: route("BTC", "sell", size, arrays))
+            _, on_lists = timed(lambda: route("BTC", "sell", size, lists))
+            expected, walked = timed(lambda: heap_route("sell", size, lists), repeat=1)
+
+            for venue, qty in expected.items():
+                assert abs(plan.sizes.get(venue, 0.0) - qty) <= 1e-6 * size, (venue, plan.sizes, expected)
+            assert plan.unfilled == 0
+            assert abs(walk_cost("sell", size, lists, plan.sizes) - plan.expected_cost) <= 1e-6 * plan.expected_cost
+
+            first = walk_cost("sell", size, lists, {"bybit": size})
+            even = walk_cost("sell", size, lists, {venue: size / len(lists) for venue in lists})
+            print(f"{levels:>8,} {size:>9,.0f} {on_arrays * 1000:>11.2f} ms {on_lists * 1000:>10.2f} ms "
+                  f"{walked * 1000:>7.1f} ms  {dollars(plan.expected_cost):>14} {dollars(first):>14} {dollars(even):>14}")
+    print("\nrouted splits match the heap walk: ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Memory and throughput of the position model at POSITIONS positions.
+
+Compares the old per-position dicts with slotted Position objects (memory
+via tracemalloc), and per-position Python loops with PositionBook array
+expressions for exposures, breach flags, P&L and delta exposures.
+
+    python benchmarks/bench_positions.py [positions]
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bot")))
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from greeks import calculate_greeks_batch
+from positions import Position, PositionBook
+
+POSITIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+ASSETS = ["BTC", "ETH", "SOL", "XRP"]
+PRICES = {"BTC": 117_000.0, "ETH": 2_950.0, "SOL": 160.0, "XRP": 2.4}
+
+
+def measure(build):
+    tracemalloc.start()
+    objects = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objects, current
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rng = random.Random(7)
+    specs = [
+        (ASSETS[i % len(ASSETS)], rng.uniform(0.1, 5.0), rng.uniform(1_000, 500_000),
+         PRICES[ASSETS[i % len(ASSETS)]] * rng.uniform(0.9, 1.1))
+        for i in range(POSITIONS)
+    ]
+
+    dicts, dict_bytes = measure(lambda: [
+        {"size": size, "threshold": threshold, "exposure": size * entry, "entry_price": entry,
+         "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")}
+        for asset, size, threshold, entry in specs
+    ])
+    positions, position_bytes = measure(lambda: [
+        Position(asset=asset, size=size, threshold=threshold, entry_price=entry, exposure=size * entry)
+        for asset, size, threshold, entry in specs
+    ])
+    book, book_bytes = measure(lambda: PositionBook(positions))
+
+    print(f"{POSITIONS:,} positions\n")
+    print("memory per position:")
+    print(f"  dict            {dict_bytes / POSITIONS:8.0f} B")
+    print(f"  Position        {position_bytes / POSITIONS:8.0f} B")
+    print(f"  PositionBook    {book_bytes / POSITIONS:8.0f} B  (on top of the Positions)\n")
+
+    def loop_metrics():
+        for p in positions:
+            price = PRICES[p.asset]
+            p.exposure_at(price) > p.threshold
+            p.pnl(price)
+
+    def book_metrics():
+        spots = book.spots(PRICES)
+        book.breached(spots)
+        book.pnl(spots)
+
+    def loop_portfolio():
+        # What portfolio_metrics did per position before: greeks and totals in Python
+        spots = np.array([PRICES[p.asset] for p in positions])
+        greeks = calculate_greeks_batch(spots, np.round(spots), 7, 0.35)
+        totals = {name: 0.0 for name in greeks}
+        for i, p in enumerate(positions):
+            p.size * spots[i] * greeks["delta"][i]
+            for name, values in greeks.items():
+                totals[name] += values[i] * p.size
+
+    def book_portfolio():
+        spots = book.spots(PRICES)
+        greeks = calculate_greeks_batch(spots, np.round(spots), 7, 0.35)
+        book.delta_exposures(spots, greeks["delta"])
+        book.totals(greeks)
+
+    print("throughput:")
+    for label, loop, vectorized in [
+        ("exposure/breach/P&L", loop_metrics, book_metrics),
+        ("portfolio greeks", loop_portfolio, book_portfolio),
+    ]:
+        loop_time, book_time = best_of(loop), best_of(vectorized)
+        print(f"  {label:<20} loop {loop_time * 1000:8.2f} ms  book {book_time * 1000:7.2f} ms  "
+              f"{loop_time / book_time:6.1f}x")
+
+    # Same answers either way
+    spots = book.spots(PRICES)
+    expected = np.array([p.pnl(PRICES[p.asset]) for p in positions])
+    assert np.allclose(book.pnl(spots), expected)
+    del dicts
+
+
+if __name__ == "__main__":
+    main()
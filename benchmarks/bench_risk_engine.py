@@ -0,0 +1,83 @@
+"""
+Threshold checks per price tick: scanning every position vs the BreachIndex.
+
+Positions get random sizes (some short) and thresholds around their current
+exposure. A random-walk price path is replayed against both approaches; the
+index must report exactly the positions a full scan finds newly breached.
+
+    python benchmarks/bench_risk_engine.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bot")))
+import random
+import time
+
+from risk_engine import BreachIndex
+
+SIZES = [1_000, 10_000, 100_000]
+TICKS = 1_000
+START_PRICE = 117_000.0
+
+
+def make_positions(n: int, rng: random.Random) -> list:
+    positions = []
+    for key in range(n):
+        size = rng.uniform(0.01, 5.0) * (1 if rng.random() < 0.8 else -1)
+        threshold = abs(size) * START_PRICE * rng.uniform(0.97, 1.03) * (1 if size > 0 else -1)
+        positions.append((key, size, threshold))
+    return positions
+
+
+def price_path(rng: random.Random) -> list:
+    prices = [START_PRICE]
+    for _ in range(TICKS):
+        prices.append(prices[-1] * (1 + rng.gauss(0, 0.001)))
+    return prices
+
+
+def scan(positions: list, prices: list) -> list:
+    """What the per-user loops did: recompute every exposure on every tick"""
+    crossed = []
+    breached = {key for key, size, threshold in positions if prices[0] * size > threshold}
+    for price in prices[1:]:
+        now = {key for key, size, threshold in positions if price * size > threshold}
+        crossed.append(now - breached)
+        breached = now
+    return crossed
+
+
+def indexed(index: BreachIndex, prices: list) -> list:
+    return [set(index.crossed("BTC", old, new)) for old, new in zip(prices, prices[1:])]
+
+
+def main():
+    rng = random.Random(7)
+    prices = price_path(rng)
+    print(f"{TICKS:,} ticks per run\n")
+    print(f"{'positions':>10} {'scan':>12} {'index':>12} {'speedup':>9} {'alerts':>9}")
+    for n in SIZES:
+        positions = make_positions(n, rng)
+        index = BreachIndex()
+        for key, size, threshold in positions:
+            index.upsert("BTC", key, size, threshold)
+
+        start = time.perf_counter()
+        expected = scan(positions, prices)
+        scan_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        got = indexed(index, prices)
+        index_time = time.perf_counter() - start
+
+        assert got == expected, "BreachIndex disagrees with a full scan"
+        alerts = sum(len(keys) for keys in got)
+        print(
+            f"{n:>10,} {scan_time / TICKS * 1e6:>9.1f} us {index_time / TICKS * 1e6:>9.1f} us "
+            f"{scan_time / index_time:>8.0f}x {alerts:>9,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Bot startup cost, measured with ``python -X importtime`` in fresh interpreters.
+
+Reports the cumulative import time of telegram_bot, the heaviest modules it
+pulls in, and the latency of the first calculate_greeks call after import.
+Pass --json to get one machine-readable line for tracking release over release.
+
+    python benchmarks/bench_startup.py [--runs 5] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+IMPORT_SNIPPET = "import sys; sys.path[:0] = ['.', 'bot']; import telegram_bot"
+FIRST_CALL_SNIPPET = IMPORT_SNIPPET + """
+import time
+start = time.perf_counter()
+telegram_bot.calculate_greeks(117000, 117000, 7, 0.35)
+print(time.perf_counter() - start)
+"""
+
+
+def run(snippet: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    env = dict(os.environ, TELEGRAM_BOT_TOKEN=os.environ.get("TELEGRAM_BOT_TOKEN", "benchmark"))
+    return subprocess.run(cmd + ["-c", snippet], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """module -> cumulative microseconds (first occurrence wins)"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        modules.setdefault(name.strip(), int(cumulative))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    totals, first_calls, samples = [], [], []
+    for _ in range(args.runs):
+        modules = parse_importtime(run(IMPORT_SNIPPET, importtime=True).stderr)
+        totals.append(modules["telegram_bot"] / 1000)
+        samples.append(modules)
+        first_calls.append(float(run(FIRST_CALL_SNIPPET).stdout.strip()) * 1000)
+
+    # Heaviest modules by median cumulative time across runs
+    names = set().union(*samples)
+    heaviest = sorted(
+        ((statistics.median(s.get(n, 0) for s in samples) / 1000, n) for n in names if n != "telegram_bot"),
+        reverse=True,
+    )[:args.top]
+
+    result = {
+        "python": sys.version.split()[0],
+        "import_ms": round(statistics.median(totals), 1),
+        "first_greeks_call_ms": round(statistics.median(first_calls), 2),
+        "heaviest": {name: round(ms, 1) for ms, name in heaviest},
+    }
+
+    if args.json:
+        print(json.dumps(result))
+        return
+
+    print(f"import telegram_bot: {result['import_ms']:.1f} ms (median of {args.runs})")
+    print(f"first calculate_greeks call: {result['first_greeks_call_ms']:.2f} ms\n")
+    print("heaviest imports (cumulative):")
+    for name, ms in result["heaviest"].items():
+        print(f"  {ms:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Tick-to-store latency of the WebSocket price stream, and reconnect behaviour.
+
+A local stand-in for the Bybit public stream pushes ticker frames at a fixed
+rate. Each frame carries a unique price, so the PriceStore quote listener can
+match it to its send time. Every DROP_EVERY frames the server closes the
+socket, which shows the stream reconnecting (with backoff) and resubscribing.
+
+For comparison, REST polling every POLL_INTERVAL seconds sees a move
+POLL_INTERVAL / 2 seconds late on average.
+
+    python benchmarks/bench_stream.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bot")))
+import asyncio
+import statistics
+import tempfile
+import time
+
+from aiohttp import web
+
+import data_fetcher
+import stream_feeds
+from market_poller import POLL_INTERVAL
+
+FRAMES = 2_000
+RATE = 500  # frames per second
+DROP_EVERY = 500  # server closes the connection after this many frames
+
+
+async def main():
+    sent = {}  # price -> perf_counter at send
+    latencies = []
+    gaps = []  # seconds from a forced disconnect to the next delivered price
+    state = {"next": 0, "dropped_at": None}
+    done = asyncio.Event()
+
+    async def bybit_ws(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        subscribe = await ws.receive_json()
+        assert subscribe["op"] == "subscribe", subscribe
+
+        for _ in range(DROP_EVERY):
+            if state["next"] >= FRAMES:
+                break
+            price = 100_000.0 + state["next"]
+            state["next"] += 1
+            sent[price] = time.perf_counter()
+            await ws.send_json({
+                "topic": "tickers.BTCUSDT",
+                "type": "snapshot",
+                "data": {"symbol": "BTCUSDT", "lastPrice": str(price)},
+            })
+            await asyncio.sleep(1 / RATE)
+
+        state["dropped_at"] = time.perf_counter()
+        await ws.close()
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/v5/public/linear", bybit_ws)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    def on_quote(asset, ts, latest):
+        now = time.perf_counter()
+        price = latest.get("bybit")
+        if price not in sent:
+            return
+        latencies.append(now - sent.pop(price))
+        if state["dropped_at"] is not None:
+            gaps.append(now - state["dropped_at"])
+            state["dropped_at"] = None
+        if state["next"] >= FRAMES and not sent:
+            done.set()
+
+    store = data_fetcher.get_price_store()
+    store.add_quote_listener(on_quote)
+    stream = stream_feeds.BybitStream(store, ["BTC"], url=f"http://127.0.0.1:{port}/v5/public/linear")
+    stream.start()
+
+    start = time.perf_counter()
+    await asyncio.wait_for(done.wait(), timeout=60)
+    elapsed = time.perf_counter() - start
+    stream.stop()
+    await data_fetcher.close_session()
+    await runner.cleanup()
+    store.flush()
+
+    lat_ms = sorted(latency * 1000 for latency in latencies)
+    p99 = lat_ms[int(len(lat_ms) * 0.99) - 1]
+    print(f"{len(lat_ms):,} streamed ticks in {elapsed:.2f}s ({stream.reconnects} reconnects)")
+    print(f"send -> PriceStore listener: p50 {statistics.median(lat_ms):.3f} ms  p99 {p99:.3f} ms  max {lat_ms[-1]:.3f} ms")
+    if gaps:
+        print(f"disconnect -> next price: mean {statistics.mean(gaps) * 1000:.0f} ms (backoff {stream_feeds.RECONNECT_MIN}s base)")
+    print(f"REST polling every {POLL_INTERVAL}s: ~{POLL_INTERVAL / 2 * 1000:,.0f} ms mean staleness")
+
+
+if __name__ == "__main__":
+    # Keep reconnect waits short so the run finishes quickly
+    stream_feeds.RECONNECT_MIN = 0.05
+    with tempfile.TemporaryDirectory() as tmp:
+        data_fetcher.CACHE_PATH = os.path.join(tmp, "live_data.json")
+        asyncio.run(main())
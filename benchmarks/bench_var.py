@@ -0,0 +1,156 @@
+"""
+Monte Carlo VaR: accuracy, throughput and caching.
+
+* model: BTC/ETH histories with a known 0.8 correlation, sampled at
+  different tick times; the fitted horizon covariance against the truth;
+* accuracy: a book of perp hedges only (linear in the returns) against
+  the analytic delta-normal VaR and ES of the same covariance;
+* throughput: paths/s for full revaluation and delta-gamma, one batch at a
+  time and on a process pool with one worker per core;
+* cache: a repeated /portfolio_metrics at the same prices;
+* placeholder: the old 10%-of-delta-exposure VaR next to the simulated one
+  for a long BTC + ETH book.
+
+    python benchmarks/bench_var.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bot")))
+import time
+
+import numpy as np
+from scipy.stats import norm
+
+from greeks import calculate_greeks_batch, prewarm
+from positions import Position
+from var_engine import VaREngine, OPTION_DAYS, OPTION_VOL
+
+TICKS = 5_000
+TICK_SECONDS = 60
+VOLS = np.array([0.55, 0.75])  # annualized, BTC and ETH
+CORRELATION = 0.8
+SPOTS = {"BTC": 117_000.0, "ETH": 3_100.0}
+PATHS = 200_000
+
+
+class SyntheticEngine(VaREngine):
+    """Reads the synthetic histories instead of the tick log"""
+
+    def __init__(self, histories: dict, **kwargs):
+        super().__init__(**kwargs)
+        self.histories = histories
+
+    def _history(self, asset):
+        return self.histories[asset]
+
+
+def true_covariance(horizon_days: float = 1.0) -> np.ndarray:
+    corr = np.array([[1.0, CORRELATION], [CORRELATION, 1.0]])
+    return corr * np.outer(VOLS, VOLS) * horizon_days / 365
+
+
+def synthetic_histories(seed: int = 3) -> dict:
+    rng = np.random.default_rng(seed)
+    step_cov = true_covariance(TICK_SECONDS / 86_400)
+    returns = rng.standard_normal((TICKS, 2)) @ np.linalg.cholesky(step_cov).T
+    ts = 1.7e9 + np.arange(TICKS) * TICK_SECONDS
+    histories = {}
+    for i, asset in enumerate(SPOTS):
+        prices = SPOTS[asset] * np.exp(np.cumsum(returns[:, i]))
+        # The venues are polled a few seconds apart
+        histories[asset] = (ts + rng.uniform(0, 5), prices)
+    return histories
+
+
+def check_model(histories: dict):
+    engine = SyntheticEngine(histories)
+    fitted = engine.covariance(["BTC", "ETH"])
+    vols = np.sqrt(np.diag(fitted) * 365)
+    corr = fitted[0, 1] / np.sqrt(fitted[0, 0] * fitted[1, 1])
+    print(f"model ({TICKS:,} ticks): vols {vols.round(3).tolist()} (true {VOLS.tolist()}), "
+          f"correlation {corr:.3f} (true {CORRELATION})")
+    assert np.allclose(vols, VOLS, rtol=0.05) and abs(corr - CORRELATION) < 0.03
+
+
+def check_accuracy():
+    # Long 1 BTC and short 20 ETH of perps: no options, so P&L is linear in the moves
+    positions = [Position("BTC", 0.0, 0.0, 0.0, hedge=-1.0), Position("ETH", 0.0, 0.0, 0.0, hedge=20.0)]
+    cov = true_covariance()
+    engine = SyntheticEngine({}, paths=PATHS)
+    engine.covariance = lambda assets: cov
+
+    exposure = np.array([SPOTS["BTC"] * 1.0, SPOTS["ETH"] * -20.0])
+    sigma = float(np.sqrt(exposure @ cov @ exposure))
+    z = norm.ppf(0.99)
+    expected_var, expected_es = z * sigma, sigma * norm.pdf(z) / 0.01
+
+    result = engine.portfolio_var(positions, SPOTS)
+    print(f"accuracy ({PATHS:,} paths): VaR ${result['var']:,.0f} vs ${expected_var:,.0f} delta-normal, "
+          f"ES ${result['es']:,.0f} vs ${expected_es:,.0f}")
+    assert abs(result["var"] / expected_var - 1) < 0.03
+    assert abs(result["es"] / expected_es - 1) < 0.03
+    print("  matches the analytic VaR and ES: ok\n")
+
+
+def long_book() -> list:
+    return [Position("BTC", 1.5, 1e6, 110_000.0), Position("ETH", 20.0, 1e6, 3_000.0)]
+
+
+def throughput(histories: dict):
+    cores = os.cpu_count() or 1
+    print(f"throughput ({PATHS:,} paths, 2 positions, {cores} core(s)):")
+    for method in ("full", "delta_gamma"):
+        for processes in sorted({1, cores}):
+            engine = SyntheticEngine(histories, paths=PATHS, method=method, processes=processes)
+            engine.portfolio_var(long_book(), SPOTS)  # model fit, pool start-up
+            started = time.perf_counter()
+            runs = 5
+            for i in range(runs):
+                engine.portfolio_var(long_book(), {"BTC": SPOTS["BTC"] + i + 1, "ETH": SPOTS["ETH"]})
+            elapsed = (time.perf_counter() - started) / runs
+            engine.close()
+            print(f"  {method:<11} {processes:>2} process(es): {elapsed * 1000:7.1f} ms "
+                  f"({PATHS / elapsed / 1e6:.1f}M paths/s)")
+
+
+def cache(histories: dict):
+    engine = SyntheticEngine(histories)
+    started = time.perf_counter()
+    first = engine.portfolio_var(long_book(), SPOTS)
+    miss = time.perf_counter() - started
+    started = time.perf_counter()
+    runs = 1_000
+    for _ in range(runs):
+        again = engine.portfolio_var(long_book(), SPOTS)
+    hit = (time.perf_counter() - started) / runs
+    assert again is first and engine.stats["hits"] == runs
+    print(f"\ncache: first call {miss * 1000:.1f} ms, repeat at the same tick {hit * 1e6:.1f} us")
+    return first
+
+
+def placeholder(result: dict):
+    book = long_book()
+    spots = np.array([SPOTS[p.asset] for p in book])
+    delta = calculate_greeks_batch(spots, np.round(spots), OPTION_DAYS, OPTION_VOL)["delta"]
+    old = 0.1 * np.array([p.size for p in book]) * spots * delta
+    print(f"\nlong 1.5 BTC + 20 ETH of 7-day ATM calls:")
+    for i, position in enumerate(book):
+        print(f"  {position.asset}: placeholder ${old[i]:,.0f}, Monte Carlo ${result['position_var'][i]:,.0f}")
+    print(f"  total: placeholder ${old.sum():,.0f} (sum), Monte Carlo ${result['var']:,.0f} "
+          f"(ES ${result['es']:,.0f})")
+
+
+def main():
+    prewarm()
+    histories = synthetic_histories()
+    check_model(histories)
+    check_accuracy()
+    throughput(histories)
+    result = cache(histories)
+    placeholder(result)
+
+
+if __name__ == "__main__":
+    main()
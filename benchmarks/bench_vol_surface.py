@@ -0,0 +1,251 @@
+"""
+Implied vol solver and vol surface built from Deribit option quotes.
+
+Quotes are synthetic Deribit book summaries priced off a known smile, saved
+as a fixture file and also served by a local stub of Deribit's
+get_book_summary_by_currency endpoint.
+
+* solver: vectorized Newton (with brentq fallback) against the known vols
+  and against brentq one option at a time;
+* surface: built from the fixture and from the stub API (same result),
+  lookups at the quoted points against the known vols, and the cost of one
+  lookup next to solving an ATM vol per request;
+* refresh: snapshots where REPRICED of the quotes moved and where the
+  underlying (so every forward and USD mark) moved; incremental, seeded
+  from the previous vols, vs rebuilding from scratch, and the solver alone
+  cold vs seeded.
+
+    python benchmarks/bench_vol_surface.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bot")))
+import asyncio
+import json
+import logging
+import math
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from aiohttp import web
+from scipy.optimize import brentq
+
+import data_fetcher
+from greeks import calculate_greeks_batch, prewarm
+from vol_surface import VolSurface, VolSurfaceCache, implied_vol, load_option_quotes, MIN_VOL, MAX_VOL
+
+FORWARD = 117_000.0
+EXPIRY_DAYS = [1, 2, 7, 14, 30, 60, 90, 180, 270]
+MONEYNESS = np.linspace(-0.6, 0.6, 49)
+REPRICED = 0.1
+UNDERLYING_MOVE = 5e-4
+LOOKUPS = 100_000
+
+
+def true_vol(days, moneyness):
+    """Smile with a skew and a term structure"""
+    return 0.45 + 0.15 * np.exp(-np.asarray(days) / 30) - 0.08 * moneyness + 0.35 * moneyness**2
+
+
+def synthetic_summaries(now: datetime) -> dict:
+    summaries = []
+    for days in EXPIRY_DAYS:
+        expiry = (now + timedelta(days=days)).replace(hour=8, minute=0, second=0, microsecond=0)
+        T_days = (expiry.timestamp() - now.timestamp()) / 86_400
+        code = f"{expiry.day}{expiry.strftime('%b').upper()}{expiry.strftime('%y')}"
+        forward = FORWARD * math.exp(0.05 * T_days / 365)
+        strikes = np.unique(np.round(forward * np.exp(MONEYNESS) / 500) * 500)
+        vols = true_vol(T_days, np.log(strikes / forward))
+        for is_call in (True, False):
+            prices = calculate_greeks_batch(forward, strikes, T_days, vols, 0.0, is_call)["price"]
+            for strike, vol, price in zip(strikes.tolist(), vols.tolist(), prices.tolist()):
+                summaries.append({
+                    "instrument_name": f"BTC-{code}-{int(strike)}-{'C' if is_call else 'P'}",
+                    "mark_price": price / forward,
+                    "underlying_price": forward,
+                    "mark_iv": vol * 100,
+                })
+    return {"result": summaries}
+
+
+def has_time_value(quotes: dict) -> np.ndarray:
+    """
+    Quotes worth more than intrinsic by at least Deribit's 0.0001 BTC tick.
+
+    Deep in- or out-of-the-money short-dated prices are all intrinsic (or
+    zero) to float precision and pin down no vol.
+    """
+    intrinsic = np.where(quotes["is_call"], np.maximum(quotes["forward"] - quotes["strike"], 0),
+                         np.maximum(quotes["strike"] - quotes["forward"], 0))
+    return quotes["price"] - intrinsic > 1e-4 * quotes["forward"]
+
+
+def check_solver(quotes: dict, summaries: dict, now: float):
+    days = (quotes["expiry"] - now) / 86_400
+    truth = np.array([s["mark_iv"] / 100 for s in summaries["result"]])
+
+    started = time.perf_counter()
+    vols = implied_vol(quotes["price"], quotes["forward"], quotes["strike"], days, quotes["is_call"])
+    vectorized = time.perf_counter() - started
+
+    started = time.perf_counter()
+    looped = []
+    for i in range(len(truth)):
+        def error(vol):
+            value = calculate_greeks_batch(quotes["forward"][i], quotes["strike"][i], days[i], vol, 0.0, quotes["is_call"][i])
+            return float(value["price"]) - quotes["price"][i]
+        try:
+            looped.append(brentq(error, MIN_VOL, MAX_VOL, xtol=1e-10))
+        except ValueError:
+            looped.append(np.nan)
+    loop = time.perf_counter() - started
+
+    informative = has_time_value(quotes)
+    solved = ~np.isnan(vols)
+    error = np.abs(vols[informative] - truth[informative]).max()
+    agree = np.abs(vols[informative] - np.array(looped)[informative]).max()
+    print(f"solver ({len(truth):,} quotes, {informative.sum():,} with time value above one tick): "
+          f"max error vs true vol {error:.1e}, vs brentq {agree:.1e} ({solved.sum():,} solved in all)")
+    print(f"  vectorized Newton {vectorized * 1000:6.1f} ms, brentq per option {loop * 1000:7.1f} ms "
+          f"({loop / vectorized:.0f}x)")
+    assert error < 1e-6 and agree < 1e-6
+
+
+async def summaries_handler(request):
+    return web.json_response(request.app["summaries"])
+
+
+async def from_stub_api(summaries: dict, now: float) -> VolSurface:
+    app = web.Application()
+    app["summaries"] = summaries
+    app.router.add_get("/api/v2/public/get_book_summary_by_currency", summaries_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    data_fetcher.DERIBIT_API = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    try:
+        quotes = await data_fetcher.get_deribit_option_quotes_async("BTC")
+    finally:
+        await data_fetcher.close_session()
+        await runner.cleanup()
+    surface = VolSurface()
+    surface.update(quotes, now)
+    return surface
+
+
+def check_surface(surface: VolSurface, quotes: dict, now: float):
+    days = (quotes["expiry"] - now) / 86_400
+    looked_up = surface.vols(days, quotes["strike"], quotes["forward"])
+    truth = true_vol(days, np.log(quotes["strike"] / quotes["forward"]))
+    error = np.abs(looked_up - truth)[has_time_value(quotes)]
+    print(f"surface: max lookup error {error.max():.4f} over the quoted points with time value "
+          f"(mean {error.mean():.4f}; days are bucketed to whole days)")
+    assert error.max() < 0.02, error.max()
+
+    surfaces = VolSurfaceCache(default_vol=0.35)
+    surfaces._surfaces["BTC"] = surface
+    started = time.perf_counter()
+    for _ in range(LOOKUPS):
+        surfaces.vol("BTC", 7, 117_000, 117_250.5)
+    lookup = (time.perf_counter() - started) / LOOKUPS
+
+    runs = 200
+    started = time.perf_counter()
+    for _ in range(runs):
+        implied_vol(3_000.0, 117_250.5, 117_000, 7, True)
+    solve = (time.perf_counter() - started) / runs
+    print(f"  lookup {lookup * 1e6:.2f} us per option vs {solve * 1e6:.0f} us to solve one ATM vol per request")
+
+
+def timed_update(base: dict, moved: dict, now: float, runs: int = 5) -> tuple:
+    """Best time to apply moved to a surface built from base (None: to a new surface), and that surface"""
+    best = float("inf")
+    for _ in range(runs):
+        surface = VolSurface()
+        if base is not None:
+            surface.update(base, now)
+        started = time.perf_counter()
+        surface.update(moved, now)
+        best = min(best, time.perf_counter() - started)
+    return best, surface
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def quoted_vols(surface: VolSurface, quotes: dict) -> np.ndarray:
+    return np.array([surface._quotes[name][5] for name in quotes["instrument"]])
+
+
+def check_refresh(quotes: dict, now: float):
+    """
+    Incremental updates, seeded from the previous vols, against a surface
+    built from scratch. Quotes worth more than a tick must solve to the same
+    vol; far-wing quotes worth a fraction of a tick match their price to
+    float precision over a range of vols, so those may settle elsewhere.
+    """
+    rng = np.random.default_rng(2)
+    repriced = dict(quotes, price=quotes["price"].copy())
+    repriced["price"][rng.random(len(quotes["price"])) < REPRICED] *= 1.01
+    # The underlying moves: every forward and (in USD) every mark moves with it
+    underlying = dict(quotes, price=quotes["price"] * (1 + UNDERLYING_MOVE),
+                      forward=quotes["forward"] * (1 + UNDERLYING_MOVE))
+
+    print()
+    for label, moved in ((f"{REPRICED:.0%} of quotes repriced", repriced),
+                         (f"underlying {UNDERLYING_MOVE:+.2%}", underlying)):
+        incremental, surface = timed_update(quotes, moved, now)
+        full, fresh = timed_update(None, moved, now)
+        informative = has_time_value(moved)
+        difference = np.abs(quoted_vols(surface, moved) - quoted_vols(fresh, moved))[informative]
+        print(f"refresh, {label}: incremental {incremental * 1000:.1f} ms ({surface.solved} re-solved), "
+              f"from scratch {full * 1000:.1f} ms ({fresh.solved} solved); vols with time value within "
+              f"{np.nanmax(difference):.0e}")
+        assert np.nanmax(difference) < 1e-6
+
+    # The solver alone on the moved underlying: cold start vs seeded from the previous vols
+    base = VolSurface()
+    base.update(quotes, now)
+    days = (underlying["expiry"] - now) / 86_400
+    inputs = (underlying["price"], underlying["forward"], underlying["strike"], days, underlying["is_call"])
+    cold = min(timed(lambda: implied_vol(*inputs)) for _ in range(5))
+    seeds = quoted_vols(base, quotes)
+    seeded = min(timed(lambda: implied_vol(*inputs, guess=seeds)) for _ in range(5))
+    print(f"  implied_vol after the underlying move: cold start {cold * 1000:.2f} ms, "
+          f"seeded {seeded * 1000:.2f} ms ({cold / seeded:.1f}x)")
+
+
+def main():
+    prewarm()
+    now_dt = datetime.now(timezone.utc)
+    now = now_dt.timestamp()
+    summaries = synthetic_summaries(now_dt)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "BTC.json")
+        with open(path, "w") as f:
+            json.dump(summaries, f)
+        quotes = load_option_quotes(path)
+
+    check_solver(quotes, summaries, now)
+
+    surface = VolSurface()
+    surface.update(quotes, now)
+    stub = asyncio.run(from_stub_api(summaries, now))
+    assert np.allclose(surface.grid, stub.grid)
+    print("\nfixture file and stub API give the same surface: ok")
+    check_surface(surface, quotes, now)
+    check_refresh(quotes, now)
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    main()
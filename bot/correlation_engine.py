@@ -1,23 +1,41 @@
-import pandas as pd
-from data_fetcher import load_cached_data
+import math
+from collections import deque
 
-def compute_correlation(asset="BTC", window=24):
-    data = load_cached_data()
+from data_fetcher import get_price_store, get_tick_log
 
-    # Validate data presence
-    if asset not in data or not data[asset]["history"]:
-        return None, None
+_tracker = None
+
+def compute_correlation(asset="BTC", window=24, lookback=1000):
+    """
+    Rolling Bybit/Deribit correlation over the most recent ticks.
 
-    # Load historical entries
-    entries = data[asset]["history"]
-    df = pd.DataFrame(entries)
+    Args:
+        asset (str): Asset symbol
+        window (int): Rolling window in ticks
+        lookback (int): Ticks read from the archive (None for the full history)
+    """
+    import pandas as pd  # Heavy; only this DataFrame path needs it
 
-    # Validate necessary fields
-    if 'timestamp' not in df or 'bybit' not in df or 'deribit' not in df:
+    # Memory-mapped tick archive; fall back to the in-memory ring before migration
+    ticks = get_tick_log().read(asset)
+    unit = 'ns'
+    if len(ticks) == 0:
+        ticks = get_price_store().history(asset)
+        unit = 's'
+    if lookback is not None:
+        ticks = ticks[-lookback:]
+
+    # Validate data presence
+    if len(ticks) == 0:
         return None, None
 
-    # Convert timestamp and sort
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = pd.DataFrame({
+        'timestamp': pd.to_datetime(ticks['timestamp'], unit=unit),
+        'bybit': ticks['bybit'],
+        'deribit': ticks['deribit'],
+    })
+
+    # Ticks are appended in time order; sort defensively for reloaded snapshots
     df = df.set_index('timestamp').sort_index()
 
     # Drop rows with missing price data
@@ -34,3 +52,163 @@ def compute_correlation(asset="BTC", window=24):
     latest_corr = df['rolling_corr'].iloc[-1] if not df['rolling_corr'].isnull().all() else None
 
     return latest_corr, df.tail(30)  # Return latest value and last 30 points for plotting/debug
+
+
+DEFAULT_WINDOWS = (24, 96, 288)
+RESYNC_EVERY = 10_000  # Updates between exact recomputes, to bound float drift
+
+
+class RollingCorrelation:
+    """
+    Sliding-window Pearson correlation updated in O(1) per tick.
+
+    Keeps Welford-style running means, second moments and co-moment, adding
+    the new pair and removing the one that falls out of the window.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._pairs = deque()
+        self._reset()
+        self._updates = 0
+
+    def update(self, x: float, y: float):
+        self._pairs.append((x, y))
+        self._add(x, y)
+        if len(self._pairs) > self.window:
+            self._remove(*self._pairs.popleft())
+
+        self._updates += 1
+        if self._updates % RESYNC_EVERY == 0:
+            self._resync()
+
+    @property
+    def value(self):
+        """Latest correlation, or None until the window is full"""
+        if self._n < self.window:
+            return None
+        denom = math.sqrt(self._m2x * self._m2y)
+        return self._cxy / denom if denom > 0 else None
+
+    def _reset(self):
+        self._n = 0
+        self._mean_x = self._mean_y = 0.0
+        self._m2x = self._m2y = self._cxy = 0.0
+
+    def _add(self, x, y):
+        self._n += 1
+        dx = x - self._mean_x
+        dy = y - self._mean_y
+        self._mean_x += dx / self._n
+        self._mean_y += dy / self._n
+        self._m2x += dx * (x - self._mean_x)
+        self._m2y += dy * (y - self._mean_y)
+        self._cxy += dx * (y - self._mean_y)
+
+    def _remove(self, x, y):
+        self._n -= 1
+        if self._n == 0:
+            self._reset()
+            return
+        dx = x - self._mean_x
+        dy = y - self._mean_y
+        self._mean_x -= dx / self._n
+        self._mean_y -= dy / self._n
+        self._m2x -= dx * (x - self._mean_x)
+        self._m2y -= dy * (y - self._mean_y)
+        self._cxy -= dx * (y - self._mean_y)
+
+    def _resync(self):
+        self._reset()
+        for x, y in self._pairs:
+            self._add(x, y)
+
+
+class EwmCorrelation:
+    """Exponentially-weighted correlation with pandas-style span, O(1) per tick"""
+
+    def __init__(self, span: int):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self._n = 0
+        self._mean_x = self._mean_y = 0.0
+        self._var_x = self._var_y = self._cov = 0.0
+
+    def update(self, x: float, y: float):
+        if self._n == 0:
+            self._mean_x, self._mean_y = x, y
+            self._n = 1
+            return
+
+        a = self.alpha
+        dx = x - self._mean_x
+        dy = y - self._mean_y
+        self._mean_x += a * dx
+        self._mean_y += a * dy
+        self._var_x = (1 - a) * (self._var_x + a * dx * dx)
+        self._var_y = (1 - a) * (self._var_y + a * dy * dy)
+        self._cov = (1 - a) * (self._cov + a * dx * dy)
+        self._n += 1
+
+    @property
+    def value(self):
+        """Latest correlation, or None until span ticks have been seen"""
+        if self._n < self.span:
+            return None
+        denom = math.sqrt(self._var_x * self._var_y)
+        return self._cov / denom if denom > 0 else None
+
+
+class CorrelationTracker:
+    """
+    Bybit/Deribit correlation estimators per asset, fed tick by tick.
+
+    Each asset gets one rolling and one exponentially-weighted estimator per
+    window, so /correlation is a dictionary lookup instead of a DataFrame
+    rebuild.
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.windows = tuple(windows)
+        self._rolling = {}  # asset -> {window: RollingCorrelation}
+        self._ewm = {}  # asset -> {span: EwmCorrelation}
+
+    def update(self, asset: str, bybit, deribit):
+        # Same as dropna(): both venues are needed for a pair
+        if bybit is None or deribit is None:
+            return
+        x, y = float(bybit), float(deribit)
+        if math.isnan(x) or math.isnan(y):
+            return
+
+        asset = asset.upper()
+        if asset not in self._rolling:
+            self._rolling[asset] = {w: RollingCorrelation(w) for w in self.windows}
+            self._ewm[asset] = {w: EwmCorrelation(w) for w in self.windows}
+        for estimator in self._rolling[asset].values():
+            estimator.update(x, y)
+        for estimator in self._ewm[asset].values():
+            estimator.update(x, y)
+
+    def on_tick(self, asset: str, ts: float, latest: dict):
+        """PriceStore listener"""
+        self.update(asset, latest.get("bybit"), latest.get("deribit"))
+
+    def latest(self, asset: str, window: int = 24, ewm: bool = False):
+        estimators = (self._ewm if ewm else self._rolling).get(asset.upper(), {})
+        estimator = estimators.get(window)
+        return estimator.value if estimator is not None else None
+
+
+def get_correlation_tracker() -> CorrelationTracker:
+    """Process-wide tracker, seeded from the price store's history on first use"""
+    global _tracker
+    if _tracker is None:
+        store = get_price_store()
+        _tracker = CorrelationTracker()
+        for asset in store.assets:
+            ticks = store.history(asset)
+            for bybit, deribit in zip(ticks["bybit"].tolist(), ticks["deribit"].tolist()):
+                _tracker.update(asset, bybit, deribit)
+        store.add_listener(_tracker.on_tick)
+    return _tracker
@@ -0,0 +1,270 @@
+import asyncio
+import functools
+import logging
+
+import numpy as np
+
+from greeks import atm_strike, calculate_greeks_batch
+from vol_surface import get_vol_surfaces
+
+logger = logging.getLogger(__name__)
+
+# Monitored positions are priced as at-the-money calls (greeks.atm_strike),
+# with the same expiry the dashboard uses and its asset's ATM implied vol
+# from the vol surface (0.35 until one is built)
+OPTION_DAYS = 7
+MIN_TRADE = 1e-6  # perp units; smaller rebalances are skipped
+
+
+class _AssetBook:
+    """Delta-hedged positions in one asset as arrays, rebuilt when they change"""
+
+    def __init__(self, column: int):
+        self.column = column
+        self.positions = {}  # key -> Position
+        self.rows = np.empty(0, dtype=np.intp)
+        self.size = np.empty(0)
+        self.dirty = False
+
+    def refresh(self, slots: dict):
+        if not self.dirty:
+            return
+        positions = list(self.positions.values())
+        self.rows = np.fromiter((slots[key] for key in self.positions), dtype=np.intp, count=len(positions))
+        self.size = np.fromiter((p.size for p in positions), dtype=float, count=len(positions))
+        self.dirty = False
+
+
+class DeltaHedger:
+    """
+    Delta-neutral auto-hedging for every user on that strategy.
+
+    Option deltas and perp hedges are kept in user x asset matrices. A price
+    update reprices only that asset's positions, in one
+    calculate_greeks_batch call. Each affected user's portfolio delta is
+    then one matrix-vector product: option delta less hedge, in units,
+    times each asset's last price. Only users whose portfolio delta has
+    drifted beyond their band are passed to on_rebalance(key, trades), with
+    trades {asset: (units to sell, negative to buy back; price)} that bring
+    each asset back to delta neutral. Rebalances run as tasks, at most one
+    per asset at a time, so prices keep being applied while hedges execute.
+    Callers re-watch a position after changing its hedge.
+    """
+
+    def __init__(self, poller, on_rebalance):
+        self.poller = poller
+        self.on_rebalance = on_rebalance
+        self.rebalances = 0
+        self._books = {}  # asset -> _AssetBook
+        self._slots = {}  # key -> row
+        self._keys = []  # row -> key
+        self._free = []  # rows to reuse
+        self._columns = {}  # asset -> column
+        self._option = np.zeros((0, 0))  # option delta in units
+        self._hedge = np.zeros((0, 0))  # perp units held short
+        self._prices = np.zeros(0)  # last price per column
+        self._bands = np.zeros(0)  # USD band per row
+        self._busy = np.zeros(0, dtype=bool)  # rows with a rebalance in flight
+        self._queue = asyncio.Queue()
+        self._subscribed = set()
+        self._task = None
+        self._rebalancing = {}  # asset -> rebalance task in flight
+
+    def watch(self, key, position, band: float):
+        """Start (or update) delta-hedging key's position against band (USD)"""
+        asset = position.asset.upper()
+        row = self._row(key)
+        book = self._book(asset)
+        book.positions[key] = position
+        book.dirty = True
+        self._hedge[row, book.column] = position.hedge
+        self._bands[row] = band
+        self._sync_subscription(asset)
+        self._ensure_running()
+
+    def unwatch(self, key, asset: str = None):
+        """Stop delta-hedging one of key's assets, or all of them"""
+        row = self._slots.get(key)
+        if row is None:
+            return
+        for name in [asset.upper()] if asset else list(self._books):
+            book = self._books.get(name)
+            if book is not None and book.positions.pop(key, None) is not None:
+                book.dirty = True
+                self._option[row, book.column] = self._hedge[row, book.column] = 0.0
+                self._sync_subscription(name)
+        if not any(key in book.positions for book in self._books.values()):
+            del self._slots[key]
+            self._keys[row] = None
+            self._bands[row] = np.inf
+            self._free.append(row)
+
+    def net_deltas(self, key) -> dict:
+        """asset -> (key's net delta in units, last price), for assets priced at least once"""
+        row = self._slots.get(key)
+        if row is None:
+            return {}
+        return {
+            asset: (float(self._option[row, book.column] - self._hedge[row, book.column]),
+                    float(self._prices[book.column]))
+            for asset, book in self._books.items()
+            if key in book.positions and self._prices[book.column] > 0
+        }
+
+    def portfolio_delta(self, key) -> float:
+        """key's net delta in USD as of each asset's last price"""
+        row = self._slots.get(key)
+        if row is None:
+            return 0.0
+        return float((self._option[row] - self._hedge[row]) @ self._prices)
+
+    async def evaluate(self, asset: str, price: float):
+        """Reprice asset's positions and rebalance users whose delta left their band"""
+        due, trades = self._reprice(asset.upper(), price)
+        if due:
+            await self._rebalance(due, trades)
+
+    def _reprice(self, asset: str, price: float, rebalance: bool = True) -> tuple:
+        """
+        Update asset's option deltas at price; with rebalance, also pick the
+        users whose delta left their band.
+
+        Returns:
+            tuple: rows due a rebalance (now marked busy), [(key, trades)]
+        """
+        book = self._books.get(asset)
+        if book is None or not book.positions or not price > 0:  # also rejects NaN
+            return [], []
+        book.refresh(self._slots)
+
+        # Every position is struck at the money, so one delta covers the whole book
+        strike = atm_strike(price)
+        vol = get_vol_surfaces().vol(asset, OPTION_DAYS, strike, price)
+        delta = calculate_greeks_batch(price, strike, OPTION_DAYS, vol)["delta"]
+        rows = book.rows
+        self._option[rows, book.column] = book.size * np.nan_to_num(delta)
+        self._prices[book.column] = price
+        if not rebalance:
+            return [], []
+
+        usd = (self._option[rows] - self._hedge[rows]) @ self._prices
+        due_rows = rows[(np.abs(usd) > self._bands[rows]) & ~self._busy[rows]]
+        if not len(due_rows):
+            return [], []
+
+        due, trades = [], []
+        for row in due_rows.tolist():
+            key = self._keys[row]
+            trade = {
+                name: (units, last_price)
+                for name, (units, last_price) in self.net_deltas(key).items()
+                if abs(units) > MIN_TRADE
+            }
+            if trade:
+                due.append(row)
+                trades.append((key, trade))
+        if due:
+            self._busy[due] = True
+            self.rebalances += len(due)
+        return due, trades
+
+    async def _rebalance(self, due: list, trades: list):
+        try:
+            results = await asyncio.gather(
+                *(self.on_rebalance(key, trade) for key, trade in trades), return_exceptions=True
+            )
+        finally:
+            self._busy[due] = False
+        for (key, _), result in zip(trades, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Delta rebalance failed for {key}: {result}", exc_info=result)
+
+    def _rebalance_done(self, asset: str, task: asyncio.Task):
+        if self._rebalancing.get(asset) is task:
+            del self._rebalancing[asset]
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._rebalancing.values():
+            task.cancel()
+        self._rebalancing.clear()
+        for asset in self._subscribed:
+            self.poller.unsubscribe(asset, self._queue)
+        self._subscribed.clear()
+
+    def _row(self, key) -> int:
+        row = self._slots.get(key)
+        if row is not None:
+            return row
+        if self._free:
+            row = self._free.pop()
+            self._keys[row] = key
+        else:
+            row = len(self._keys)
+            self._keys.append(key)
+            self._grow(rows=row + 1)
+        self._slots[key] = row
+        return row
+
+    def _book(self, asset: str) -> _AssetBook:
+        book = self._books.get(asset)
+        if book is None:
+            column = self._columns.get(asset)
+            if column is None:
+                column = self._columns[asset] = len(self._columns)
+                self._grow(columns=column + 1)
+            book = self._books[asset] = _AssetBook(column)
+        return book
+
+    def _grow(self, rows: int = 0, columns: int = 0):
+        """Make room for at least rows x columns, doubling like a list"""
+        old_rows, old_columns = self._option.shape
+        new_rows = old_rows if rows <= old_rows else max(rows, 2 * old_rows)
+        new_columns = old_columns if columns <= old_columns else max(columns, 2 * old_columns)
+        if (new_rows, new_columns) == (old_rows, old_columns):
+            return
+        for name in ("_option", "_hedge"):
+            grown = np.zeros((new_rows, new_columns))
+            grown[:old_rows, :old_columns] = getattr(self, name)
+            setattr(self, name, grown)
+        self._prices = np.concatenate([self._prices, np.zeros(new_columns - old_columns)])
+        self._bands = np.concatenate([self._bands, np.full(new_rows - old_rows, np.inf)])
+        self._busy = np.concatenate([self._busy, np.zeros(new_rows - old_rows, dtype=bool)])
+
+    def _sync_subscription(self, asset: str):
+        """Receive prices for asset exactly while it has delta-hedged positions"""
+        active = bool(self._books.get(asset) and self._books[asset].positions)
+        if active and asset not in self._subscribed:
+            self.poller.subscribe(asset, self._queue)
+            self._subscribed.add(asset)
+        elif not active and asset in self._subscribed:
+            self.poller.unsubscribe(asset, self._queue)
+            self._subscribed.discard(asset)
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        logger.info("🔁 Delta hedger started")
+        try:
+            while True:
+                asset, price = await self._queue.get()
+                try:
+                    asset = asset.upper()
+                    if asset in self._rebalancing:
+                        # One rebalance per asset in flight; later prices just reprice until it lands
+                        self._reprice(asset, price, rebalance=False)
+                        continue
+                    due, trades = self._reprice(asset, price)
+                    if due:
+                        # Hedges wait out the netting window and venue latency; keep draining prices meanwhile
+                        task = asyncio.create_task(self._rebalance(due, trades))
+                        self._rebalancing[asset] = task
+                        task.add_done_callback(functools.partial(self._rebalance_done, asset))
+                except Exception as e:
+                    logger.error(f"❌ Error in delta hedger: {e}", exc_info=True)
+        except asyncio.CancelledError:
+            logger.info("🛑 Delta hedger cancelled")
@@ -1,7 +1,43 @@
-def calculate_greeks(spot_price, strike_price, time_to_expiry_days, volatility, risk_free_rate=0.05, option_type="call"):
-    import math
-    from scipy.stats import norm
+import math
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import greeks_kernel
+
+# Memoized greeks: spot is snapped to the venue price tick (Deribit perps), or
+# for BTC to the dollar atm_strike rounds to (an ATM view's strike changes with
+# every dollar anyway), and vol to a hundredth of a vol point, so repeat views
+# within one tick hit the cache
+TICK_SIZES = {"BTC": 1.0, "ETH": 0.05}
+DEFAULT_TICK = 0.01
+VOL_TICK = 1e-4
+GREEKS_CACHE_SIZE = 512
+GREEKS_TTL = 60  # seconds; a backstop for when ticks stop arriving
+GREEK_NAMES = ("price", "delta", "gamma", "theta", "vega")
+
+_cache = None
+
+
+def prewarm():
+    """Compile the numba array kernel ahead of the first request"""
+    greeks_kernel.prewarm()
+
+
+def atm_strike(spot):
+    """
+    Strike monitored positions are priced at: at the money, to the dollar.
+
+    Shared by the dashboard views, the VaR engine and the delta hedger so
+    they all report and hedge the same option. Unpriced (NaN) spots give NaN.
+    """
+    if isinstance(spot, np.ndarray):
+        return np.round(spot)
+    return round(spot) if math.isfinite(spot) else math.nan
+
 
+def calculate_greeks(spot_price, strike_price, time_to_expiry_days, volatility, risk_free_rate=0.05, option_type="call"):
     try:
         S = float(spot_price)
         K = float(strike_price)
@@ -22,26 +58,8 @@ def calculate_greeks(spot_price, strike_price, time_to_expiry_days, volatility,
         return {"error": f"Invalid option type: {option_type}"}
 
     try:
-        d1 = (math.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * math.sqrt(T))
-        d2 = d1 - sigma * math.sqrt(T)
-
-        pdf_d1 = norm.pdf(d1)
-        cdf_d1 = norm.cdf(d1)
-        cdf_d2 = norm.cdf(d2)
-        cdf_neg_d1 = norm.cdf(-d1)
-        cdf_neg_d2 = norm.cdf(-d2)
-
-        if option_type == "call":
-            delta = cdf_d1
-            price = S * cdf_d1 - K * math.exp(-r * T) * cdf_d2
-            theta = (-S * pdf_d1 * sigma / (2 * math.sqrt(T)) - r * K * math.exp(-r * T) * cdf_d2) / 365
-        else:
-            delta = -cdf_neg_d1
-            price = K * math.exp(-r * T) * cdf_neg_d2 - S * cdf_neg_d1
-            theta = (-S * pdf_d1 * sigma / (2 * math.sqrt(T)) + r * K * math.exp(-r * T) * cdf_neg_d2) / 365
-
-        gamma = pdf_d1 / (S * sigma * math.sqrt(T))
-        vega = S * pdf_d1 * math.sqrt(T) / 100
+        # math.erfc normal CDF; no scipy on the single-option path
+        price, delta, gamma, theta, vega = greeks_kernel.black_scholes(S, K, T, sigma, r, option_type == "call")
 
         return {
             "price": round(price, 2),
@@ -53,3 +71,191 @@ def calculate_greeks(spot_price, strike_price, time_to_expiry_days, volatility,
 
     except Exception as e:
         return {"error": f"Calculation error: {str(e)}"}
+
+
+def calculate_greeks_batch(spot, strike, time_to_expiry_days, volatility, risk_free_rate=0.05, is_call=True):
+    """
+    Black-Scholes price and greeks for many options in one vectorized pass.
+
+    All inputs broadcast against each other, so scalars and arrays can be
+    mixed. Options with non-positive spot, strike, expiry or volatility come
+    back as NaN instead of an error dict. Values are not rounded; theta is per
+    day and vega per 1% vol, as in calculate_greeks.
+
+    Returns:
+        dict: price, delta, gamma, theta, vega -> np.ndarray
+    """
+    S, K, days, sigma, r, call = np.broadcast_arrays(
+        np.asarray(spot, dtype=float),
+        np.asarray(strike, dtype=float),
+        np.asarray(time_to_expiry_days, dtype=float),
+        np.asarray(volatility, dtype=float),
+        np.asarray(risk_free_rate, dtype=float),
+        np.asarray(is_call, dtype=bool),
+    )
+    T = days / 365.0
+    valid = (S > 0) & (K > 0) & (T > 0) & (sigma > 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price, delta, gamma, theta, vega = greeks_kernel.black_scholes_array(S, K, T, sigma, r, call)
+
+    nan = np.nan
+    return {
+        "price": np.where(valid, price, nan),
+        "delta": np.where(valid, delta, nan),
+        "gamma": np.where(valid, gamma, nan),
+        "theta": np.where(valid, theta, nan),
+        "vega": np.where(valid, vega, nan),
+    }
+
+
+class GreeksCache:
+    """
+    Bounded LRU/TTL memo of calculate_greeks and calculate_greeks_batch.
+
+    Spot and vol are quantized before pricing, so every request inside one
+    price tick shares an entry and a hit returns exactly what a miss would
+    have computed. An asset's entries are dropped when the price store
+    records a new tick for it, and any entry older than ttl seconds is
+    recomputed.
+
+    Only recorded (polled) ticks invalidate; streamed quotes don't, so
+    views between polls still hit whenever the quote is back on an
+    already-priced tick. With enabled = False every call prices directly.
+    """
+
+    def __init__(self, tick_sizes: dict = None, size: int = GREEKS_CACHE_SIZE, ttl: float = GREEKS_TTL,
+                 clock=time.monotonic, enabled: bool = True):
+        self.enabled = enabled
+        self.tick_sizes = dict(TICK_SIZES if tick_sizes is None else tick_sizes)
+        self.size = size
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0, "invalidated": 0}
+        self._entries = OrderedDict()  # (asset, kind, inputs...) -> (stored at, greeks)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def quantize(self, asset: str, spot: float) -> float:
+        """Spot snapped to the asset's price tick"""
+        tick = self.tick_sizes.get(asset.upper(), DEFAULT_TICK)
+        return round(round(float(spot) / tick) * tick, 10)
+
+    def greeks(self, asset: str, spot, strike, time_to_expiry_days, volatility, risk_free_rate=0.05,
+               option_type="call") -> dict:
+        """
+        calculate_greeks at the quantized spot and vol, memoized.
+
+        Error results are returned but not cached.
+        """
+        if not self.enabled:
+            return calculate_greeks(spot, strike, time_to_expiry_days, volatility, risk_free_rate, option_type)
+        try:
+            S = self.quantize(asset, spot)
+            sigma = round(round(float(volatility) / VOL_TICK) * VOL_TICK, 10)
+            key = (asset.upper(), "scalar", S, float(strike), float(time_to_expiry_days), sigma,
+                   float(risk_free_rate), option_type.lower())
+        except (TypeError, ValueError, AttributeError):
+            return calculate_greeks(spot, strike, time_to_expiry_days, volatility, risk_free_rate, option_type)
+
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+        result = calculate_greeks(S, strike, time_to_expiry_days, sigma, risk_free_rate, option_type)
+        if "error" not in result:
+            self._put(key, result)
+        return result
+
+    def batch(self, assets, spot, strike, time_to_expiry_days, volatility, risk_free_rate=0.05,
+              is_call=True) -> dict:
+        """
+        calculate_greeks_batch row by row through the cache.
+
+        assets names the asset of each row; the other inputs broadcast
+        against it as in calculate_greeks_batch. Only the rows that miss are
+        priced, in one vectorized call. Rows that come back NaN are not
+        cached.
+        """
+        if not self.enabled:
+            return calculate_greeks_batch(spot, strike, time_to_expiry_days, volatility, risk_free_rate, is_call)
+        assets = [asset.upper() for asset in assets]
+        # Keys are built from Python floats: a handful of rows is cheaper that way than with array ops
+        S, K, days, sigma, r = (
+            _column(value, float, len(assets))
+            for value in (spot, strike, time_to_expiry_days, volatility, risk_free_rate)
+        )
+        call = _column(is_call, bool, len(assets))
+        S = [self.quantize(asset, s) if s == s else s for asset, s in zip(assets, S)]
+        sigma = [round(round(v / VOL_TICK) * VOL_TICK, 10) if v == v else v for v in sigma]
+
+        keys = list(zip(assets, ["batch"] * len(assets), S, K, days, sigma, r, call))
+        rows = [self._get(key) for key in keys]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            priced = calculate_greeks_batch(*(
+                [column[i] for i in missing] for column in (S, K, days, sigma, r, call)
+            ))
+            for i, row in zip(missing, np.column_stack([priced[name] for name in GREEK_NAMES]).tolist()):
+                rows[i] = row
+                if row[0] == row[0]:  # NaN rows are not cached
+                    self._put(keys[i], row)
+        values = np.array(rows, dtype=float).reshape(len(rows), len(GREEK_NAMES)).T
+        return dict(zip(GREEK_NAMES, values))
+
+    def invalidate(self, asset: str = None):
+        """Drop the entries of one asset, or all of them"""
+        if asset is None:
+            stale = list(self._entries)
+        else:
+            asset = asset.upper()
+            stale = [key for key in self._entries if key[0] == asset]
+        for key in stale:
+            del self._entries[key]
+        self.stats["invalidated"] += len(stale)
+
+    def on_tick(self, asset: str, ts: float, latest: dict):
+        """PriceStore listener"""
+        self.invalidate(asset)
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored, value = entry
+            if self.clock() - stored <= self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return value
+            del self._entries[key]
+            self.stats["expired"] += 1
+        self.stats["misses"] += 1
+        return None
+
+    def _put(self, key, value):
+        self._entries[key] = (self.clock(), value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+            self.stats["evicted"] += 1
+
+
+def _column(value, dtype, n: int) -> list:
+    """A scalar repeated n times, or an array's values, as a list"""
+    if isinstance(value, (float, int, np.generic)) or np.ndim(value) == 0:
+        return [dtype(value)] * n
+    column = np.asarray(value, dtype=dtype).tolist()
+    if len(column) != n:
+        raise ValueError(f"expected {n} values, got {len(column)}")
+    return column
+
+
+def get_greeks_cache() -> GreeksCache:
+    """Process-wide greeks cache, invalidated by every tick the price store records"""
+    global _cache
+    if _cache is None:
+        from data_fetcher import get_price_store  # keeps this module usable without the bot's I/O stack
+        _cache = GreeksCache()
+        get_price_store().add_listener(_cache.on_tick)
+    return _cache
@@ -0,0 +1,209 @@
+"""
+Black-Scholes kernels on a direct normal CDF.
+
+Scalars go through math.erfc, so pricing one option never touches scipy.
+Arrays are priced by a numba-compiled loop over the scalar kernel when
+numba is installed; otherwise by NumPy expressions whose normal CDF comes
+from W. J. Cody's rational erfc approximations (the ones behind most libm
+erfc implementations), so neither path needs scipy.
+"""
+import importlib.util
+import math
+
+import numpy as np
+
+SQRT_2 = math.sqrt(2.0)
+SQRT_2PI = math.sqrt(2 * math.pi)
+INV_SQRT_PI = 1 / math.sqrt(math.pi)
+SMALL_ARRAY = 32  # below this many values the Cody erfc loops over math.erfc instead
+
+# numba is optional; without it arrays go through the NumPy kernel
+JIT = importlib.util.find_spec("numba") is not None
+
+# Cody (1969), "Rational Chebyshev approximations for the error function"
+# erf(x) for |x| <= 0.46875
+_ERF_A = (3.16112374387056560e00, 1.13864154151050156e02, 3.77485237685302021e02,
+          3.20937758913846947e03, 1.85777706184603153e-1)
+_ERF_B = (2.36012909523441209e01, 2.44024637934444173e02, 1.28261652607737228e03,
+          2.84423683343917062e03)
+# erfc(x) for 0.46875 < |x| <= 4
+_ERFC_C = (5.64188496988670089e-1, 8.88314979438837594e00, 6.61191906371416295e01,
+           2.98635138197400131e02, 8.81952221241769090e02, 1.71204761263407058e03,
+           2.05107837782607147e03, 1.23033935479799725e03, 2.15311535474403846e-8)
+_ERFC_D = (1.57449261107098347e01, 1.17693950891312499e02, 5.37181101862009858e02,
+           1.62138957456669019e03, 3.29079923573345963e03, 4.36261909014324716e03,
+           3.43936767414372164e03, 1.23033935480374942e03)
+# erfc(x) for |x| > 4
+_ERFC_P = (3.05326634961232344e-1, 3.60344899949804439e-1, 1.25781726111229246e-1,
+           1.60837851487422766e-2, 6.58749161529837803e-4, 1.63153871373020978e-2)
+_ERFC_Q = (2.56852019228982242e00, 1.87295284992346725e00, 5.27905102951428412e-1,
+           6.05183413124413191e-2, 2.33520497626869185e-3)
+
+# numba is imported on first array call (or by prewarm()) to keep bot startup fast
+_loop = None
+_black_scholes_jit = None
+
+
+def _exp_neg_square(y: np.ndarray) -> np.ndarray:
+    """exp(-y**2), with y**2 split so its rounding error isn't amplified by the exponential"""
+    head = np.trunc(y * 16) / 16
+    return np.exp(-head * head) * np.exp(-(y - head) * (y + head))
+
+
+def erfc(x) -> np.ndarray:
+    """Complementary error function of an array, without scipy"""
+    x = np.asarray(x, dtype=float)
+    if x.size < SMALL_ARRAY:
+        return np.array([math.erfc(v) for v in x.ravel().tolist()]).reshape(x.shape)
+    y = np.abs(x)
+    result = np.full_like(y, np.nan)
+
+    small = y <= 0.46875
+    if small.any():
+        ys = x[small]
+        z = ys * ys
+        num = _ERF_A[4] * z
+        den = z
+        for i in range(3):
+            num = (num + _ERF_A[i]) * z
+            den = (den + _ERF_B[i]) * z
+        result[small] = 1 - ys * (num + _ERF_A[3]) / (den + _ERF_B[3])
+
+    middle = ~small & (y <= 4.0)
+    if middle.any():
+        ym = y[middle]
+        num = _ERFC_C[8] * ym
+        den = ym
+        for i in range(7):
+            num = (num + _ERFC_C[i]) * ym
+            den = (den + _ERFC_D[i]) * ym
+        result[middle] = _exp_neg_square(ym) * (num + _ERFC_C[7]) / (den + _ERFC_D[7])
+
+    large = y > 4.0
+    if large.any():
+        yl = np.minimum(y[large], 30.0)  # erfc has underflowed to 0 by then; keeps inf finite
+        z = 1 / (yl * yl)
+        num = _ERFC_P[5] * z
+        den = z
+        for i in range(4):
+            num = (num + _ERFC_P[i]) * z
+            den = (den + _ERFC_Q[i]) * z
+        tail = (INV_SQRT_PI - z * (num + _ERFC_P[4]) / (den + _ERFC_Q[4])) / yl
+        result[large] = _exp_neg_square(yl) * tail
+
+    # The approximations above are for erfc(|x|); erfc(-y) = 2 - erfc(y)
+    negative = (x < 0) & ~small
+    result[negative] = 2 - result[negative]
+    return result
+
+
+def norm_cdf_array(x) -> np.ndarray:
+    """Standard normal CDF of an array, without scipy"""
+    return 0.5 * erfc(-np.asarray(x, dtype=float) / SQRT_2)
+
+
+# The NumPy kernel's normal CDF; tests and benchmarks swap in scipy's ndtr to compare
+_ndtr = norm_cdf_array
+
+
+def black_scholes(S: float, K: float, T: float, sigma: float, r: float, is_call: bool) -> tuple:
+    """
+    Price and greeks of one option; T in years, inputs assumed valid.
+
+    Plain math calls only, so numba can compile it unchanged.
+
+    Returns:
+        tuple: price, delta, gamma, theta (per day), vega (per 1% vol)
+    """
+    sqrt_t = math.sqrt(T)
+    sig_sqrt_t = sigma * sqrt_t
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / sig_sqrt_t
+    d2 = d1 - sig_sqrt_t
+    pdf_d1 = math.exp(-0.5 * d1 * d1) / SQRT_2PI
+    discounted_strike = K * math.exp(-r * T)
+    decay = -S * pdf_d1 * sigma / (2 * sqrt_t)
+    # N(x) = erfc(-x / sqrt(2)) / 2, which keeps full relative precision in the lower tail
+    if is_call:
+        cdf_d2 = 0.5 * math.erfc(-d2 / SQRT_2)
+        delta = 0.5 * math.erfc(-d1 / SQRT_2)
+        price = S * delta - discounted_strike * cdf_d2
+        theta = (decay - r * discounted_strike * cdf_d2) / 365
+    else:
+        cdf_neg_d2 = 0.5 * math.erfc(d2 / SQRT_2)
+        delta = -0.5 * math.erfc(d1 / SQRT_2)
+        price = discounted_strike * cdf_neg_d2 + S * delta
+        theta = (decay + r * discounted_strike * cdf_neg_d2) / 365
+    gamma = pdf_d1 / (S * sig_sqrt_t)
+    vega = S * pdf_d1 * sqrt_t / 100
+    return price, delta, gamma, theta, vega
+
+
+def _black_scholes_numpy(S, K, T, sigma, r, call):
+    ndtr = _ndtr
+    sqrt_t = np.sqrt(T)
+    sig_sqrt_t = sigma * sqrt_t
+    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / sig_sqrt_t
+    d2 = d1 - sig_sqrt_t
+
+    pdf_d1 = np.exp(-0.5 * d1 * d1) / SQRT_2PI
+    # Puts use N(-d1) and N(-d2) directly: put-call parity cancels away deep out-of-the-money puts
+    sign = np.where(call, 1.0, -1.0)
+    cdf_d1 = ndtr(sign * d1)
+    cdf_d2 = ndtr(sign * d2)
+    discounted_strike = K * np.exp(-r * T)
+
+    price = sign * (S * cdf_d1 - discounted_strike * cdf_d2)
+    delta = sign * cdf_d1
+
+    decay = -S * pdf_d1 * sigma / (2 * sqrt_t)
+    theta = (decay - sign * r * discounted_strike * cdf_d2) / 365
+
+    gamma = pdf_d1 / (S * sig_sqrt_t)
+    vega = S * pdf_d1 * sqrt_t / 100
+    return price, delta, gamma, theta, vega
+
+
+def _black_scholes_loop(S, K, T, sigma, r, call, out):
+    for i in range(S.shape[0]):
+        price, delta, gamma, theta, vega = _black_scholes_jit(S[i], K[i], T[i], sigma[i], r[i], call[i])
+        out[0, i] = price
+        out[1, i] = delta
+        out[2, i] = gamma
+        out[3, i] = theta
+        out[4, i] = vega
+
+
+def _get_loop():
+    """_black_scholes_loop compiled by numba on first use (and cached on disk)"""
+    global _loop, _black_scholes_jit
+    if _loop is None:
+        import numba
+
+        # NumPy's error model: invalid inputs give inf/NaN, as in the NumPy kernel, instead of raising
+        _black_scholes_jit = numba.njit(cache=True, error_model="numpy")(black_scholes)
+        _loop = numba.njit(cache=True, error_model="numpy")(_black_scholes_loop)
+    return _loop
+
+
+def black_scholes_array(S, K, T, sigma, r, call) -> tuple:
+    """
+    Price and greeks of many options; T in years.
+
+    Inputs are same-shape arrays (call bool, the rest float). Invalid
+    options come back inf or NaN for the caller to mask.
+
+    Returns:
+        tuple: price, delta, gamma, theta, vega -> np.ndarray
+    """
+    if not JIT:
+        return _black_scholes_numpy(S, K, T, sigma, r, call)
+    shape = np.shape(S)
+    out = np.empty((5, np.size(S)))
+    _get_loop()(*(np.ravel(a) for a in (S, K, T, sigma, r)), np.ravel(call), out)
+    return tuple(values.reshape(shape) for values in out)
+
+
+def prewarm():
+    """Compile the numba kernels; the NumPy kernel needs no warm-up"""
+    if JIT:
+        black_scholes_array(*(np.ones(1) for _ in range(5)), np.ones(1, dtype=bool))
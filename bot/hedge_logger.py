@@ -1,26 +1,207 @@
 import os
 import json
+import bisect
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from datetime import timedelta
 # Get logger from parent module
 logger = logging.getLogger(__name__)
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Goes up from bot/ to hedgebot/
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+HEDGE_JOURNAL_FILE = os.path.join(CACHE_DIR, "hedge_history.jsonl")
+LEGACY_HISTORY_FILE = os.path.join(CACHE_DIR, "hedge_history.json")
+
+_journal = None
+
+
+class HedgeJournal:
+    """
+    Append-only JSONL hedge journal with an in-memory time index.
+
+    Every record is written as one line and fsync'd before the call returns.
+    Records are also kept per asset, sorted by timestamp, so timeframe queries
+    are a bisect plus a slice instead of a scan of the whole journal.
+    """
+
+    def __init__(self, path: str = HEDGE_JOURNAL_FILE, legacy_path: str = LEGACY_HISTORY_FILE):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._times = {None: []}  # asset (None = all) -> sorted epoch seconds
+        self._records = {None: []}  # asset (None = all) -> records in the same order
+        self._cum_size = {None: []}  # asset (None = all) -> running totals for summaries
+        self._cum_notional = {None: []}
+        self._file = None
+        self._load()
+
+    def __len__(self):
+        return len(self._records[None])
+
+    def append(self, record: dict):
+        """Durably append one record and index it"""
+        f = self._open()
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+        self._index(record)
+
+    def extend(self, records: list):
+        """Durably append several records with a single fsync and index them"""
+        if not records:
+            return
+        f = self._open()
+        f.writelines(json.dumps(record) + "\n" for record in records)
+        f.flush()
+        os.fsync(f.fileno())
+        for record in records:
+            self._index(record)
+
+    def query(self, asset: str = None, since: float = None, limit: int = None) -> list:
+        """
+        Records for asset (or all assets) at or after since, oldest first.
+
+        Args:
+            asset (str): Optional asset symbol to filter by.
+            since (float): Optional cutoff as epoch seconds.
+            limit (int): Only return the newest limit records.
+        """
+        key = asset.upper() if asset else None
+        records = self._records.get(key, [])
+        start = self._start(key, since)
+        if limit is not None:
+            start = max(start, len(records) - limit)
+        return records[start:]
+
+    def summary(self, asset: str = None, since: float = None) -> dict:
+        """Count, total size and total notional of the matching records in O(log n)"""
+        key = asset.upper() if asset else None
+        cum_size = self._cum_size.get(key, [])
+        cum_notional = self._cum_notional.get(key, [])
+        start = self._start(key, since)
+        if start >= len(cum_size):
+            return {"count": 0, "size": 0.0, "notional": 0.0}
+
+        size_before = cum_size[start - 1] if start else 0.0
+        notional_before = cum_notional[start - 1] if start else 0.0
+        return {
+            "count": len(cum_size) - start,
+            "size": cum_size[-1] - size_before,
+            "notional": cum_notional[-1] - notional_before,
+        }
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _start(self, key, since: float) -> int:
+        if since is None:
+            return 0
+        return bisect.bisect_left(self._times.get(key, []), since)
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a")
+        return self._file
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            self._migrate_legacy()
+            return
+
+        with open(self.path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._index(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning("Skipping corrupt hedge journal line")
+
+    def _migrate_legacy(self):
+        """Import the old JSON list file the first time the journal is created"""
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, "r") as f:
+                history = json.load(f)
+        except json.JSONDecodeError:
+            logger.error("Failed to parse legacy hedge history, starting empty")
+            return
+        if not isinstance(history, list):
+            return
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for record in history:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        for record in history:
+            self._index(record)
+        logger.info(f"Migrated {len(history)} hedge records to {self.path}")
+
+    def _index(self, record: dict):
+        try:
+            ts = _parse_timestamp(record["timestamp"])
+            asset = record["asset"].upper()
+        except (KeyError, AttributeError, ValueError):
+            logger.warning(f"Hedge record without valid timestamp/asset: {record}")
+            return
+
+        size = float(record.get("size", 0) or 0)
+        notional = size * float(record.get("price", 0) or 0)
+
+        for key in (None, asset):
+            times = self._times.setdefault(key, [])
+            records = self._records.setdefault(key, [])
+            cum_size = self._cum_size.setdefault(key, [])
+            cum_notional = self._cum_notional.setdefault(key, [])
+
+            # Records almost always arrive in time order
+            if not times or ts >= times[-1]:
+                times.append(ts)
+                records.append(record)
+                cum_size.append((cum_size[-1] if cum_size else 0.0) + size)
+                cum_notional.append((cum_notional[-1] if cum_notional else 0.0) + notional)
+                continue
+
+            # Out-of-order record: insert it and rebuild the running totals after it
+            pos = bisect.bisect_right(times, ts)
+            times.insert(pos, ts)
+            records.insert(pos, record)
+            cum_size.insert(pos, 0.0)
+            cum_notional.insert(pos, 0.0)
+            for i in range(pos, len(records)):
+                r_size = float(records[i].get("size", 0) or 0)
+                r_notional = r_size * float(records[i].get("price", 0) or 0)
+                cum_size[i] = (cum_size[i - 1] if i else 0.0) + r_size
+                cum_notional[i] = (cum_notional[i - 1] if i else 0.0) + r_notional
+
+
+def get_journal() -> HedgeJournal:
+    """Process-wide hedge journal, loaded on first use"""
+    global _journal
+    if _journal is None:
+        _journal = HedgeJournal()
+    return _journal
+
+
 def log_hedge(asset: str, size: float, price: float , mode:str):
     """
-    Log hedge operations to a JSON history file
-    
+    Append a hedge operation to the hedge journal
+
     Args:
         asset (str): The asset being hedged
         size (float): Position size
         price (float): Reference price at time of hedge
+        mode (str): "manual" or "auto"
     """
     try:
-        # Create cache directory if needed
-        BASE_DIR = os.path.dirname(os.path.dirname(__file__))  # Goes up from utils/ to hedgebot/
-        CACHE_DIR = os.path.join(BASE_DIR, "cache")
-        HEDGE_HISTORY_FILE = os.path.join(CACHE_DIR, "hedge_history.json")
-        
         # Create record with timestamp
         record = {
             "timestamp": datetime.utcnow().isoformat() + "Z",  # ISO format with UTC marker
@@ -29,81 +210,71 @@ def log_hedge(asset: str, size: float, price: float , mode:str):
             "price": price,
             "mode": mode
         }
-        
-        # Load existing history or create new list
-        history = []
-        if os.path.exists(HEDGE_HISTORY_FILE):
-            try:
-                with open(HEDGE_HISTORY_FILE, "r") as f:
-                    history = json.load(f)
-                # Ensure we have a list
-                if not isinstance(history, list):
-                    logger.warning("Hedge history was not a list, resetting")
-                    history = []
-            except json.JSONDecodeError:
-                logger.error("Failed to parse hedge history, resetting")
-                history = []
-        
-        # Append new record
-        history.append(record)
-        
-        # Save with pretty-printing
-        with open(HEDGE_HISTORY_FILE, "w") as f:
-            json.dump(history, f, indent=2)
-            
+        get_journal().append(record)
+
         logger.info(f"Logged hedge: {asset} {size} @ {price} ({mode})")
-        
+
     except Exception as e:
         logger.error(f"Failed to write hedge history: {str(e)}", exc_info=True)
-        
-        
-        
+
+
+def log_hedges(hedges: list):
+    """
+    Append several hedge operations to the hedge journal in one write
+
+    Args:
+        hedges (list): dicts with asset, size, price and mode, plus any
+            extra fields to keep (e.g. user_id); all share one timestamp
+    """
+    try:
+        timestamp = datetime.utcnow().isoformat() + "Z"
+        records = [
+            {"timestamp": timestamp, **hedge, "asset": hedge["asset"].upper()}
+            for hedge in hedges
+        ]
+        get_journal().extend(records)
+
+        logger.info(f"Logged {len(records)} hedges")
+
+    except Exception as e:
+        logger.error(f"Failed to write hedge history: {str(e)}", exc_info=True)
+
+
 def get_hedge_history(asset: str = None, timeframe: str = "7d") -> list:
     """
     Retrieve hedge history records filtered by asset and timeframe.
 
     Args:
         asset (str): Optional asset symbol to filter by.
-        timeframe (str): Time range like "7d", "24h", etc.
+        timeframe (str): Time range like "7d", "24h", or "all".
 
     Returns:
-        list: Filtered hedge records
+        list: Filtered hedge records, oldest first
     """
     try:
-        BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-        HEDGE_HISTORY_FILE = os.path.join(BASE_DIR, "cache", "hedge_history.json")
+        return get_journal().query(asset, timeframe_cutoff(timeframe))
+
+    except Exception as e:
+        logger.error(f"Failed to read hedge history: {str(e)}", exc_info=True)
+        return []
 
-        if not os.path.exists(HEDGE_HISTORY_FILE):
-            return []
 
-        with open(HEDGE_HISTORY_FILE, "r") as f:
-            history = json.load(f)
+def timeframe_cutoff(timeframe: str):
+    """Epoch-seconds cutoff for a timeframe like "7d" or "24h" (None for "all")"""
+    if timeframe == "all":
+        return None
 
-        if not isinstance(history, list):
-            return []
-
-        now = datetime.utcnow()
-        if timeframe.endswith("h"):
-            delta = timedelta(hours=int(timeframe[:-1]))
-        elif timeframe.endswith("d"):
-            delta = timedelta(days=int(timeframe[:-1]))
-        else:
-            delta = timedelta(days=7)
-
-        cutoff = now - delta
-        filtered = []
-
-        for entry in history:
-            try:
-                entry_time = datetime.fromisoformat(entry["timestamp"].replace("Z", ""))
-                if entry_time >= cutoff:
-                    if asset is None or entry["asset"].upper() == asset.upper():
-                        filtered.append(entry)
-            except Exception as e:
-                continue
+    if timeframe.endswith("h"):
+        delta = timedelta(hours=int(timeframe[:-1]))
+    elif timeframe.endswith("d"):
+        delta = timedelta(days=int(timeframe[:-1]))
+    else:
+        delta = timedelta(days=7)
 
-        return filtered
+    return (datetime.now(timezone.utc) - delta).timestamp()
 
-    except Exception as e:
-        logger.error(f"Failed to read hedge history: {str(e)}", exc_info=True)
-        return []
\ No newline at end of file
+
+def _parse_timestamp(value: str) -> float:
+    """ISO timestamp (with or without trailing Z) as UTC epoch seconds"""
+    parsed = datetime.fromisoformat(value.replace("Z", ""))
+    return parsed.replace(tzinfo=timezone.utc).timestamp()
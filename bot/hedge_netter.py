@@ -0,0 +1,160 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+from hedge_logger import log_hedges
+
+logger = logging.getLogger(__name__)
+
+NETTING_WINDOW = 0.2  # seconds hedge intents are collected before an asset's batch executes
+
+
+@dataclass(slots=True)
+class HedgeIntent:
+    user_id: int
+    asset: str
+    side: str  # "sell" reduces a long, "buy" unwinds a hedge
+    size: float
+    price: float  # reference price when the intent was raised
+    mode: str
+    future: asyncio.Future
+
+
+class HedgeNetter:
+    """
+    Nets hedge intents across users before they reach the venues.
+
+    Intents for an asset are collected for NETTING_WINDOW seconds from the
+    first one. Opposite sides cross internally at the batch's reference
+    price (the newest intent's), and only the net size is executed, as one
+    order. Each user gets a pro rata share of the internal cross and of the
+    market fill, fees included, and the batch's allocations are written to
+    the hedge journal in one go.
+    """
+
+    def __init__(self, execute, window: float = NETTING_WINDOW, log=log_hedges):
+        self.execute = execute  # async (asset, size, price, side) -> hedge result dict
+        self.window = window
+        self.log = log
+        self.batches = 0
+        self.intents = 0
+        self.orders = 0
+        self._pending = {}  # asset -> [HedgeIntent]
+        self._timers = {}  # asset -> TimerHandle of the pending batch
+        self._flushes = set()
+
+    async def submit(self, user_id: int, asset: str, size: float, price: float,
+                     side: str = "sell", mode: str = "auto") -> dict:
+        """
+        Queue a hedge and wait for this user's allocation.
+
+        Returns:
+            dict: the same summary execute_hedge returns, scaled to the
+                user's share, plus the batch it was netted in
+        """
+        if size <= 0:
+            raise ValueError(f"Hedge size must be positive, got {size}")
+        loop = asyncio.get_running_loop()
+        intent = HedgeIntent(user_id, asset, side, size, price, mode, loop.create_future())
+        self._pending.setdefault(asset, []).append(intent)
+        if asset not in self._timers:
+            self._timers[asset] = loop.call_later(self.window, self._flush, asset)
+        return await intent.future
+
+    async def close(self):
+        """Execute whatever is still waiting for its window, then wait for all batches"""
+        for asset, timer in list(self._timers.items()):
+            timer.cancel()
+            self._flush(asset)
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _flush(self, asset: str):
+        self._timers.pop(asset, None)
+        intents = self._pending.pop(asset, None)
+        if not intents:
+            return
+        flush = asyncio.create_task(self._execute(asset, intents))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _execute(self, asset: str, intents: list):
+        try:
+            results = await self._net(asset, intents)
+        except Exception as e:
+            logger.error(f"Netted {asset} hedge of {len(intents)} intents failed: {e}")
+            for intent in intents:
+                if not intent.future.done():
+                    intent.future.set_exception(e)
+            return
+
+        try:
+            self.log([
+                {
+                    "asset": intent.asset,
+                    "size": result["size"],
+                    "price": intent.price,
+                    "mode": intent.mode,
+                    "user_id": intent.user_id,
+                }
+                for intent, result in zip(intents, results)
+            ])
+        finally:
+            for intent, result in zip(intents, results):
+                if not intent.future.done():
+                    intent.future.set_result(result)
+
+    async def _net(self, asset: str, intents: list) -> list:
+        price = intents[-1].price
+        totals = {"sell": 0.0, "buy": 0.0}
+        for intent in intents:
+            totals[intent.side] += intent.size
+        crossed = min(totals.values())
+        side = "sell" if totals["sell"] >= totals["buy"] else "buy"
+        net = totals[side] - crossed
+
+        self.batches += 1
+        self.intents += len(intents)
+        report = None
+        if net > 0:
+            try:
+                report = await self.execute(asset, net, price, side)
+                self.orders += 1
+            except Exception as e:
+                # The internal cross still stands; only the market leg failed
+                if not crossed:
+                    raise
+                logger.error(f"Market leg of netted {asset} hedge failed: {e}")
+        filled = report["size"] if report else 0.0
+        logger.info(
+            f"Netted {len(intents)} {asset} hedge intents: {crossed:.4f} crossed internally, "
+            f"{filled:.4f}/{net:.4f} {side} on market"
+        )
+
+        timestamp = datetime.utcnow().isoformat()
+        results = []
+        for intent in intents:
+            share = intent.size / totals[intent.side]
+            internal = crossed * share
+            market = filled * share if intent.side == side else 0.0
+            size = internal + market
+            notional = internal * price + (market * report["execution_price"] if market else 0.0)
+            execution_price = notional / size
+            route = {"internal": internal} if internal else {}
+            if market:
+                route.update({venue: venue_filled * market / filled for venue, venue_filled in report["route"].items()})
+            results.append({
+                "asset": asset,
+                "size": size,
+                "original_price": round(intent.price, 2),
+                "execution_price": round(execution_price, 2),
+                "slippage_pct": round((execution_price / intent.price - 1) * 100, 4),
+                "cost": round(report["cost"] * market / filled, 2) if market else 0.0,
+                "latency_ms": report["latency_ms"] if market else 0.0,
+                "timestamp": timestamp,
+                "route": route,
+                "batch": {"intents": len(intents), "crossed": crossed, "net_size": net},
+            })
+        return results
+
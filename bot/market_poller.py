@@ -0,0 +1,142 @@
+import asyncio
+import logging
+
+from data_fetcher import update_caches_async, archive_latest, get_price_store
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 30  # Seconds between polling ticks
+
+
+class MarketPoller:
+    """
+    Central price feed shared by every risk monitor.
+
+    Every new price for a subscribed asset, streamed or polled, is pushed as
+    ``(asset, price)`` onto the queue of each subscribed monitor. Each tick
+    archives the latest streamed quotes and falls back to one batched REST
+    fetch for assets whose streams have gone stale (or when no streams are
+    attached). Subscriptions are reference-counted, so an asset is only
+    polled while someone watches it.
+    """
+
+    def __init__(self, interval: float = POLL_INTERVAL, source_priority=None, streams=None):
+        self.interval = interval
+        self.source_priority = source_priority or ["bybit", "deribit"]
+        self.streams = list(streams or [])
+        self._subscribers = {}  # asset -> {queue: refcount}
+        self._task = None
+        self._listening = False
+
+    def add_stream(self, stream):
+        """Attach a streaming feed and subscribe it to every watched asset"""
+        self.streams.append(stream)
+        for asset in self.assets:
+            stream.add_asset(asset)
+        if self._task is not None:
+            stream.start()
+
+    def subscribe(self, asset: str, queue: asyncio.Queue):
+        """Register a queue for price updates on asset and start polling if needed"""
+        asset = asset.upper()
+        queues = self._subscribers.setdefault(asset, {})
+        queues[queue] = queues.get(queue, 0) + 1
+        logger.info(f"Subscribed to {asset} (refs={self.refcount(asset)})")
+        for stream in self.streams:
+            stream.add_asset(asset)
+        self._ensure_running()
+
+    def unsubscribe(self, asset: str, queue: asyncio.Queue):
+        """Drop one reference; the asset stops being polled and streamed when none are left"""
+        asset = asset.upper()
+        queues = self._subscribers.get(asset)
+        if not queues or queue not in queues:
+            return
+
+        queues[queue] -= 1
+        if queues[queue] <= 0:
+            del queues[queue]
+        if not queues:
+            del self._subscribers[asset]
+            for stream in self.streams:
+                stream.remove_asset(asset)
+            logger.info(f"No subscribers left for {asset}, polling and streaming stopped")
+
+    def refcount(self, asset: str) -> int:
+        return sum(self._subscribers.get(asset.upper(), {}).values())
+
+    @property
+    def assets(self) -> list:
+        return list(self._subscribers)
+
+    def publish(self, asset: str, price: float):
+        """Push a price to every queue subscribed to asset"""
+        for queue in list(self._subscribers.get(asset.upper(), {})):
+            queue.put_nowait((asset, price))
+
+    async def tick(self):
+        """Archive fresh streamed quotes and poll everything else in one batch"""
+        assets = self.assets
+        if not assets:
+            return
+
+        stale = []
+        for asset in assets:
+            if self.streams and all(stream.is_fresh(asset) for stream in self.streams):
+                archive_latest(asset)
+            else:
+                stale.append(asset)
+        if not stale:
+            return
+
+        # Recording the prices notifies _on_quote, which fans them out
+        data = await update_caches_async(stale)
+        for asset in stale:
+            if self._pick_price(data.get(asset) or {}) is None:
+                logger.warning(f"No price for {asset}")
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for stream in self.streams:
+            stream.stop()
+        if self._listening:
+            get_price_store().remove_quote_listener(self._on_quote)
+            self._listening = False
+
+    def _on_quote(self, asset: str, ts: float, latest: dict):
+        """PriceStore quote listener: forward new prices for watched assets"""
+        if asset not in self._subscribers:
+            return
+        price = self._pick_price(latest)
+        if price is not None:
+            self.publish(asset, price)
+
+    def _pick_price(self, prices: dict):
+        for source in self.source_priority:
+            price = prices.get(source)
+            if price:
+                return float(price)
+        return None
+
+    def _ensure_running(self):
+        if not self._listening:
+            get_price_store().add_quote_listener(self._on_quote)
+            self._listening = True
+        for stream in self.streams:
+            stream.start()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        logger.info("🔁 Market poller started")
+        try:
+            while True:
+                try:
+                    await self.tick()
+                except Exception as e:
+                    logger.error(f"❌ Error in market poller: {e}", exc_info=True)
+                await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            logger.info("🛑 Market poller cancelled")
@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import logging
+import contextlib
+
+from positions import Position
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Goes up from bot/ to hedgebot/
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+MONITOR_DB_FILE = os.path.join(CACHE_DIR, "monitors.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS monitors (
+    user_id     INTEGER PRIMARY KEY,
+    chat_id     INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    user_id     INTEGER NOT NULL REFERENCES monitors(user_id) ON DELETE CASCADE,
+    asset       TEXT    NOT NULL,
+    size        REAL    NOT NULL,
+    threshold   REAL    NOT NULL,
+    exposure    REAL,
+    entry_price REAL,
+    timestamp   TEXT,
+    hedge       REAL    NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, asset)
+);
+CREATE TABLE IF NOT EXISTS auto_hedge (
+    user_id     INTEGER PRIMARY KEY,
+    strategy    TEXT    NOT NULL,
+    threshold   REAL    NOT NULL,
+    enabled     INTEGER NOT NULL CHECK (enabled IN (0, 1))
+);
+"""
+
+_store = None
+
+
+class MonitorStore:
+    """
+    SQLite (WAL) persistence for monitored positions and auto-hedge settings.
+
+    The bot keeps serving from its in-memory dicts; every change is written
+    through here in its own transaction, and load() rebuilds the dicts in one
+    pass on startup.
+    """
+
+    def __init__(self, path: str = MONITOR_DB_FILE):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def load(self) -> tuple:
+        """
+        Everything persisted, in the bot's in-memory layout.
+
+        Returns:
+            tuple: (monitors, auto_hedge) where monitors is
+                {user_id: {"chat_id": ..., "assets": {asset: Position}}} and
+                auto_hedge is {user_id: {"strategy", "threshold", "enabled"}}
+        """
+        monitors = {
+            user_id: {"chat_id": chat_id, "assets": {}}
+            for user_id, chat_id in self._conn.execute("SELECT user_id, chat_id FROM monitors")
+        }
+        rows = self._conn.execute(
+            "SELECT user_id, asset, size, threshold, exposure, entry_price, timestamp, hedge FROM positions"
+        )
+        for user_id, asset, size, threshold, exposure, entry_price, timestamp, hedge in rows:
+            monitors[user_id]["assets"][asset] = Position(
+                asset=asset,
+                size=size,
+                threshold=threshold,
+                entry_price=entry_price,
+                exposure=exposure or 0.0,
+                opened_at=Position.parse_timestamp(timestamp),
+                hedge=hedge,
+            )
+
+        auto_hedge = {
+            user_id: {"strategy": strategy, "threshold": threshold, "enabled": bool(enabled)}
+            for user_id, strategy, threshold, enabled in self._conn.execute(
+                "SELECT user_id, strategy, threshold, enabled FROM auto_hedge"
+            )
+        }
+        positions = sum(len(monitor["assets"]) for monitor in monitors.values())
+        logger.info(f"Loaded {positions} monitored positions and {len(auto_hedge)} auto-hedge configs")
+        return monitors, auto_hedge
+
+    def save_position(self, user_id: int, chat_id: int, position: Position):
+        """Insert or replace one monitored position (and its user's chat)"""
+        with self._transaction():
+            self._conn.execute(
+                "INSERT INTO monitors (user_id, chat_id) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET chat_id = excluded.chat_id",
+                (user_id, chat_id),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO positions "
+                "(user_id, asset, size, threshold, exposure, entry_price, timestamp, hedge) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    user_id, position.asset, position.size, position.threshold,
+                    position.exposure, position.entry_price, position.timestamp, position.hedge,
+                ),
+            )
+
+    def delete_monitor(self, user_id: int):
+        """Forget a user's monitor and all of its positions"""
+        with self._transaction():
+            self._conn.execute("DELETE FROM monitors WHERE user_id = ?", (user_id,))
+
+    def save_auto_hedge(self, user_id: int, config: dict):
+        with self._transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO auto_hedge (user_id, strategy, threshold, enabled) VALUES (?, ?, ?, ?)",
+                (user_id, config["strategy"], config["threshold"], int(bool(config.get("enabled", False)))),
+            )
+
+    def close(self):
+        self._conn.close()
+
+    def _migrate(self):
+        """Add columns introduced after a database was created"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(positions)")}
+        if "hedge" not in columns:
+            self._conn.execute("ALTER TABLE positions ADD COLUMN hedge REAL NOT NULL DEFAULT 0")
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, rolled back if the block raises"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+
+def get_monitor_store() -> MonitorStore:
+    """Process-wide monitor store, opened on first use"""
+    global _store
+    if _store is None:
+        _store = MonitorStore()
+    return _store
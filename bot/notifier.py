@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from telegram.error import BadRequest, Forbidden, RetryAfter, NetworkError, TelegramError
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_RATE = 30  # Telegram allows ~30 messages/s per bot across all chats
+CHAT_RATE = 1  # ... and ~1 message/s to the same chat
+MAX_MESSAGE_LENGTH = 4096
+MAX_RETRIES = 5
+SEPARATOR = "\n\n"
+
+
+class TokenBucket:
+    """Classic token bucket: rate tokens per second, at most capacity banked"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class NotificationDispatcher:
+    """
+    Outbound message queue for alerts and hedge notifications.
+
+    send() only enqueues, so callers never wait on Telegram. One worker
+    drains the queue under a global and a per-chat token bucket; messages
+    that pile up for a chat while it is rate limited are merged into one
+    message (up to Telegram's length limit). A 429 RetryAfter pauses all
+    sending for the requested time and the message is retried.
+    """
+
+    def __init__(self, bot, global_rate: float = GLOBAL_RATE, chat_rate: float = CHAT_RATE):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.sent = 0
+        self.coalesced = 0
+        self._global = TokenBucket(global_rate)
+        self._chats = {}  # chat_id -> TokenBucket
+        self._pending = {}  # chat_id -> deque of (text, kwargs)
+        self._scheduled = set()  # chats queued, waiting on their bucket or in flight
+        self._ready = asyncio.Queue()
+        self._paused_until = 0.0
+        self._deliveries = set()
+        self._task = None
+
+    def send(self, chat_id: int, text: str, **kwargs):
+        """Queue a message for chat_id; extra kwargs go to bot.send_message"""
+        self._pending.setdefault(chat_id, deque()).append((text, kwargs))
+        if chat_id not in self._scheduled:
+            self._scheduled.add(chat_id)
+            self._ready.put_nowait(chat_id)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def pending(self) -> int:
+        return sum(len(messages) for messages in self._pending.values())
+
+    async def drain(self, timeout: float = 5.0):
+        """Wait (up to timeout) until everything queued so far has been sent"""
+        deadline = time.monotonic() + timeout
+        while self._scheduled and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for delivery in self._deliveries:
+            delivery.cancel()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                chat_id = await self._ready.get()
+
+                bucket = self._chats.setdefault(chat_id, TokenBucket(self.chat_rate))
+                wait = bucket.delay()
+                if wait > 0:
+                    # Let other chats go first; more messages may be merged meanwhile
+                    loop.call_later(wait, self._ready.put_nowait, chat_id)
+                    continue
+
+                wait = max(self._global.delay(), self._paused_until - time.monotonic())
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                bucket.take()
+                self._global.take()
+
+                text, kwargs = self._next_batch(chat_id)
+                delivery = asyncio.create_task(self._deliver(chat_id, text, kwargs))
+                self._deliveries.add(delivery)
+                delivery.add_done_callback(self._deliveries.discard)
+        except asyncio.CancelledError:
+            logger.info("🛑 Notification dispatcher cancelled")
+
+    def _next_batch(self, chat_id: int) -> tuple:
+        """Pop the next message, merged with the plain messages queued behind it"""
+        messages = self._pending[chat_id]
+        text, kwargs = messages.popleft()
+        while messages and not kwargs:
+            next_text, next_kwargs = messages[0]
+            if next_kwargs or len(text) + len(SEPARATOR) + len(next_text) > MAX_MESSAGE_LENGTH:
+                break
+            messages.popleft()
+            text += SEPARATOR + next_text
+            self.coalesced += 1
+        return text, kwargs
+
+    async def _deliver(self, chat_id: int, text: str, kwargs: dict):
+        try:
+            for attempt in range(1, MAX_RETRIES + 1):
+                try:
+                    await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                    self.sent += 1
+                    break
+                except RetryAfter as e:
+                    retry_after = _seconds(e.retry_after)
+                    logger.warning(f"Rate limited by Telegram, retrying in {retry_after:.1f}s")
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                    await asyncio.sleep(retry_after)
+                except (BadRequest, Forbidden) as e:
+                    # BadRequest subclasses NetworkError, but resending the same request can't succeed
+                    logger.error(f"Dropping message to {chat_id}: {e}")
+                    break
+                except NetworkError as e:
+                    logger.warning(f"Send to {chat_id} failed (attempt {attempt}): {e}")
+                    await asyncio.sleep(min(2 ** attempt, 30))
+                except TelegramError as e:
+                    logger.error(f"Dropping message to {chat_id}: {e}")
+                    break
+            else:
+                logger.error(f"Dropping message to {chat_id} after {MAX_RETRIES} attempts")
+        finally:
+            if self._pending.get(chat_id):
+                self._ready.put_nowait(chat_id)
+            else:
+                self._pending.pop(chat_id, None)
+                self._scheduled.discard(chat_id)
+
+
+def _seconds(value) -> float:
+    """RetryAfter.retry_after is an int in PTB 20 and a timedelta in later versions"""
+    return value.total_seconds() if hasattr(value, "total_seconds") else float(value)
@@ -0,0 +1,88 @@
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import numpy as np
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass(slots=True)
+class Position:
+    """One monitored position; a slotted object instead of a per-position dict"""
+
+    asset: str
+    size: float
+    threshold: float
+    entry_price: float
+    exposure: float = 0.0
+    opened_at: float = field(default_factory=time.time)  # epoch seconds
+    hedge: float = 0.0  # perp units held short against it by the delta-neutral strategy
+
+    @property
+    def timestamp(self) -> str:
+        """Opening time as a UTC "YYYY-mm-dd HH:MM:SS" string"""
+        return datetime.fromtimestamp(self.opened_at, timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+    def exposure_at(self, price: float) -> float:
+        return self.size * price
+
+    def pnl(self, price: float) -> float:
+        return (price - self.entry_price) * self.size
+
+    def pnl_pct(self, price: float) -> float:
+        return (price - self.entry_price) / self.entry_price * 100
+
+    @staticmethod
+    def parse_timestamp(value: str) -> float:
+        """Inverse of the timestamp property"""
+        # fromisoformat accepts TIMESTAMP_FORMAT and is much faster than strptime
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+class PositionBook:
+    """
+    Columnar snapshot of many positions for vectorized risk math.
+
+    Sizes, thresholds and entry prices are float64 arrays and assets are
+    integer codes into asset_names, so per-position spots are one gather
+    from a per-asset price vector and every metric is a NumPy expression.
+    """
+
+    def __init__(self, positions=()):
+        positions = list(positions)
+        self.asset_names, self.asset_codes = np.unique(
+            np.array([p.asset for p in positions], dtype=str), return_inverse=True
+        )
+        self.size = np.fromiter((p.size for p in positions), dtype=float, count=len(positions))
+        self.threshold = np.fromiter((p.threshold for p in positions), dtype=float, count=len(positions))
+        self.entry_price = np.fromiter((p.entry_price for p in positions), dtype=float, count=len(positions))
+
+    def __len__(self):
+        return len(self.size)
+
+    def spots(self, prices: dict) -> np.ndarray:
+        """Per-position price from an asset -> price mapping (NaN where missing)"""
+        by_asset = np.array(
+            [prices.get(asset) or np.nan for asset in self.asset_names.tolist()], dtype=float
+        )
+        return by_asset[self.asset_codes]
+
+    def exposures(self, spots: np.ndarray) -> np.ndarray:
+        return self.size * spots
+
+    def breached(self, spots: np.ndarray) -> np.ndarray:
+        return self.size * spots > self.threshold
+
+    def pnl(self, spots: np.ndarray) -> np.ndarray:
+        return (spots - self.entry_price) * self.size
+
+    def pnl_pct(self, spots: np.ndarray) -> np.ndarray:
+        return (spots - self.entry_price) / self.entry_price * 100
+
+    def delta_exposures(self, spots: np.ndarray, delta: np.ndarray) -> np.ndarray:
+        return self.size * spots * delta
+
+    def totals(self, greeks: dict) -> dict:
+        """Size-weighted portfolio sums of each greek array (NaN positions skipped)"""
+        return {name: float(np.nansum(values * self.size)) for name, values in greeks.items()}
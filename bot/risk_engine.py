@@ -0,0 +1,220 @@
+import asyncio
+import bisect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+REMIND_INTERVAL = 30  # Seconds before a position that stays breached is reported again
+
+
+class BreachIndex:
+    """
+    Monitored positions per asset, ordered by breach price.
+
+    A position of size s with threshold T breaches when price * s > T, i.e.
+    above T / s for a long position and below T / s for a short one. Keeping
+    each side sorted by that price means the positions crossed by a move from
+    one price to another are a contiguous slice, found with two bisects in
+    O(log n + k) however many positions are watched.
+    """
+
+    def __init__(self):
+        self._levels = {}  # (asset, side) -> sorted breach prices
+        self._keys = {}  # (asset, side) -> keys in the same order
+        self._entries = {}  # (asset, key) -> (side, breach price)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def count(self, asset: str) -> int:
+        asset = asset.upper()
+        return sum(len(self._keys.get((asset, side), [])) for side in ("above", "below"))
+
+    def upsert(self, asset: str, key, size: float, threshold: float):
+        """Index (or re-index) key's position; flat positions can't breach and are dropped"""
+        asset = asset.upper()
+        self.remove(asset, key)
+        if not size:
+            return
+
+        side = "above" if size > 0 else "below"
+        level = threshold / size
+        levels = self._levels.setdefault((asset, side), [])
+        keys = self._keys.setdefault((asset, side), [])
+        i = bisect.bisect_right(levels, level)
+        levels.insert(i, level)
+        keys.insert(i, key)
+        self._entries[(asset, key)] = (side, level)
+
+    def remove(self, asset: str, key):
+        asset = asset.upper()
+        entry = self._entries.pop((asset, key), None)
+        if entry is None:
+            return
+
+        side, level = entry
+        levels = self._levels[(asset, side)]
+        keys = self._keys[(asset, side)]
+        i = bisect.bisect_left(levels, level)
+        while keys[i] != key:  # step over other positions at the same level
+            i += 1
+        del levels[i]
+        del keys[i]
+
+    def is_breached(self, asset: str, key, price: float) -> bool:
+        entry = self._entries.get((asset.upper(), key))
+        if entry is None:
+            return False
+        side, level = entry
+        return price > level if side == "above" else price < level
+
+    def breached(self, asset: str, price: float) -> list:
+        """Every key whose position is in breach at price"""
+        asset = asset.upper()
+        levels = self._levels.get((asset, "above"), [])
+        above = self._keys.get((asset, "above"), [])[:bisect.bisect_left(levels, price)]
+        levels = self._levels.get((asset, "below"), [])
+        below = self._keys.get((asset, "below"), [])[bisect.bisect_right(levels, price):]
+        return above + below
+
+    def crossed(self, asset: str, old_price: float, new_price: float) -> list:
+        """Keys that were not in breach at old_price but are at new_price"""
+        if old_price is None:
+            return self.breached(asset, new_price)
+
+        asset = asset.upper()
+        if new_price > old_price:
+            levels = self._levels.get((asset, "above"), [])
+            lo = bisect.bisect_left(levels, old_price)
+            hi = bisect.bisect_left(levels, new_price)
+            return self._keys.get((asset, "above"), [])[lo:hi]
+        if new_price < old_price:
+            levels = self._levels.get((asset, "below"), [])
+            lo = bisect.bisect_right(levels, new_price)
+            hi = bisect.bisect_right(levels, old_price)
+            return self._keys.get((asset, "below"), [])[lo:hi]
+        return []
+
+
+class RiskEvaluator:
+    """
+    One event-driven threshold evaluator for every monitored position.
+
+    Each price update from the market poller only looks at positions in that
+    asset, and only hands the ones that just crossed their threshold to
+    ``on_breach(key, asset, price)``. Positions that stay in breach are
+    handed over again at most every remind_interval seconds, which is also
+    the per-position cooldown for prices flickering around a threshold.
+    """
+
+    def __init__(self, poller, on_breach, remind_interval: float = REMIND_INTERVAL):
+        self.poller = poller
+        self.on_breach = on_breach
+        self.remind_interval = remind_interval
+        self.index = BreachIndex()
+        self._queue = asyncio.Queue()
+        self._last_price = {}  # asset -> last evaluated price
+        self._last_sweep = {}  # asset -> monotonic time of the last reminder sweep
+        self._last_alert = {}  # (asset, key) -> monotonic time handed to on_breach
+        self._pending = {}  # asset -> keys (re)indexed since the last price
+        self._subscribed = set()
+        self._task = None
+        self._handlers = set()  # on_breach dispatches still running
+
+    def watch(self, key, asset: str, size: float, threshold: float):
+        """Start (or update) monitoring key's position in asset"""
+        asset = asset.upper()
+        self.index.upsert(asset, key, size, threshold)
+        # Already-breached positions don't cross anything; check them on the next price
+        self._pending.setdefault(asset, set()).add(key)
+        self._sync_subscription(asset)
+        self._ensure_running()
+
+    def unwatch(self, key, asset: str):
+        asset = asset.upper()
+        self.index.remove(asset, key)
+        self._last_alert.pop((asset, key), None)
+        self._pending.get(asset, set()).discard(key)
+        self._sync_subscription(asset)
+
+    async def evaluate(self, asset: str, price: float):
+        """Hand every position that needs attention at this price to on_breach"""
+        asset = asset.upper()
+        due = self._due(asset, price)
+        if due:
+            await self._handle(asset, price, due)
+
+    def _due(self, asset: str, price: float) -> list:
+        """Keys to hand to on_breach at this price, marked as alerted"""
+        candidates = self.index.crossed(asset, self._last_price.get(asset), price)
+        self._last_price[asset] = price
+
+        pending = self._pending.pop(asset, ())
+        candidates += [key for key in pending if self.index.is_breached(asset, key, price)]
+
+        now = time.monotonic()
+        if now - self._last_sweep.get(asset, now) >= self.remind_interval:
+            candidates += self.index.breached(asset, price)
+            self._last_sweep[asset] = now
+        self._last_sweep.setdefault(asset, now)
+
+        due = []
+        for key in dict.fromkeys(candidates):
+            if now - self._last_alert.get((asset, key), float("-inf")) >= self.remind_interval:
+                self._last_alert[(asset, key)] = now
+                due.append(key)
+        return due
+
+    async def _handle(self, asset: str, price: float, due: list):
+        results = await asyncio.gather(
+            *(self.on_breach(key, asset, price) for key in due), return_exceptions=True
+        )
+        for key, result in zip(due, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Breach handler failed for {key} {asset}: {result}", exc_info=result)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._handlers:
+            task.cancel()
+        self._handlers.clear()
+        for asset in self._subscribed:
+            self.poller.unsubscribe(asset, self._queue)
+        self._subscribed.clear()
+
+    def _sync_subscription(self, asset: str):
+        """Receive prices for asset exactly while it has indexed positions"""
+        if self.index.count(asset) and asset not in self._subscribed:
+            self.poller.subscribe(asset, self._queue)
+            self._subscribed.add(asset)
+        elif not self.index.count(asset) and asset in self._subscribed:
+            self.poller.unsubscribe(asset, self._queue)
+            self._subscribed.discard(asset)
+            self._last_price.pop(asset, None)
+            self._last_sweep.pop(asset, None)
+            self._pending.pop(asset, None)
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        logger.info("🔁 Risk evaluator started")
+        try:
+            while True:
+                asset, price = await self._queue.get()
+                try:
+                    asset = asset.upper()
+                    due = self._due(asset, price)
+                    if due:
+                        # Handlers send messages and may hedge; keep draining prices meanwhile
+                        task = asyncio.create_task(self._handle(asset, price, due))
+                        self._handlers.add(task)
+                        task.add_done_callback(self._handlers.discard)
+                except Exception as e:
+                    logger.error(f"❌ Error in risk evaluator: {e}", exc_info=True)
+        except asyncio.CancelledError:
+            logger.info("🛑 Risk evaluator cancelled")
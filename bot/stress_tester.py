@@ -1,7 +1,16 @@
-from greeks import calculate_greeks  # your own function
+from greeks import calculate_greeks, calculate_greeks_batch  # your own function
 from datetime import datetime, timedelta
 import math
 
+import numpy as np
+
+# Default risk ladder: spot -50%..+50%, vol -50%..+200%, 0..30 days passed
+DEFAULT_SPOT_SHOCKS = np.round(np.linspace(-0.5, 0.5, 21), 4)
+DEFAULT_VOL_SHOCKS = np.round(np.linspace(-0.5, 2.0, 11), 4)
+DEFAULT_DAYS_PASSED = np.arange(0, 31)
+GREEK_NAMES = ("delta", "gamma", "theta", "vega")
+MIN_DAYS_REMAINING = 0.365  # same floor as simulate_stress_scenarios (0.001 years)
+
 def simulate_stress_scenarios(asset_name, base_params, scenarios):
     """
     base_params: {
@@ -41,3 +50,49 @@ def simulate_stress_scenarios(asset_name, base_params, scenarios):
         }
 
     return results
+
+
+def simulate_stress_grid(base_params, spot_shocks=None, vol_shocks=None, days_passed=None):
+    """
+    Evaluate the full spot x vol x time Cartesian product in one vectorized pass.
+
+    base_params: same keys as simulate_stress_scenarios, plus an optional
+    "quantity" (default 1) that scales PnL and greeks. option_type must be
+    "call" or "put"; anything else raises ValueError.
+
+    Returns:
+        dict: the three shock axes plus
+            "pnl": array (spot, vol, days) of PnL against the unshocked price
+            "price": array (spot, vol, days) of option prices
+            "greeks": array (4, spot, vol, days) ordered as GREEK_NAMES
+    """
+    spot_shocks = DEFAULT_SPOT_SHOCKS if spot_shocks is None else np.asarray(spot_shocks, dtype=float)
+    vol_shocks = DEFAULT_VOL_SHOCKS if vol_shocks is None else np.asarray(vol_shocks, dtype=float)
+    days_passed = DEFAULT_DAYS_PASSED if days_passed is None else np.asarray(days_passed, dtype=float)
+
+    option_type = base_params["option_type"].lower()
+    if option_type not in ("call", "put"):
+        raise ValueError(f"option_type must be call or put, got {base_params['option_type']!r}")
+    rate = base_params.get("rate", 0.05)
+    is_call = option_type == "call"
+    quantity = base_params.get("quantity", 1.0)
+
+    # Broadcast the three axes against each other: (spot, 1, 1) x (1, vol, 1) x (1, 1, days)
+    spot = base_params["spot"] * (1 + spot_shocks)[:, None, None]
+    volatility = base_params["volatility"] * (1 + vol_shocks)[None, :, None]
+    days = np.maximum(base_params["time_to_expiry"] - days_passed, MIN_DAYS_REMAINING)[None, None, :]
+
+    shocked = calculate_greeks_batch(spot, base_params["strike"], days, volatility, rate, is_call)
+    base = calculate_greeks_batch(
+        base_params["spot"], base_params["strike"], base_params["time_to_expiry"],
+        base_params["volatility"], rate, is_call,
+    )
+
+    return {
+        "spot_shocks": spot_shocks,
+        "vol_shocks": vol_shocks,
+        "days_passed": days_passed,
+        "price": shocked["price"],
+        "pnl": (shocked["price"] - base["price"]) * quantity,
+        "greeks": np.stack([shocked[name] for name in GREEK_NAMES]) * quantity,
+    }
@@ -5,8 +5,11 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from datetime import datetime
 import asyncio
+import threading
+import functools
 import json
 import logging
+import numpy as np
 logger = logging.getLogger("telegram")
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
@@ -16,13 +19,22 @@ from telegram.ext import (
     CallbackQueryHandler,
 )
 from dotenv import load_dotenv
-from hedge_logger import get_hedge_history, log_hedge
+from hedge_logger import get_journal, timeframe_cutoff
 from hedge_engine import execute_hedge
-from data_fetcher import update_cache 
-from greeks import calculate_greeks
-from data_fetcher import update_cache, load_cached_data
-from correlation_engine import compute_correlation
-from stress_tester import simulate_stress_scenarios
+from greeks import atm_strike, calculate_greeks, get_greeks_cache, prewarm as prewarm_greeks
+from data_fetcher import update_cache_async, get_price_store, close_session
+from correlation_engine import get_correlation_tracker
+from stress_tester import simulate_stress_scenarios, simulate_stress_grid
+from market_poller import MarketPoller
+from risk_engine import RiskEvaluator
+from monitor_store import get_monitor_store
+from positions import Position, PositionBook
+from notifier import NotificationDispatcher
+from hedge_netter import HedgeNetter
+from delta_hedger import DeltaHedger
+from var_engine import get_var_engine, get_return_cache, historical_var
+from vol_surface import get_vol_surfaces
+from stream_feeds import BybitStream, DeribitStream
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -30,13 +42,27 @@ from telegram.ext import ContextTypes
 # Load .env variables
 load_dotenv()
 
-# Global dictionaries for active monitoring
+# Global dictionary for active monitoring (persisted in cache/monitors.db)
 active_monitors = {}
-user_tasks = {}
 
-# Global dictionary for auto hedge configurations
+# Global dictionary for auto hedge configurations (persisted in cache/monitors.db)
 auto_hedge_config = {}
 
+# Shared poller: each watched asset is fetched once per tick for all users
+market_poller = MarketPoller()
+snapshot_task = None
+# Refreshes implied vol surfaces from Deribit option quotes; started in on_startup
+vol_surface_task = None
+
+# Evaluates every monitored position as prices arrive; created in on_startup
+risk_evaluator = None
+# Rate-limited outbound queue for alerts and hedge notifications; created in on_startup
+notifier = None
+# Nets concurrent hedges across users into one order per asset; created in on_startup
+hedge_netter = None
+# Rebalances delta_neutral users' perp hedges as prices move; created in on_startup
+delta_hedger = None
+
 # Logger setup
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -50,11 +76,16 @@ if not BOT_TOKEN:
     logger.error("TELEGRAM_BOT_TOKEN not found in .env file!")
     sys.exit(1)
 
+# WebSocket price streams (set PRICE_STREAMING=0 to poll REST only)
+PRICE_STREAMING = os.getenv("PRICE_STREAMING", "1") == "1"
+
+# Saved Deribit option quotes to build vol surfaces from instead of the live
+# API, e.g. "fixtures/{asset}_options.json"
+VOL_SURFACE_FIXTURE = os.getenv("VOL_SURFACE_FIXTURE")
+
 # Ensure cache directory exists
 CACHE_DIR = "cache"
 os.makedirs(CACHE_DIR, exist_ok=True)
-CACHE_FILE = os.path.join(CACHE_DIR, "live_data.json")
-HEDGE_HISTORY_FILE = os.path.join(CACHE_DIR, "hedge_history.json")  # Fixed path
 
 
 def get_max_price_from_asset_data(asset_data: dict) -> float:
@@ -81,12 +112,12 @@ def get_max_price_from_asset_data(asset_data: dict) -> float:
     return max_price if max_price > 0 else None
 
 
-async def send_notification(context: ContextTypes.DEFAULT_TYPE, user_id: int, message: str):
-    """Send real-time notification to user"""
+def send_notification(context: ContextTypes.DEFAULT_TYPE, user_id: int, message: str):
+    """Queue a real-time notification to user; returns without waiting on Telegram"""
     try:
         if user_id in active_monitors:
             chat_id = active_monitors[user_id]["chat_id"]
-            await context.bot.send_message(chat_id=chat_id, text=message)
+            notifier.send(chat_id, message)
     except Exception as e:
         logger.error(f"Failed to send notification: {e}")
 
@@ -98,11 +129,11 @@ async def execute_and_notify_hedge(context: ContextTypes.DEFAULT_TYPE, user_id:
         if price is None:
             return None, "⚠️ Failed to fetch live price."
 
-        # Execute hedge
-        hedge_result = execute_hedge(asset, size, price)
-        
-        # Log and notify
-        log_hedge(asset, size, price, mode)
+        # Netted with other users' hedges in the same window and journaled
+        # with them; the allocation may be less than requested
+        hedge_result = await hedge_netter.submit(user_id, asset, size, price, mode=mode)
+        size = hedge_result["size"]
+
         
         # Prepare performance metrics
         prev_exposure = None
@@ -112,8 +143,8 @@ async def execute_and_notify_hedge(context: ContextTypes.DEFAULT_TYPE, user_id:
         
         # Only calculate if we have active monitoring
         if user_id in active_monitors and asset in active_monitors[user_id]["assets"]:
-            prev_exposure = active_monitors[user_id]["assets"][asset]["exposure"]
-            new_size = active_monitors[user_id]["assets"][asset]["size"] - size
+            prev_exposure = active_monitors[user_id]["assets"][asset].size * price
+            new_size = active_monitors[user_id]["assets"][asset].size - size
             new_exposure = new_size * price if new_size > 0 else 0
             risk_reduction = prev_exposure - new_exposure if prev_exposure else 0
         
@@ -139,7 +170,8 @@ async def execute_and_notify_hedge(context: ContextTypes.DEFAULT_TYPE, user_id:
             f"• Execution Price: ${hedge_result['execution_price']:,.2f}\n"
             f"• Slippage: {hedge_result['slippage_pct']:.2f}%\n"
             f"• Estimated Fees: ${hedge_result['cost']:,.2f}\n"
-            f"• Effective Price: ${hedge_result['execution_price'] * (1 + hedge_result['slippage_pct']/100):,.2f}"
+            f"• Effective Price: ${hedge_result['execution_price'] * (1 + hedge_result['slippage_pct']/100):,.2f}\n"
+            f"• Routing: {', '.join(f'{venue.capitalize()} {filled:.4f}' for venue, filled in hedge_result['route'].items())}"
         )
         
         # Performance tracking
@@ -156,16 +188,16 @@ async def execute_and_notify_hedge(context: ContextTypes.DEFAULT_TYPE, user_id:
             perf_msg = "📊 Performance Tracking: Position not monitored"
         
         # Send notifications
-        await send_notification(context, user_id, confirmation_msg)
-        await asyncio.sleep(1)
-        await send_notification(context, user_id, cost_msg)
-        await asyncio.sleep(1)
-        await send_notification(context, user_id, perf_msg)
+        # Queued back to back; the dispatcher merges them into one message
+        send_notification(context, user_id, confirmation_msg)
+        send_notification(context, user_id, cost_msg)
+        send_notification(context, user_id, perf_msg)
         
         # Update position size
         if user_id in active_monitors and asset in active_monitors[user_id]["assets"]:
-            active_monitors[user_id]["assets"][asset]["size"] = new_size
-            active_monitors[user_id]["assets"][asset]["exposure"] = new_exposure
+            active_monitors[user_id]["assets"][asset].size = new_size
+            active_monitors[user_id]["assets"][asset].exposure = new_exposure
+            update_position(user_id, asset)
             
         return hedge_result, None
     
@@ -209,12 +241,14 @@ async def auto_hedge(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("⚠️ Configure strategy first: /auto_hedge <strategy> <threshold>")
             return
         auto_hedge_config[user_id]["enabled"] = True
+        update_auto_hedge(user_id)
         await update.message.reply_text("✅ Auto hedging ENABLED")
         return
 
     if cmd == "disable":
         if user_id in auto_hedge_config:
             auto_hedge_config[user_id]["enabled"] = False
+            update_auto_hedge(user_id)
         await update.message.reply_text("🛑 Auto hedging DISABLED")
         return
 
@@ -232,6 +266,7 @@ async def auto_hedge(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "threshold": threshold,
             "enabled": True
         }
+        update_auto_hedge(user_id)
 
         await update.message.reply_text(
             f"🤖 Auto Hedge Configured\n\n"
@@ -247,9 +282,22 @@ async def auto_hedge(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("ℹ️ No active monitored assets found. Use /monitor_risk first.")
             return
 
+        if strategy == "delta_neutral":
+            # The threshold is a band on portfolio delta; rebalance now if it is already outside
+            for asset in monitored_assets:
+                price = get_latest_price(asset)
+                if price is not None:
+                    await delta_hedger.evaluate(asset, price)
+            await update.message.reply_text(
+                f"⚖️ Delta-neutral hedging active\n\n"
+                f"• Portfolio Delta: ${delta_hedger.portfolio_delta(user_id):,.2f}\n"
+                f"• Rebalance Band: ±${threshold:,.2f}"
+            )
+            return
+
         for asset, data in monitored_assets.items():
-            size = data["size"]
-            exposure = data["exposure"]
+            size = data.size
+            exposure = position_exposure(asset, data)
 
             if exposure > threshold:
                 await update.message.reply_text(
@@ -283,9 +331,9 @@ async def hedge_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
     # Get current position data
     position = active_monitors[user_id]["assets"][asset]
-    size = position["size"]
-    threshold = position["threshold"]
-    exposure = position.get("exposure", 0)
+    size = position.size
+    threshold = position.threshold
+    exposure = position_exposure(asset, position)
     
     # Get current price
     price = get_latest_price(asset)
@@ -314,6 +362,11 @@ async def hedge_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"• Strategy: {auto_strategy}\n"
         f"• Threshold: ${auto_config.get('threshold', 'N/A')}"
     )
+    if auto_strategy == "delta_neutral":
+        msg += (
+            f"\n• Perp Hedge: {position.hedge:.4f} short\n"
+            f"• Portfolio Delta: ${delta_hedger.portfolio_delta(user_id):,.2f}"
+        )
     
     await update.message.reply_text(msg)
 
@@ -323,92 +376,32 @@ async def hedge_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
     args = context.args
     asset = args[0].upper() if args else None
     timeframe = args[1].lower() if len(args) > 1 else "all"
+    time_msg = {
+        "1d": "last 24 hours",
+        "2d": "last 48 hours",
+        "7d": "last 7 days",
+        "30d": "last 30 days",
+        "all": "all time"
+    }.get(timeframe, timeframe)
 
+    # Indexed journal lookups: cost does not grow with the journal size
     try:
-        # Create file if it doesn't exist
-        if not os.path.exists(HEDGE_HISTORY_FILE):
-            with open(HEDGE_HISTORY_FILE, "w") as f:
-                json.dump([], f)
-                
-        with open(HEDGE_HISTORY_FILE, "r") as f:
-            history = json.load(f)
+        since = timeframe_cutoff(timeframe)
+        journal = get_journal()
+        stats = journal.summary(asset, since)
     except Exception as e:
         logger.error(f"Failed to read hedge history: {e}")
         await update.message.reply_text("⚠️ Failed to load hedge history.")
         return
 
-    # Show message if no records exist
-    if not history:
-        await update.message.reply_text("📭 No hedge records found.")
-        return
-
-    # Filter by asset if provided
-    if asset:
-        history = [h for h in history if h.get("asset") == asset.upper()]
-    
-    # If no records after asset filtering
-    if not history:
-        await update.message.reply_text(f"📭 No hedge records found for {asset}.")
-        return
-
-    # Apply timeframe filtering
-    now = datetime.utcnow()
-    filtered_history = []
-    
-    for record in history:
-        try:
-            # Parse ISO format timestamp: "2025-07-09T21:35:47.728181Z"
-            timestamp_str = record["timestamp"]
-            
-            # Remove microseconds and 'Z' if present
-            if '.' in timestamp_str:
-                timestamp_str = timestamp_str.split('.')[0]
-            if timestamp_str.endswith('Z'):
-                timestamp_str = timestamp_str[:-1]
-                
-            # Parse the cleaned timestamp
-            record_time = datetime.strptime(timestamp_str, "%Y-%m-%dT%H:%M:%S")
-            time_diff = now - record_time
-            
-            # Convert to total hours for more precise filtering
-            total_hours = time_diff.total_seconds() / 3600
-            
-            if timeframe == "1d" and total_hours <= 24:
-                filtered_history.append(record)
-            elif timeframe == "2d" and total_hours <= 48:
-                filtered_history.append(record)
-            elif timeframe == "7d" and total_hours <= 168:  # 7*24
-                filtered_history.append(record)
-            elif timeframe == "30d" and total_hours <= 720:  # 30*24
-                filtered_history.append(record)
-            elif timeframe == "all":
-                filtered_history.append(record)
-        except (KeyError, ValueError) as e:
-            logger.warning(f"Error parsing timestamp in record: {record} - {e}")
-            continue
-
-    # If no records after timeframe filtering
-    if not filtered_history:
-        time_msg = {
-            "1d": "last 24 hours",
-            "2d": "last 48 hours",
-            "7d": "last 7 days",
-            "30d": "last 30 days",
-            "all": "all time"
-        }.get(timeframe, timeframe)
-        
+    if not stats["count"]:
         await update.message.reply_text(
             f"📭 No hedge records found for {asset or 'all assets'} in {time_msg}."
         )
         return
 
-    # Sort by timestamp (newest first)
-    filtered_history.sort(key=lambda x: datetime.strptime(
-        x["timestamp"].split('.')[0].replace('Z', ''), "%Y-%m-%dT%H:%M:%S"
-    ), reverse=True)
-
-    # Show last 5 entries
-    recent = filtered_history[:5]
+    # Show last 5 entries (newest first)
+    recent = journal.query(asset, since, limit=5)[::-1]
     msg = f"📜 Hedge History{f' for {asset}' if asset else ''}:\n\n"
     
     for h in recent:
@@ -425,19 +418,12 @@ async def hedge_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
     # Add summary stats
-    total_size = sum(float(h.get('size', 0)) for h in filtered_history)
-    total_cost = sum(float(h.get('size', 0)) * float(h.get('price', 0)) * 0.002 for h in filtered_history)
-    time_msg = {
-        "1d": "last 24 hours",
-        "2d": "last 48 hours",
-        "7d": "last 7 days",
-        "30d": "last 30 days",
-        "all": "all time"
-    }.get(timeframe, timeframe)
-    
+    total_size = stats["size"]
+    total_cost = stats["notional"] * 0.002
+
     msg += (
         f"📊 Summary ({time_msg}):\n"
-        f"• Total Hedges: {len(filtered_history)}\n"
+        f"• Total Hedges: {stats['count']}\n"
         f"• Total Size: {total_size:.4f}\n"
         f"• Est. Total Fees: ${total_cost:.2f}"
     )
@@ -503,28 +489,43 @@ async def view_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         assets = monitor["assets"]
-        cached = load_cached_data()
-        logger.info(f"Cached data: {cached}")
+        price_store = get_price_store()
 
+        rows = []
         for asset, data in assets.items():
-            size = data["size"]
-            threshold = data["threshold"]
-            asset_data = cached.get(asset.upper(), {})
+            asset_data = price_store.latest(asset)
             price = get_max_price_from_asset_data(asset_data)
-          
-            
             logger.info(f"[{asset}] Max price: {price}")
+            rows.append((asset, data.size, data.threshold, price))
 
+        # Price every monitored asset in one vectorized call; repeat views within a tick hit the cache
+        spots = np.array([round(row[3], 2) for row in rows if row[3]], dtype=float)
+        days = 7
+        priced = [row[0] for row in rows if row[3]]
+        # ATM vols as the VaR engine and the delta hedger price them
+        volatility = get_vol_surfaces().atm_vols(priced, spots, days)
+        batch = get_greeks_cache().batch(priced, spots, atm_strike(spots), days, volatility)
+
+        # Standalone Monte Carlo VaR of each position
+        var = await asyncio.to_thread(
+            get_var_engine().portfolio_var,
+            [monitor["assets"][row[0]] for row in rows],
+            {row[0]: round(row[3], 2) for row in rows if row[3]},
+        )
+
+        i = 0
+        for j, (asset, size, threshold, price) in enumerate(rows):
             if not price:
                 await update.message.reply_text(f"⚠️ Failed to fetch live price for {asset}.")
                 continue
 
             spot = round(price, 2)
-            strike = round(price)
-            days = 7
-            volatility = 0.35
-
-            greeks = calculate_greeks(spot, strike, days, volatility)
+            greeks = {
+                name: round(float(values[i]), 4)
+                for name, values in batch.items()
+            }
+            iv = float(volatility[i])
+            i += 1
             logger.info(f"[{asset}] Greeks: {greeks}")
 
             delta_exposure = round(size * spot * greeks["delta"], 2)
@@ -537,12 +538,12 @@ async def view_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 f"• Risk Threshold: ${threshold:,.2f}\n"
                 f"• Delta Exposure: ${delta_exposure:,.2f}\n"
                 f"• Status: {status}\n\n"
-                f"🧮 *Greeks* (7-day, 35% IV):\n"
+                f"🧮 *Greeks* (7-day, {iv:.0%} IV):\n"
                 f"• Delta: {greeks['delta']}\n"
                 f"• Gamma: {greeks['gamma']}\n"
                 f"• Theta: {greeks['theta']}\n"
                 f"• Vega: {greeks['vega']}\n\n"
-                f"🔒 Simulated VaR: ${round(0.1 * delta_exposure, 2)}"
+                f"🔒 VaR (99%, 1-day): ${float(var['position_var'][j]):,.2f}"
             )
 
             await update.message.reply_text(msg, parse_mode="Markdown")
@@ -560,56 +561,60 @@ async def portfolio_metrics(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("⚠️ No active portfolio found.\nUse /monitor_risk to start tracking.")
         return
 
-    cached = load_cached_data()
-    total_exposure = 0
-    total_var = 0
-    total_gamma = 0
-    total_theta = 0
-    total_vega = 0
+    price_store = get_price_store()
     msg = "📊 Your Portfolio Risk Summary\n\n"
 
-    for asset, info in monitor["assets"].items():
-        size = info["size"]
-        threshold = info["threshold"]
-
-        asset_data = cached.get(asset, {})
-        price = get_max_price_from_asset_data(asset_data)
-
-        if not price:
-            msg += f"⚠️ {asset}: Live price unavailable.\n\n"
+    # The whole book is priced and aggregated with array expressions
+    book = PositionBook(monitor["assets"].values())
+    prices = {
+        asset: get_max_price_from_asset_data(price_store.latest(asset))
+        for asset in book.asset_names.tolist()
+    }
+    spots = np.round(book.spots(prices), 2)
+    days = 7
+    # ATM vol of each position's asset from its surface (0.35 until one is built)
+    assets = book.asset_names[book.asset_codes].tolist()
+    volatility = get_vol_surfaces().atm_vols(assets, spots, days)
+    greeks = get_greeks_cache().batch(assets, spots, atm_strike(spots), days, volatility)
+
+    # Scaled by position size
+    delta_exposures = np.round(book.delta_exposures(spots, greeks["delta"]), 2)
+    # Monte Carlo over correlated returns; cached until prices or positions change
+    var = await asyncio.to_thread(
+        get_var_engine().portfolio_var,
+        list(monitor["assets"].values()),
+        {asset: round(price, 2) for asset, price in prices.items() if price},
+    )
+    vars_ = np.round(var["position_var"], 2)
+    # Every past 1-day move in the cached return windows, replayed on today's book
+    historical = await asyncio.to_thread(
+        historical_var,
+        list(monitor["assets"].values()),
+        {asset: round(price, 2) for asset, price in prices.items() if price},
+    )
+    totals = book.totals(greeks)
+    total_gamma = totals["gamma"]
+    total_theta = totals["theta"]
+    total_vega = totals["vega"]
+    total_exposure = float(np.nansum(delta_exposures))
+
+    for i, position in enumerate(monitor["assets"].values()):
+        if np.isnan(spots[i]):
+            msg += f"⚠️ {position.asset}: Live price unavailable.\n\n"
             continue
 
-        spot = round(price, 2)
-        strike = round(price)
-        days = 7
-        volatility = 0.35
-
-        # Calculate Greeks first
-        greeks = calculate_greeks(spot, strike, days, volatility)
-        delta = greeks["delta"]
-        gamma = greeks["gamma"]
-        theta = greeks["theta"]
-        vega = greeks["vega"]
-        
-        # Add to total exposures (scaled by position size)
-        total_gamma += gamma * size
-        total_theta += theta * size
-        total_vega += vega * size
-
-        delta_exposure = round(size * spot * delta, 2)
-        var = round(0.1 * delta_exposure, 2)
-        status = "✅" if delta_exposure <= threshold else "🚨"
+        delta = round(float(greeks["delta"][i]), 4)
+        delta_exposure = float(delta_exposures[i])
+        position_var = float(vars_[i])
+        status = "✅" if delta_exposure <= position.threshold else "🚨"
 
         msg += (
-            f"{status} {asset}\n"
-            f"• Size: {size} @ ${spot}\n"
+            f"{status} {position.asset}\n"
+            f"• Size: {position.size} @ ${float(spots[i])}\n"
             f"• Delta: {delta}, Exposure: ${delta_exposure:,.2f}\n"
-            f"• Threshold: ${threshold:,.2f}, VaR: ${var:,.2f}\n\n"
+            f"• Threshold: ${position.threshold:,.2f}, VaR: ${position_var:,.2f}\n\n"
         )
 
-        total_exposure += delta_exposure
-        total_var += var
-
     # Add portfolio Greeks after the loop
     msg += (
         f"📐 Portfolio Greeks:\n"
@@ -620,8 +625,16 @@ async def portfolio_metrics(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     msg += (
         f"📦 Total Delta Exposure: ${total_exposure:,.2f}\n"
-        f"🔒 Total VaR (Simulated): ${total_var:,.2f}"
+        f"🔒 Portfolio VaR (99%, 1-day): ${var['var']:,.2f}\n"
+        f"📉 Expected Shortfall: ${var['es']:,.2f}\n"
     )
+    if historical["var"] is not None:
+        msg += (
+            f"🏛 Historical VaR (99%, 1-day): ${historical['var']:,.2f}, "
+            f"ES: ${historical['es']:,.2f} ({historical['scenarios']:,} scenarios)"
+        )
+    else:
+        msg += "🏛 Historical VaR: not enough price history yet"
 
     await update.message.reply_text(msg)
     
@@ -634,21 +647,21 @@ async def pnl_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("⚠️ You are not monitoring any assets yet. Use /monitor_risk first.")
         return
 
-    cached_data = load_cached_data()
+    price_store = get_price_store()
     response_lines = ["📊 *Real-Time P&L Report:*", ""]
 
     for asset, info in user_data["assets"].items():
-        entry_price = info["entry_price"]
-        position_size = info["size"]
-        asset_data = cached_data.get(asset.upper(), {})
+        entry_price = info.entry_price
+        position_size = info.size
+        asset_data = price_store.latest(asset)
 
         current_price = get_max_price_from_asset_data(asset_data)
         if not current_price:
             response_lines.append(f"⚠️ {asset}: Live price not available.")
             continue
 
-        pnl = (current_price - entry_price) * position_size
-        pnl_pct = ((current_price - entry_price) / entry_price) * 100
+        pnl = info.pnl(current_price)
+        pnl_pct = info.pnl_pct(current_price)
 
         response_lines.append(
             f"💠 *{asset}*\n"
@@ -666,23 +679,10 @@ def get_latest_price(asset: str, source_priority=None):
         source_priority = ["bybit", "deribit"]
 
     try:
-        if not os.path.exists(CACHE_FILE):
-            logger.warning(f"Cache file not found: {CACHE_FILE}")
-            return None
-            
-        with open(CACHE_FILE, "r") as f:
-            data = json.load(f)
-        
-        asset_data = data.get(asset.upper(), {})
-        if not asset_data:
+        prices = get_price_store().latest(asset)
+        if not prices:
             return None
             
-        # Handle both old and new formats
-        if "latest" in asset_data:
-            prices = asset_data["latest"]
-        else:
-            prices = asset_data
-            
         # Check sources in priority order
         for source in source_priority:
             price = prices.get(source)
@@ -720,7 +720,7 @@ async def monitor_risk(update: Update, context: ContextTypes.DEFAULT_TYPE):
         risk_threshold = float(threshold_str)
         asset = asset.upper()
         
-        update_cache(asset)
+        await update_cache_async(asset)
         price = get_latest_price(asset)
         if price is None:
             await update.message.reply_text(f"⚠️ Could not fetch live price for {asset}. Please try again later.")
@@ -736,13 +736,13 @@ async def monitor_risk(update: Update, context: ContextTypes.DEFAULT_TYPE):
             }
 
         # Add/Update specific asset
-        active_monitors[user_id]["assets"][asset] = {
-            "size": position_size,
-            "threshold": risk_threshold,
-            "exposure": exposure,
-            "entry_price": price,
-            "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        active_monitors[user_id]["assets"][asset] = Position(
+            asset=asset,
+            size=position_size,
+            threshold=risk_threshold,
+            entry_price=price,
+            exposure=exposure,
+        )
 
         reply = (
             f"🧠 Monitoring {asset}\n"
@@ -767,109 +767,161 @@ async def monitor_risk(update: Update, context: ContextTypes.DEFAULT_TYPE):
         ]
 
         await update.message.reply_text(reply, reply_markup=InlineKeyboardMarkup(keyboard))
-        
-        # Stop existing monitoring loop
-        if user_id in user_tasks:
-            user_tasks[user_id].cancel()
-            logger.info(f"Stopped previous monitoring for user {user_id}")
 
-        # Start monitoring loop
-        task = asyncio.create_task(risk_monitor_loop(user_id, context))
-        user_tasks[user_id] = task
-        logger.info(f"Started monitoring for user {user_id}")
+        # Breaches are picked up by the shared risk evaluator on the next price
+        update_position(user_id, asset)
+        logger.info(f"Started monitoring {asset} for user {user_id}")
 
     except ValueError:
         await update.message.reply_text("❗ Invalid input. Size and threshold must be numbers.\nExample: /monitor_risk BTC 1.5 50000")
 
 
-# Risk monitoring background task
-async def risk_monitor_loop(user_id, context):
-    logger.info(f"🔁 Starting monitoring loop for user {user_id}")
+# Breach handling, called by the shared risk evaluator
+async def handle_breach(context, user_id, asset, price):
+    data = active_monitors.get(user_id)
+    if not data or asset not in data["assets"]:
+        return
+
+    chat_id = data["chat_id"]
+    info = data["assets"][asset]
+    size = info.size
+    threshold = info.threshold
+
+    exposure = info.exposure_at(price)
+    # Update exposure in monitor
+    info.exposure = exposure
+
+    text = (
+        f"🚨 [Auto Alert] {asset} Risk Breach!\n"
+        f"📈 Price: ${price:,.2f}\n"
+        f"📉 Exposure: ${exposure:,.2f}\n"
+        f"❗ Threshold: ${threshold:,.2f}\n"
+    )
+
+    auto_config = auto_hedge_config.get(user_id, {})
+    # delta_neutral users are rebalanced by the delta hedger instead
+    notional_auto = auto_config.get("enabled", False) and auto_config.get("strategy") != "delta_neutral"
+    if notional_auto and exposure > auto_config.get("threshold", float('inf')):
+        # Auto-hedge logic
+        hedge_size = min(size, (exposure - auto_config["threshold"]) / price)
+        if hedge_size > 0:
+            # Execute hedge with notifications
+            await execute_and_notify_hedge(
+                context,
+                user_id,
+                asset,
+                hedge_size,
+                "auto"
+            )
+
+            # Notify about auto-hedge
+            send_notification(
+                context,
+                user_id,
+                f"🤖 AUTO-HEDGE TRIGGERED!\n\n"
+                f"• Asset: {asset}\n"
+                f"• Strategy: {auto_config['strategy']}\n"
+                f"• Size: {hedge_size:.4f}\n"
+                f"• Threshold: ${auto_config['threshold']:,.2f}"
+            )
+    else:
+        text += "💥 Suggested Action: Hedge Now"
+
+    notifier.send(chat_id, text)
 
+
+def update_position(user_id, asset):
+    """Persist a new or changed monitored position and (re)index it for breach checks"""
+    position = active_monitors[user_id]["assets"][asset]
+    risk_evaluator.watch(user_id, asset, position.size, position.threshold)
+    sync_delta_hedging(user_id)
     try:
-        while user_id in active_monitors:
-            try:
-                data = active_monitors.get(user_id)
-                if not data or "assets" not in data:
-                    break
-
-                chat_id = data["chat_id"]
-                for asset, info in data["assets"].items():
-                    size = info["size"]
-                    threshold = info["threshold"]
-
-                    update_cache(asset)
-                    price = get_latest_price(asset)
-                    if price is None:
-                        logger.warning(f"No price for {asset}")
-                        continue
-                      
-                    exposure = price * size
-                    # Update exposure in monitor
-                    active_monitors[user_id]["assets"][asset]["exposure"] = exposure
-
-                    if exposure > threshold:
-                        text = (
-                            f"🚨 [Auto Alert] {asset} Risk Breach!\n"
-                            f"📈 Price: ${price:,.2f}\n"
-                            f"📉 Exposure: ${exposure:,.2f}\n"
-                            f"❗ Threshold: ${threshold:,.2f}\n"
-                        )
-                        
-                        auto_config = auto_hedge_config.get(user_id, {})
-                        if auto_config.get("enabled", False) and exposure > auto_config.get("threshold", float('inf')):
-                            # Auto-hedge logic
-                            hedge_size = min(size, (exposure - auto_config["threshold"]) / price)
-                            if hedge_size > 0:
-                                # Execute hedge with notifications
-                                await execute_and_notify_hedge(
-                                    context, 
-                                    user_id, 
-                                    asset, 
-                                    hedge_size, 
-                                    "auto"
-                                )
-                                
-                                # Notify about auto-hedge
-                                await send_notification(
-                                    context,
-                                    user_id,
-                                    f"🤖 AUTO-HEDGE TRIGGERED!\n\n"
-                                    f"• Asset: {asset}\n"
-                                    f"• Strategy: {auto_config['strategy']}\n"
-                                    f"• Size: {hedge_size:.4f}\n"
-                                    f"• Threshold: ${auto_config['threshold']:,.2f}"
-                                )
-                        else:
-                            text += "💥 Suggested Action: Hedge Now"
-                            
-                        await context.bot.send_message(chat_id=chat_id, text=text)
-
-                await asyncio.sleep(30)  # Wait before next loop
-
-            except Exception as e:
-                logger.error(f"❌ Error in monitoring loop: {e}", exc_info=True)
-                await asyncio.sleep(30)
-
-    except asyncio.CancelledError:
-        logger.info(f"🛑 Monitoring cancelled for user {user_id}")
-    finally:
-        if user_id in user_tasks:
-            del user_tasks[user_id]
-        logger.info(f"⏹️ Monitoring loop ended for user {user_id}")
+        get_monitor_store().save_position(user_id, active_monitors[user_id]["chat_id"], position)
+    except Exception as e:
+        logger.error(f"Failed to persist {asset} monitor for user {user_id}: {e}", exc_info=True)
+
+
+def update_auto_hedge(user_id):
+    """Persist a user's auto-hedge settings after a change"""
+    sync_delta_hedging(user_id)
+    try:
+        get_monitor_store().save_auto_hedge(user_id, auto_hedge_config[user_id])
+    except Exception as e:
+        logger.error(f"Failed to persist auto-hedge config for user {user_id}: {e}", exc_info=True)
+
+
+def sync_delta_hedging(user_id):
+    """Delta-hedge the user's positions exactly while delta_neutral auto-hedging is enabled"""
+    config = auto_hedge_config.get(user_id, {})
+    assets = active_monitors.get(user_id, {}).get("assets", {})
+    if config.get("enabled", False) and config.get("strategy") == "delta_neutral" and assets:
+        for position in assets.values():
+            delta_hedger.watch(user_id, position, config["threshold"])
+    else:
+        delta_hedger.unwatch(user_id)
+
+
+async def rebalance_delta(context, user_id, trades):
+    """Trade the user's perp hedges back to delta neutral; called by the delta hedger"""
+    data = active_monitors.get(user_id)
+    if not data:
+        return
+
+    async def rebalance(asset, units, price):
+        side = "sell" if units > 0 else "buy"
+        result = await hedge_netter.submit(user_id, asset, abs(units), price, side, mode="delta_neutral")
+        position = data["assets"].get(asset)
+        if position is not None:
+            position.hedge += result["size"] if side == "sell" else -result["size"]
+            update_position(user_id, asset)
+        return side, result
+
+    results = await asyncio.gather(
+        *(rebalance(asset, units, price) for asset, (units, price) in trades.items()),
+        return_exceptions=True,
+    )
+
+    msg = "⚖️ Delta Rebalance\n\n"
+    for asset, outcome in zip(trades, results):
+        if isinstance(outcome, Exception):
+            logger.error(f"Delta rebalance of {asset} for user {user_id} failed: {outcome}")
+            msg += f"• {asset}: ❌ {outcome}\n"
+            continue
+        side, result = outcome
+        position = data["assets"].get(asset)
+        msg += (
+            f"• {asset}: {'Sold' if side == 'sell' else 'Bought back'} {result['size']:.4f} "
+            f"@ ${result['execution_price']:,.2f} (fees ${result['cost']:,.2f})"
+            + (f", hedge now {position.hedge:.4f} short\n" if position is not None else "\n")
+        )
+    band = auto_hedge_config.get(user_id, {}).get("threshold", 0.0)
+    msg += f"\n📐 Portfolio Delta: ${delta_hedger.portfolio_delta(user_id):,.2f} (band ±${band:,.2f})"
+    send_notification(context, user_id, msg)
+
+
+def position_exposure(asset, position):
+    """Exposure at the latest price (stored exposure if no price is available)"""
+    price = get_latest_price(asset)
+    if price is None:
+        return position.exposure
+    return position.exposure_at(price)
 
 
 async def stop_monitoring(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     
-    if user_id in user_tasks:
-        # Cancel the monitoring task
-        user_tasks[user_id].cancel()
-        del user_tasks[user_id]
-        
+    if user_id in active_monitors:
+        # Stop evaluating the user's positions
+        for asset in active_monitors[user_id]["assets"]:
+            risk_evaluator.unwatch(user_id, asset)
+
         # Remove from active monitors
-        if user_id in active_monitors:
-            del active_monitors[user_id]
+        del active_monitors[user_id]
+        sync_delta_hedging(user_id)
+        try:
+            get_monitor_store().delete_monitor(user_id)
+        except Exception as e:
+            logger.error(f"Failed to delete monitor for user {user_id}: {e}", exc_info=True)
         
         await update.message.reply_text("🛑 Monitoring stopped.")
     else:
@@ -884,9 +936,10 @@ async def correlation_command(update: Update, context: ContextTypes.DEFAULT_TYPE
             return
 
         asset = context.args[0].upper()
-        await update.message.reply_text(f"🔍 Calculating rolling correlation for {asset}...")
 
-        latest_corr, df = compute_correlation(asset, window=24)
+        # Estimators are updated on every tick, so this is a lookup
+        tracker = get_correlation_tracker()
+        latest_corr = tracker.latest(asset, window=24)
 
         if latest_corr is None:
             await update.message.reply_text("⚠️ Not enough data or failed to calculate correlation.")
@@ -896,8 +949,15 @@ async def correlation_command(update: Update, context: ContextTypes.DEFAULT_TYPE
             f"📊 *Rolling Correlation Report*\n"
             f"Asset: `{asset}`\n"
             f"Correlation (Bybit vs Deribit): `{latest_corr:.4f}`\n"
-            f"Window: `24` data points"
+            f"Window: `24` data points\n"
         )
+        for window in tracker.windows:
+            rolling = tracker.latest(asset, window)
+            ewm = tracker.latest(asset, window, ewm=True)
+            msg += (
+                f"• {window}: rolling `{'n/a' if rolling is None else f'{rolling:.4f}'}`, "
+                f"EWM `{'n/a' if ewm is None else f'{ewm:.4f}'}`\n"
+            )
         await update.message.reply_text(msg, parse_mode="Markdown")
     except Exception as e:
         await update.message.reply_text("❌ Error calculating correlation.")
@@ -964,6 +1024,58 @@ async def stress_test_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         await update.message.reply_text("❌ Failed to run stress test.")
 
 
+async def stress_grid_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Full spot x vol x time risk ladder for one option"""
+    try:
+        args = context.args
+        if len(args) != 6 or args[5].lower() not in ("call", "put"):
+            await update.message.reply_text(
+                "Usage:\n"
+                "/stress_grid <asset> <spot> <strike> <volatility> <days_to_expiry> <call/put>"
+            )
+            return
+
+        asset = args[0].upper()
+        base_params = {
+            "spot": float(args[1]),
+            "strike": float(args[2]),
+            "volatility": float(args[3]),
+            "time_to_expiry": int(args[4]),
+            "option_type": args[5].lower(),
+            "rate": 0.0
+        }
+
+        grid = simulate_stress_grid(base_params)
+        pnl = grid["pnl"]
+        spot_shocks, vol_shocks, days_passed = grid["spot_shocks"], grid["vol_shocks"], grid["days_passed"]
+
+        # Spot ladder at unchanged vol, today
+        vol_idx = int(np.argmin(np.abs(vol_shocks)))
+        day_idx = int(np.argmin(np.abs(days_passed)))
+        worst = np.unravel_index(np.nanargmin(pnl), pnl.shape)
+        best = np.unravel_index(np.nanargmax(pnl), pnl.shape)
+
+        reply = (
+            f"🧮 Stress Grid for {asset} {base_params['option_type'].upper()} @ Strike {base_params['strike']}\n"
+            f"Cells: {pnl.size:,} ({len(spot_shocks)} spot × {len(vol_shocks)} vol × {len(days_passed)} days)\n\n"
+            f"📉 Spot ladder (vol unchanged, day 0):\n"
+        )
+        for i in range(0, len(spot_shocks), 2):
+            delta = grid["greeks"][0][i, vol_idx, day_idx]
+            reply += f"• {spot_shocks[i]:+.0%}: PnL {pnl[i, vol_idx, day_idx]:,.2f} | Δ {delta:.4f}\n"
+
+        for label, idx in (("Worst", worst), ("Best", best)):
+            s_i, v_i, d_i = idx
+            reply += (
+                f"\n{label}: PnL {pnl[idx]:,.2f} at spot {spot_shocks[s_i]:+.0%}, "
+                f"vol {vol_shocks[v_i]:+.0%}, {days_passed[d_i]:.0f}d passed"
+            )
+
+        await update.message.reply_text(reply)
+    except Exception as e:
+        logger.error(f"stress_grid_command failed: {e}", exc_info=True)
+        await update.message.reply_text("❌ Failed to run stress grid.")
+
 
 async def hedge_now(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Manually trigger hedging action with immediate feedback"""
@@ -991,7 +1103,7 @@ async def hedge_now(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Check if position exists
     warning = ""
     if user_id in active_monitors and asset in active_monitors[user_id]["assets"]:
-        current_size = active_monitors[user_id]["assets"][asset]["size"]
+        current_size = active_monitors[user_id]["assets"][asset].size
         if size > current_size:
             warning = f"⚠️ Warning: Hedging more ({size}) than current position ({current_size})\n"
     
@@ -1053,12 +1165,13 @@ async def threshold(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
         # Update threshold in active monitor
         if user_id in active_monitors and asset in active_monitors[user_id]["assets"]:
-            active_monitors[user_id]["assets"][asset]["threshold"] = new_threshold
+            active_monitors[user_id]["assets"][asset].threshold = new_threshold
+            update_position(user_id, asset)
         
         # Get current position details
         if user_id in active_monitors and asset in active_monitors[user_id]["assets"]:
-            size = active_monitors[user_id]["assets"][asset]["size"]
-            exposure = active_monitors[user_id]["assets"][asset].get("exposure", 0)
+            size = active_monitors[user_id]["assets"][asset].size
+            exposure = position_exposure(asset, active_monitors[user_id]["assets"][asset])
             
             response = (
                 f"✅ Threshold updated to ${new_threshold:,.2f} for {asset}\n\n"
@@ -1091,14 +1204,13 @@ async def greeks_auto(update: Update, context: ContextTypes.DEFAULT_TYPE):
     asset = args[0].upper()
 
     # Step 1: Fetch real-time data
-    update_cache(asset)
-    cached = load_cached_data()
-    if not cached or asset not in cached:
+    await update_cache_async(asset)
+    asset_data = get_price_store().latest(asset)
+    if not asset_data:
         await update.message.reply_text(f"⚠️ Failed to fetch live data for {asset}.")
         return
 
     # Step 2: Get max price
-    asset_data = cached.get(asset, {})
     price = get_max_price_from_asset_data(asset_data)
 
     if not price:
@@ -1107,9 +1219,9 @@ async def greeks_auto(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Step 3: Set default assumptions
     spot = round(price, 2)
-    strike = round(price)  # ATM strike
+    strike = atm_strike(price)
     days = 7
-    volatility = 0.35  # 35% implied volatility
+    volatility = get_vol_surfaces().vol(asset, days, strike, spot)  # ATM implied vol, 35% without a surface
     option_type = "call"
     risk_free_rate = 0.05  # 5% risk-free rate
 
@@ -1118,11 +1230,12 @@ async def greeks_auto(update: Update, context: ContextTypes.DEFAULT_TYPE):
               f"days={days}, vol={volatility}, rate={risk_free_rate}")
 
     # Step 4: Calculate Greeks with proper parameters
-    greeks = calculate_greeks(
-        spot_price=spot,
-        strike_price=strike,
-        time_to_expiry_days=days,
-        volatility=volatility,
+    greeks = get_greeks_cache().greeks(
+        asset,
+        spot,
+        strike,
+        days,
+        volatility,
         risk_free_rate=risk_free_rate,
         option_type=option_type
     )
@@ -1191,7 +1304,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
             
-        current_threshold = active_monitors[user_id]["assets"][asset]["threshold"]
+        current_threshold = active_monitors[user_id]["assets"][asset].threshold
         
         # Create a new keyboard with threshold adjustment options
         keyboard = [
@@ -1225,7 +1338,8 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = query.from_user.id
         
         if user_id in active_monitors and asset in active_monitors[user_id]["assets"]:
-            active_monitors[user_id]["assets"][asset]["threshold"] = new_threshold
+            active_monitors[user_id]["assets"][asset].threshold = new_threshold
+            update_position(user_id, asset)
             await query.edit_message_text(
                 f"✅ Threshold updated to ${new_threshold:,.2f}\n\n"
                 f"New value is {multiplier*100:.0f}% of previous threshold."
@@ -1250,11 +1364,9 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await query.edit_message_text("⚠️ No active monitoring found for this asset.")
             return
 
-        size = active_monitors[user_id]["assets"][asset]["size"]
-        threshold = active_monitors[user_id]["assets"][asset]["threshold"]
-        cached = load_cached_data()
-
-        asset_data = cached.get(asset, {})
+        size = active_monitors[user_id]["assets"][asset].size
+        threshold = active_monitors[user_id]["assets"][asset].threshold
+        asset_data = get_price_store().latest(asset)
         price = get_max_price_from_asset_data(asset_data)
 
         if not price:
@@ -1262,14 +1374,17 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         spot = round(price, 2)
-        strike = round(price)
+        strike = atm_strike(price)
         days = 7
-        volatility = 0.35
+        volatility = get_vol_surfaces().vol(asset, days, strike, spot)
 
-        greeks = calculate_greeks(spot, strike, days, volatility)
+        greeks = get_greeks_cache().greeks(asset, spot, strike, days, volatility)
 
         delta_exposure = round(size * spot * greeks["delta"], 2)
         status = "✅ Within Threshold" if delta_exposure <= threshold else "🚨 Breached Threshold"
+        var = await asyncio.to_thread(
+            get_var_engine().portfolio_var, [active_monitors[user_id]["assets"][asset]], {asset: spot}
+        )
 
         # Start building the message
         msg = (
@@ -1277,23 +1392,89 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"• Spot Price: ${spot}\n"
             f"• Position Size: {size}\n"
             f"• Threshold: ${threshold:,.2f}\n\n"
-            f"🧮 Greeks (7-day, 35% IV):\n"
+            f"🧮 Greeks (7-day, {volatility:.0%} IV):\n"
             f"• Delta: {greeks['delta']}\n"
             f"• Gamma: {greeks['gamma']}\n"
             f"• Theta: {greeks['theta']}\n"
             f"• Vega: {greeks['vega']}\n\n"
             f"📉 Delta Exposure: ${delta_exposure:,.2f}\n"
             f"• Status: {status}\n\n"
-            f"🔒 VaR (Simulated): ${round(0.1 * delta_exposure, 2)}\n"
+            f"🔒 VaR (99%, 1-day): ${var['var']:,.2f}\n"
         )
 
         await query.edit_message_text(msg)
 
 
+async def on_startup(application):
+    """Start the price store's and risk evaluator's background work"""
+    global snapshot_task, risk_evaluator, notifier, hedge_netter, delta_hedger, vol_surface_task
+    snapshot_task = asyncio.create_task(get_price_store().run_flusher())
+    surfaces = get_vol_surfaces()
+    surfaces.fixture = VOL_SURFACE_FIXTURE
+    vol_surface_task = asyncio.create_task(surfaces.run(("BTC", "ETH")))
+    notifier = NotificationDispatcher(application.bot)
+    hedge_netter = HedgeNetter(execute_hedge)
+    delta_hedger = DeltaHedger(market_poller, functools.partial(rebalance_delta, application))
+    # One evaluator for all monitored positions; the application stands in for the handler context
+    risk_evaluator = RiskEvaluator(market_poller, functools.partial(handle_breach, application))
+    # Restore monitors and auto-hedge settings from before the restart and resume monitoring
+    monitors, auto_hedge = get_monitor_store().load()
+    active_monitors.update(monitors)
+    auto_hedge_config.update(auto_hedge)
+    for user_id, monitor in monitors.items():
+        for asset, position in monitor["assets"].items():
+            risk_evaluator.watch(user_id, asset, position.size, position.threshold)
+        sync_delta_hedging(user_id)
+    # Seed the online correlation estimators and subscribe them to new ticks
+    get_correlation_tracker()
+    # Same for the historical VaR return windows
+    get_return_cache()
+    # Memoized greeks are dropped as new prices are recorded
+    get_greeks_cache()
+    if PRICE_STREAMING:
+        store = get_price_store()
+        market_poller.add_stream(BybitStream(store))
+        market_poller.add_stream(DeribitStream(store))
+    # Compile the numba array greeks kernel off the event loop
+    threading.Thread(target=prewarm_greeks, name="prewarm", daemon=True).start()
+
+
+async def on_shutdown(application):
+    """Stop background tasks, persist prices and release pooled HTTP connections"""
+    if risk_evaluator is not None:
+        risk_evaluator.stop()
+    if delta_hedger is not None:
+        delta_hedger.stop()
+    if hedge_netter is not None:
+        # Hedges still inside their netting window go out now
+        await hedge_netter.close()
+    if notifier is not None:
+        # Give queued alerts a moment to go out
+        await notifier.drain()
+        notifier.stop()
+    market_poller.stop()
+    if snapshot_task is not None:
+        snapshot_task.cancel()
+    if vol_surface_task is not None:
+        vol_surface_task.cancel()
+    get_price_store().flush()
+    get_monitor_store().close()
+    get_var_engine().close()
+    greeks_cache = get_greeks_cache()
+    logger.info(f"Greeks cache: {greeks_cache.hit_rate:.0%} hit rate, {greeks_cache.stats}")
+    await close_session()
+
+
 # Main bot setup
 def main():
     # Create application
-    application = ApplicationBuilder().token(BOT_TOKEN).build()
+    application = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     # Add command handlers
     application.add_handler(CommandHandler("start", start))
@@ -1311,6 +1492,7 @@ def main():
     application.add_handler(CommandHandler("hedge_history", hedge_history))
     application.add_handler(CommandHandler("correlation", correlation_command))
     application.add_handler(CommandHandler("stress_test", stress_test_command))
+    application.add_handler(CommandHandler("stress_grid", stress_grid_command))
     application.add_handler(CommandHandler("pnl_report", pnl_report))
 
     # Start bot
@@ -0,0 +1,499 @@
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from data_fetcher import get_price_store, get_tick_log
+from greeks import atm_strike, calculate_greeks_batch
+from vol_surface import get_vol_surfaces
+
+# Positions are priced as in /portfolio_metrics: calls struck at the money
+# (greeks.atm_strike) with the same expiry, at their asset's ATM implied vol
+# from the vol surface
+OPTION_DAYS = 7
+OPTION_VOL = 0.35  # vol surfaces' fallback, and the return model's for assets without history
+
+VAR_PATHS = 100_000
+CHUNK_PATHS = 25_000  # paths simulated per NumPy batch (and per pool task)
+CONFIDENCE = 0.99
+HORIZON_DAYS = 1.0
+LOOKBACK = 5_000  # ticks of history the return model is fitted on
+MIN_RETURNS = 30  # fewer aligned returns and an asset falls back to OPTION_VOL
+CACHE_SIZE = 256
+METHODS = ("full", "delta_gamma")
+
+# Historical simulation
+RETURN_STEP = 60  # seconds per bucket of the return grid
+RETURN_CAPACITY = 100_000  # returns kept per asset and window (~70 days of 1-minute buckets)
+HISTORICAL_WINDOWS = (86_400,)  # return horizons cached, in seconds
+
+_engine = None
+_returns = None
+
+
+class VaREngine:
+    """
+    Monte Carlo VaR and expected shortfall for a book of monitored positions.
+
+    Asset log returns over the horizon are drawn from a zero-mean normal
+    with the covariance of the cached tick history, sampled on a common
+    time grid so BTC and ETH moves stay correlated (Cholesky factor of the
+    covariance times independent normals). Each path reprices every
+    position, either by full Black-Scholes revaluation or from its delta
+    and gamma, less any perp hedge held against it. Paths are simulated in
+    fixed-size batches, optionally on a process pool; every batch has its
+    own seed, so the result does not depend on how batches are spread.
+
+    Results are cached per (portfolio, prices), so asking again before the
+    next tick costs a dictionary lookup.
+    """
+
+    def __init__(self, paths: int = VAR_PATHS, chunk: int = CHUNK_PATHS, confidence: float = CONFIDENCE,
+                 horizon_days: float = HORIZON_DAYS, method: str = "full", processes: int = 1,
+                 lookback: int = LOOKBACK, seed: int = 0, cache_size: int = CACHE_SIZE):
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+        self.paths = paths
+        self.chunk = chunk
+        self.confidence = confidence
+        self.horizon_days = horizon_days
+        self.method = method
+        self.processes = processes
+        self.lookback = lookback
+        self.seed = seed
+        self.cache_size = cache_size
+        self.stats = {"hits": 0, "misses": 0}
+        self._results = OrderedDict()  # (portfolio, prices) -> result
+        self._models = {}  # assets -> (history key, covariance)
+        self._pool = None
+        self._lock = threading.Lock()  # the bot runs simulations off the event loop
+
+    def portfolio_var(self, positions, spots: dict) -> dict:
+        """
+        VaR and ES of positions at the given spot prices.
+
+        Args:
+            positions: Position objects (asset, size, hedge).
+            spots (dict): asset -> current price; positions without a price
+                are left out.
+
+        Returns:
+            dict: var and es (positive USD losses at the engine's confidence
+                over its horizon), position_var (standalone VaR per position,
+                NaN where unpriced), paths, confidence, horizon_days, method
+        """
+        positions = list(positions)
+        spot = np.array([spots.get(p.asset) or np.nan for p in positions], dtype=float)
+        vol = get_vol_surfaces().atm_vols([p.asset for p in positions], spot, OPTION_DAYS)
+        key = (
+            tuple((p.asset, p.size, p.hedge) for p in positions),
+            tuple(spot.tolist()),
+            tuple(vol.tolist()),
+        )
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached
+            self.stats["misses"] += 1
+
+        priced = np.flatnonzero(~np.isnan(spot))
+        assets = sorted({positions[i].asset for i in priced.tolist()})
+        result = {
+            "var": 0.0,
+            "es": 0.0,
+            "position_var": np.full(len(positions), np.nan),
+            "paths": self.paths,
+            "confidence": self.confidence,
+            "horizon_days": self.horizon_days,
+            "method": self.method,
+        }
+        if len(priced):
+            book = {
+                "factor": np.linalg.cholesky(self.covariance(assets)),
+                "column": np.array([assets.index(positions[i].asset) for i in priced.tolist()]),
+                "spot": spot[priced],
+                "vol": vol[priced],
+                "size": np.array([positions[i].size for i in priced.tolist()], dtype=float),
+                "hedge": np.array([positions[i].hedge for i in priced.tolist()], dtype=float),
+                "horizon_days": self.horizon_days,
+                "method": self.method,
+            }
+            pnl = self._simulate(book)
+            total = pnl.sum(axis=1)
+            result["var"], result["es"] = var_es(total, self.confidence)
+            result["position_var"][priced] = var_es(pnl, self.confidence)[0]
+
+        with self._lock:
+            self._results[key] = result
+            if len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return result
+
+    def covariance(self, assets: list) -> np.ndarray:
+        """Covariance of the assets' log returns over the horizon, refitted when history grows"""
+        histories = [self._history(asset) for asset in assets]
+        history_key = tuple((len(ts), float(ts[-1]) if len(ts) else 0.0) for ts, _ in histories)
+        model = self._models.get(tuple(assets))
+        if model is not None and model[0] == history_key:
+            return model[1]
+
+        horizon = self.horizon_days * 86_400
+        fallback = OPTION_VOL**2 * self.horizon_days / 365
+        cov = np.diag(np.full(len(assets), fallback))
+
+        # Assets with too little history keep the fallback vol and no correlation
+        valid = np.array([np.count_nonzero(~np.isnan(prices)) > MIN_RETURNS for _, prices in histories])
+        returns, step = aligned_returns([history for history, ok in zip(histories, valid) if ok])
+        if returns is not None:
+            cov[np.ix_(valid, valid)] = np.atleast_2d(np.cov(returns, rowvar=False)) * (horizon / step)
+
+        # Tiny jitter keeps the Cholesky factorization defined for perfectly
+        # correlated (or constant) series
+        cov += np.eye(len(assets)) * 1e-12
+        self._models[tuple(assets)] = (history_key, cov)
+        return cov
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _history(self, asset: str) -> tuple:
+        return load_history(asset, self.lookback)
+
+    def _simulate(self, book: dict) -> np.ndarray:
+        """P&L per path (rows) and position (columns)"""
+        counts = [min(self.chunk, self.paths - start) for start in range(0, self.paths, self.chunk)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(counts))
+        jobs = [(book, count, seed) for count, seed in zip(counts, seeds)]
+
+        if self.processes == 1 or len(jobs) == 1:
+            return np.concatenate([simulate_chunk(job) for job in jobs])
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.processes)
+        return np.concatenate(list(self._pool.map(simulate_chunk, jobs)))
+
+
+class _Ring:
+    """Fixed-capacity float buffer, written twice like PriceRing so view() never copies"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.full(2 * capacity, np.nan)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def extend(self, values: np.ndarray):
+        values = values[-self.capacity:]
+        slots = (self._head + np.arange(len(values))) % self.capacity
+        self._data[slots] = values
+        self._data[slots + self.capacity] = values
+        self._head = (self._head + len(values)) % self.capacity
+        self._count = min(self._count + len(values), self.capacity)
+
+    def view(self) -> np.ndarray:
+        end = self._head + self.capacity
+        view = self._data[end - self._count:end]
+        view.flags.writeable = False
+        return view
+
+
+class _ReturnSeries:
+    """One asset's closing log prices on the bucket grid and its rolling window returns"""
+
+    def __init__(self, lags: dict, capacity: int):
+        self.lags = lags  # window -> buckets
+        self.log_prices = _Ring(max(lags.values()) + 1)  # just enough to difference against
+        self.returns = {window: _Ring(capacity) for window in lags}
+        self.last = None  # bucket of the newest committed close (and newest return)
+        self.bucket = None  # bucket still open
+        self.close = math.nan  # latest price in the open bucket
+
+    def commit(self, log_prices: np.ndarray):
+        """Append the closes of consecutive buckets and the window returns ending at them"""
+        for window, lag in self.lags.items():
+            previous = self.log_prices.view()[-lag:]
+            known = np.concatenate([previous, log_prices])
+            first = max(len(previous), lag)
+            if first < len(known):
+                self.returns[window].extend(known[first:] - known[first - lag:len(known) - lag])
+        self.log_prices.extend(log_prices)
+
+
+class ReturnSeriesCache:
+    """
+    Rolling log returns per asset and window on a shared time grid.
+
+    Ticks are bucketed into step-second buckets; a bucket's last price is
+    its close, and a bucket without ticks carries the previous close, so
+    row i of every asset's series covers the same interval. A gap longer
+    than the longest window (the bot was down) restarts the series rather
+    than filling it with flat returns. For each
+    window the cache keeps overlapping returns log(close[t]) -
+    log(close[t - window]), appended as each bucket closes: a tick costs a
+    few array writes whatever the history length. Assets are seeded from
+    a loader(asset) -> (epoch seconds, prices) the first time they are
+    seen.
+    """
+
+    def __init__(self, windows=HISTORICAL_WINDOWS, step: float = RETURN_STEP,
+                 capacity: int = RETURN_CAPACITY, loader=None):
+        self.windows = tuple(windows)
+        self.step = step
+        self.capacity = capacity
+        self.loader = loader
+        self._lags = {window: max(1, round(window / step)) for window in self.windows}
+        self._series = {}  # asset -> _ReturnSeries
+        self._scenarios = {}  # (assets, window) -> (newest buckets, scenario matrix)
+        # Ticks update the series on the event loop while historical_var reads them in a thread
+        self._lock = threading.Lock()
+
+    def seed(self, asset: str, ts: np.ndarray, prices: np.ndarray):
+        """Replace asset's series with one built from its tick history (oldest first)"""
+        asset = asset.upper()
+        series = self._series[asset] = _ReturnSeries(self._lags, self.capacity)
+        known = ~np.isnan(prices)
+        ts, prices = np.asarray(ts, dtype=float)[known], np.asarray(prices, dtype=float)[known]
+        if not len(ts):
+            return
+
+        buckets = (ts // self.step).astype(np.int64)
+        closes = np.flatnonzero(np.diff(buckets, append=buckets[-1] + 1))  # last tick per bucket
+        buckets, prices = buckets[closes], prices[closes]
+        outages = np.flatnonzero(np.diff(buckets) > max(self._lags.values()))
+        if len(outages):
+            buckets, prices = buckets[outages[-1] + 1:], prices[outages[-1] + 1:]
+        series.bucket, series.close = int(buckets[-1]), float(prices[-1])
+
+        # Every bucket before the open one, gaps carrying the previous close
+        start = max(int(buckets[0]), series.bucket - self.capacity)
+        grid = np.arange(start, series.bucket)
+        if len(grid):
+            filled = prices[np.searchsorted(buckets, grid, side="right") - 1]
+            series.commit(np.log(filled))
+            series.last = series.bucket - 1
+
+    def load(self, asset: str):
+        ts, prices = self.loader(asset) if self.loader else (np.empty(0), np.empty(0))
+        self.seed(asset, ts, prices)
+
+    def update(self, asset: str, ts: float, price: float):
+        asset = asset.upper()
+        series = self._series.get(asset)
+        if series is None:
+            self.load(asset)
+            series = self._series[asset]
+        if price is None or math.isnan(price):
+            return
+
+        bucket = int(ts // self.step)
+        if series.bucket is None or bucket == series.bucket:
+            series.bucket, series.close = bucket, price
+            return
+        if bucket < series.bucket:
+            return  # Out of order
+        if bucket - series.bucket > max(self._lags.values()):
+            series = self._series[asset] = _ReturnSeries(self._lags, self.capacity)
+            series.bucket, series.close = bucket, price
+            return
+
+        series.commit(np.full(bucket - series.bucket, math.log(series.close)))
+        series.last = bucket - 1
+        series.bucket, series.close = bucket, price
+
+    def on_tick(self, asset: str, ts: float, latest: dict):
+        """PriceStore listener; like the breach checks, uses the highest venue price"""
+        prices = [float(latest[source]) for source in ("bybit", "deribit") if latest.get(source)]
+        if prices:
+            with self._lock:
+                self.update(asset, ts, max(prices))
+
+    def returns(self, assets: list, window: float = HISTORICAL_WINDOWS[0]) -> np.ndarray:
+        """
+        Aligned window log returns, one column per asset, oldest row first.
+
+        Rows run up to the newest bucket every asset has closed, and back as
+        far as every asset has history.
+        """
+        series = [self._series.get(asset.upper()) for asset in assets]
+        if not series or any(s is None or s.last is None for s in series):
+            return np.empty((0, len(assets)))
+        common = min(s.last for s in series)
+        views = [(s.returns[window].view(), s.last - common) for s in series]
+        rows = max(0, min(len(view) - offset for view, offset in views))
+        out = np.empty((rows, len(assets)))
+        for column, (view, offset) in enumerate(views):
+            out[:, column] = view[len(view) - offset - rows:len(view) - offset]
+        return out
+
+    def scenarios(self, assets: list, window: float = HISTORICAL_WINDOWS[0]) -> np.ndarray:
+        """
+        Scenario matrix [R, R**2 / 2] of simple window returns R, cached
+        until one of the assets closes another bucket.
+        """
+        key = (tuple(assets), window)
+        with self._lock:
+            newest = tuple(getattr(self._series.get(asset.upper()), "last", None) for asset in assets)
+            cached = self._scenarios.get(key)
+            if cached is not None and cached[0] == newest:
+                return cached[1]
+            returns = self.returns(assets, window)
+
+        simple = np.expm1(returns)
+        matrix = np.empty((len(simple), 2 * len(assets)))
+        matrix[:, :len(assets)] = simple
+        np.multiply(simple, simple, out=matrix[:, len(assets):])
+        matrix[:, len(assets):] *= 0.5
+        self._scenarios[key] = (newest, matrix)
+        return matrix
+
+
+def historical_var(positions, spots: dict, window: float = HISTORICAL_WINDOWS[0],
+                   confidence: float = CONFIDENCE, cache: ReturnSeriesCache = None) -> dict:
+    """
+    Historical-simulation VaR and ES of positions at the given spot prices.
+
+    Every past window return of the book's assets is one scenario. Positions
+    are repriced from their delta and gamma (the same ATM calls as the
+    Monte Carlo engine, less perp hedges), so the book's P&L in every
+    scenario is one product of the scenario matrix with per-asset USD
+    delta and gamma, and the tail is a partial sort.
+
+    Returns:
+        dict: var and es (positive USD losses, None with fewer than
+            MIN_RETURNS scenarios), scenarios, window, confidence
+    """
+    cache = cache or get_return_cache()
+    positions = [p for p in positions if spots.get(p.asset)]
+    result = {"var": None, "es": None, "scenarios": 0, "window": window, "confidence": confidence}
+    if not positions:
+        return result
+
+    assets = sorted({p.asset for p in positions})
+    scenarios = cache.scenarios(assets, window)
+    result["scenarios"] = len(scenarios)
+    if len(scenarios) < MIN_RETURNS:
+        return result
+
+    column = np.array([assets.index(p.asset) for p in positions])
+    spot = np.array([spots[p.asset] for p in positions], dtype=float)
+    size = np.array([p.size for p in positions], dtype=float)
+    hedge = np.array([p.hedge for p in positions], dtype=float)
+    vol = get_vol_surfaces().atm_vols([p.asset for p in positions], spot, OPTION_DAYS)
+    greeks = calculate_greeks_batch(spot, atm_strike(spot), OPTION_DAYS, vol)
+
+    # USD P&L per unit simple return (delta) and per unit of R**2 / 2 (gamma)
+    coefficients = np.zeros(2 * len(assets))
+    np.add.at(coefficients, column, (size * np.nan_to_num(greeks["delta"]) - hedge) * spot)
+    np.add.at(coefficients, column + len(assets), size * np.nan_to_num(greeks["gamma"]) * spot * spot)
+
+    result["var"], result["es"] = var_es(scenarios @ coefficients, confidence)
+    return result
+
+
+def load_history(asset: str, lookback: int = None) -> tuple:
+    """(epoch seconds, price) of asset's ticks, oldest first; the price is the highest venue price"""
+    ticks = get_tick_log().read(asset)
+    scale = 1e-9
+    if len(ticks) == 0:
+        ticks = get_price_store().history(asset)
+        scale = 1.0
+    if lookback is not None:
+        ticks = ticks[-lookback:]
+    venues = np.column_stack([ticks["bybit"], ticks["deribit"]])
+    priced = ~np.isnan(venues).all(axis=1)
+    prices = np.full(len(ticks), np.nan)
+    prices[priced] = np.nanmax(venues[priced], axis=1)
+    return np.asarray(ticks["timestamp"], dtype=float) * scale, prices
+
+
+def aligned_returns(histories: list) -> tuple:
+    """
+    Log returns of several assets on one time grid.
+
+    Each asset's last known price is sampled at a regular grid spanning the
+    period every asset has history for, with the step the median tick
+    interval, so returns of different assets line up in time.
+
+    Returns:
+        tuple: (array of shape (steps, assets), step in seconds), or
+            (None, None) if there are fewer than MIN_RETURNS returns
+    """
+    histories = [(ts[~np.isnan(prices)], prices[~np.isnan(prices)]) for ts, prices in histories]
+    if not histories or any(len(ts) < 2 for ts, _ in histories):
+        return None, None
+    start = max(ts[0] for ts, _ in histories)
+    end = min(ts[-1] for ts, _ in histories)
+    step = float(np.median(np.concatenate([np.diff(ts) for ts, _ in histories])))
+    if step <= 0 or end - start < step * MIN_RETURNS:
+        return None, None
+
+    grid = np.arange(start, end + step / 2, step)
+    sampled = np.column_stack([
+        prices[np.searchsorted(ts, grid, side="right") - 1] for ts, prices in histories
+    ])
+    returns = np.diff(np.log(sampled), axis=0)
+    return returns, step
+
+
+def simulate_chunk(job) -> np.ndarray:
+    """P&L of one batch of paths; a module-level function so pool workers can run it"""
+    book, count, seed = job
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((count, book["factor"].shape[0])) @ book["factor"].T
+    spot = book["spot"]
+    moved = spot * np.exp(shocks[:, book["column"]])  # paths x positions
+    strike = atm_strike(spot)
+    vol = book["vol"]
+
+    if book["method"] == "full":
+        now = calculate_greeks_batch(spot, strike, OPTION_DAYS, vol)["price"]
+        later = calculate_greeks_batch(moved, strike, OPTION_DAYS - book["horizon_days"], vol)["price"]
+        option_pnl = later - now
+    else:
+        greeks = calculate_greeks_batch(spot, strike, OPTION_DAYS, vol)
+        move = moved - spot
+        option_pnl = greeks["delta"] * move + 0.5 * greeks["gamma"] * move * move
+
+    return book["size"] * option_pnl - book["hedge"] * (moved - spot)
+
+
+def var_es(pnl: np.ndarray, confidence: float = CONFIDENCE) -> tuple:
+    """
+    (VaR, expected shortfall) as positive losses from scenario P&L.
+
+    A 2-D pnl holds one portfolio per column and gives arrays of both.
+    """
+    tail = max(1, int(math.ceil(len(pnl) * (1 - confidence))))
+    worst = np.partition(pnl, tail - 1, axis=0)[:tail]
+    var = np.maximum(-worst.max(axis=0), 0.0)
+    es = np.maximum(-worst.mean(axis=0), 0.0)
+    if pnl.ndim == 1:
+        return float(var), float(es)
+    return var, es
+
+
+def get_var_engine() -> VaREngine:
+    global _engine
+    if _engine is None:
+        _engine = VaREngine()
+    return _engine
+
+
+def get_return_cache() -> ReturnSeriesCache:
+    """Process-wide return cache, seeded from the tick history and fed every recorded tick"""
+    global _returns
+    if _returns is None:
+        store = get_price_store()
+        _returns = ReturnSeriesCache(loader=load_history)
+        for asset in store.assets:
+            _returns.load(asset)
+        store.add_listener(_returns.on_tick)
+    return _returns
@@ -0,0 +1,341 @@
+import asyncio
+import json
+import logging
+import math
+import time
+
+import numpy as np
+
+from greeks import atm_strike, calculate_greeks_batch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VOL = 0.35  # used until an asset has a surface
+MIN_VOL = 0.01
+MAX_VOL = 5.0
+NEWTON_STEPS = 40  # enough for pure bisection to narrow MIN_VOL..MAX_VOL below VOL_TOLERANCE
+VOL_TOLERANCE = 1e-8  # Newton stops once a step is smaller than this
+
+# Surface grid: whole days to expiry x log-moneyness ln(strike / forward)
+DAY_GRID = np.arange(1, 366)
+MONEYNESS_GRID = np.linspace(-1.0, 1.0, 81)
+MONEYNESS_STEP = MONEYNESS_GRID[1] - MONEYNESS_GRID[0]
+
+VOL_REFRESH_INTERVAL = 300  # seconds between Deribit option quote refreshes
+
+_surfaces = None
+
+
+def implied_vol(price, forward, strike, days, is_call=True, guess=None) -> np.ndarray:
+    """
+    Black-Scholes implied vols for many options in one pass.
+
+    Options are priced on the forward with no discounting, as Deribit marks
+    are. Newton steps run on every unconverged option at once, one
+    calculate_greeks_batch call per step, falling back to bisection where a
+    step would leave the bracket found so far (no vega far in the wings).
+    Options still unsettled after NEWTON_STEPS go to scipy's brentq one at
+    a time. Prices outside the no-arbitrage bounds come back as NaN.
+
+    guess, where finite, replaces the Manaster-Koehler starting vol; a
+    vol solved for a nearby price converges in a step or two.
+
+    Returns:
+        np.ndarray: annualized vols, broadcast over the inputs
+    """
+    price, forward, strike, days, call = (
+        np.array(values, dtype=dtype)
+        for values, dtype in zip(np.broadcast_arrays(price, forward, strike, days, is_call),
+                                 (float, float, float, float, bool))
+    )
+    T = days / 365.0
+    intrinsic = np.where(call, np.maximum(forward - strike, 0.0), np.maximum(strike - forward, 0.0))
+    upper = np.where(call, forward, strike)
+    with np.errstate(invalid="ignore"):
+        valid = (price > intrinsic) & (price < upper) & (T > 0) & (forward > 0) & (strike > 0)
+
+    # Manaster-Koehler start: Newton from here converges without overshooting
+    sigma = np.full(price.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        start = np.sqrt(2 * np.abs(np.log(forward / strike)) / T)
+        sigma[valid] = np.clip(start[valid], 0.1, 2.0)
+    if guess is not None:
+        guess = np.broadcast_to(np.asarray(guess, dtype=float), price.shape)
+        seeded = valid & (guess > MIN_VOL) & (guess < MAX_VOL)
+        sigma[seeded] = guess[seeded]
+    # Price rises with vol, so every evaluation also narrows a bracket
+    lo = np.full(price.shape, MIN_VOL)
+    hi = np.full(price.shape, MAX_VOL)
+
+    active = np.flatnonzero(valid)
+    for _ in range(NEWTON_STEPS):
+        if not len(active):
+            break
+        current = sigma.flat[active]
+        greeks = calculate_greeks_batch(
+            forward.flat[active], strike.flat[active], days.flat[active], current, 0.0, call.flat[active]
+        )
+        error = greeks["price"] - price.flat[active]
+        # Matched to float precision (in the far wings no vol does better)
+        matched = np.abs(error) <= 1e-12 * forward.flat[active]
+        above = error > 0
+        hi.flat[active] = np.where(above, current, hi.flat[active])
+        lo.flat[active] = np.where(above, lo.flat[active], current)
+
+        # Newton step, or bisection where it would leave the bracket (e.g. no vega)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            updated = current - error / (greeks["vega"] * 100)
+        bisect = ~np.isfinite(updated) | (updated <= lo.flat[active]) | (updated >= hi.flat[active])
+        updated[bisect] = 0.5 * (lo.flat[active][bisect] + hi.flat[active][bisect])
+        updated[matched] = current[matched]
+        sigma.flat[active] = updated
+        unsettled = (np.abs(updated - current) >= VOL_TOLERANCE) & (hi.flat[active] - lo.flat[active] >= VOL_TOLERANCE)
+        active = active[unsettled & ~matched]
+    # Pinned to either end of the range: no root inside it
+    sigma[(sigma - MIN_VOL < VOL_TOLERANCE) | (MAX_VOL - sigma < VOL_TOLERANCE)] = np.nan
+
+    if len(active):
+        from scipy.optimize import brentq
+        for i in active.tolist():
+            def mispricing(vol):
+                value = calculate_greeks_batch(forward.flat[i], strike.flat[i], days.flat[i], vol, 0.0, call.flat[i])
+                return float(value["price"]) - price.flat[i]
+            try:
+                sigma.flat[i] = brentq(mispricing, MIN_VOL, MAX_VOL, xtol=VOL_TOLERANCE)
+            except ValueError:  # No root in range
+                sigma.flat[i] = np.nan
+    return sigma
+
+
+class VolSurface:
+    """
+    One asset's implied vols on a regular grid of days to expiry x
+    log-moneyness, so a lookup is index arithmetic on one array.
+
+    Each expiry's smile is interpolated in log-moneyness from its
+    out-of-the-money quotes; between expiries total variance is
+    interpolated linearly in time, and vols are held flat beyond the first
+    and last expiry and the outermost strikes. update() only re-solves
+    quotes whose mark or forward moved, starting Newton from their previous
+    vol, and only rebuilds the smiles of their expiries.
+    """
+
+    def __init__(self):
+        self.grid = None  # (DAY_GRID, MONEYNESS_GRID) vols
+        self.updated = None  # epoch seconds of the last update
+        self.solved = 0  # implied vols solved by the last update
+        self._quotes = {}  # instrument -> (expiry, strike, is_call, price, forward, vol)
+        self._smiles = {}  # expiry -> vols on MONEYNESS_GRID
+
+    def update(self, quotes: dict, now: float = None):
+        """Apply a full snapshot of quotes (as from parse_deribit_options)"""
+        now = time.time() if now is None else now
+        names = quotes["instrument"]
+        listed = set(names)
+        # Previous price, forward and vol per instrument; NaN for new ones
+        previous = np.array(
+            [self._quotes.get(name, (None,) * 3 + (math.nan,) * 3)[3:] for name in names], dtype=float
+        ).reshape(len(names), 3)
+        # The forward moves with the underlying, so most quotes change on every poll;
+        # their previous vols are close and make each re-solve a step or two of Newton
+        changed = np.flatnonzero(
+            (quotes["price"] != previous[:, 0]) | (quotes["forward"] != previous[:, 1])
+        ).tolist()
+        stale_expiries = {quote[0] for name, quote in self._quotes.items() if name not in listed}
+        self._quotes = {name: self._quotes[name] for name in names if name in self._quotes}
+
+        if changed:
+            rows = np.array(changed)
+            vols = implied_vol(
+                quotes["price"][rows], quotes["forward"][rows], quotes["strike"][rows],
+                (quotes["expiry"][rows] - now) / 86_400, quotes["is_call"][rows], guess=previous[rows, 2],
+            )
+            for i, vol in zip(changed, vols.tolist()):
+                self._quotes[names[i]] = (
+                    float(quotes["expiry"][i]), float(quotes["strike"][i]), bool(quotes["is_call"][i]),
+                    quotes["price"][i], quotes["forward"][i], vol,
+                )
+            stale_expiries.update(quotes["expiry"][rows].tolist())
+        self.solved = len(changed)
+
+        for expiry in stale_expiries:
+            self._rebuild_smile(expiry)
+        self._rebuild_grid(now)
+        self.updated = now
+
+    def vol(self, days: float, strike: float, spot: float) -> float:
+        """Interpolated vol at (days to expiry, strike) with the underlying at spot"""
+        return _grid_vol(self.grid, days, strike, spot)
+
+    def vols(self, days, strike, spot) -> np.ndarray:
+        """vol() for arrays of options"""
+        return _grid_vols(self.grid, days, strike, spot)
+
+    def _rebuild_smile(self, expiry: float):
+        # Out-of-the-money quotes: puts below the forward, calls above it
+        points = [
+            (math.log(strike / forward), vol)
+            for quote_expiry, strike, is_call, _, forward, vol in self._quotes.values()
+            if quote_expiry == expiry and not math.isnan(vol) and is_call == (strike >= forward)
+        ]
+        if not points:
+            self._smiles.pop(expiry, None)
+            return
+        points.sort()
+        x, vols = np.array(points).T
+        self._smiles[expiry] = np.interp(MONEYNESS_GRID, x, vols)
+
+    def _rebuild_grid(self, now: float):
+        # Built aside and swapped in with one assignment: readers on other threads
+        # see the old grid or the new one, never a partial one
+        self.grid = _build_grid(self._smiles, now)
+
+
+def _build_grid(smiles_by_expiry: dict, now: float):
+    """Vols on (DAY_GRID, MONEYNESS_GRID) from the smiles of live expiries; None without any"""
+    expiries = sorted(expiry for expiry in smiles_by_expiry if expiry > now)
+    if not expiries:
+        return None
+    t = (np.array(expiries) - now) / (365 * 86_400)
+    smiles = np.array([smiles_by_expiry[expiry] for expiry in expiries])
+    T = DAY_GRID / 365
+
+    if len(t) == 1:
+        return np.repeat(smiles, len(T), axis=0)
+    variance = smiles**2 * t[:, None]
+    j = np.clip(np.searchsorted(t, T), 1, len(t) - 1)
+    w = np.clip((T - t[j - 1]) / (t[j] - t[j - 1]), 0.0, 1.0)[:, None]
+    grid = np.sqrt(((1 - w) * variance[j - 1] + w * variance[j]) / T[:, None])
+    grid[T <= t[0]] = smiles[0]
+    grid[T >= t[-1]] = smiles[-1]
+    return grid
+
+
+def _grid_vol(grid: np.ndarray, days: float, strike: float, spot: float) -> float:
+    row = grid[min(max(int(round(days)) - 1, 0), len(DAY_GRID) - 1)]
+    x = (math.log(strike / spot) - MONEYNESS_GRID[0]) / MONEYNESS_STEP
+    x = min(max(x, 0.0), len(MONEYNESS_GRID) - 1.0)
+    j = min(int(x), len(MONEYNESS_GRID) - 2)
+    frac = x - j
+    return float(row[j] * (1 - frac) + row[j + 1] * frac)
+
+
+def _grid_vols(grid: np.ndarray, days, strike, spot) -> np.ndarray:
+    days, strike, spot = np.broadcast_arrays(
+        np.asarray(days, dtype=float), np.asarray(strike, dtype=float), np.asarray(spot, dtype=float)
+    )
+    rows = np.clip(np.rint(days).astype(np.intp) - 1, 0, len(DAY_GRID) - 1)
+    x = np.clip((np.log(strike / spot) - MONEYNESS_GRID[0]) / MONEYNESS_STEP, 0.0, len(MONEYNESS_GRID) - 1.0)
+    j = np.minimum(x.astype(np.intp), len(MONEYNESS_GRID) - 2)
+    frac = x - j
+    return grid[rows, j] * (1 - frac) + grid[rows, j + 1] * frac
+
+
+class VolSurfaceCache:
+    """
+    Vol surfaces per asset, refreshed from Deribit option quotes.
+
+    Quotes come from fetch(asset) (Deribit's book summaries by default) or,
+    when fixture is set, from a JSON file in the same format; "{asset}" in
+    the fixture path is replaced by the asset. Lookups fall back to
+    default_vol for assets without a surface.
+    """
+
+    def __init__(self, fetch=None, fixture: str = None, default_vol: float = DEFAULT_VOL):
+        self.fetch = fetch
+        self.fixture = fixture
+        self.default_vol = default_vol
+        self._surfaces = {}  # asset -> VolSurface
+
+    def surface(self, asset: str) -> VolSurface:
+        surface = self._surfaces.get(asset.upper())
+        return surface if surface is not None and surface.grid is not None else None
+
+    def _grid(self, asset: str):
+        """asset's current grid, read once so a refresh swapping it mid-lookup can't be seen"""
+        surface = self._surfaces.get(asset.upper())
+        return None if surface is None else surface.grid
+
+    def vol(self, asset: str, days: float, strike: float, spot: float) -> float:
+        grid = self._grid(asset)
+        if grid is None or not (strike > 0 and spot > 0):
+            return self.default_vol
+        return _grid_vol(grid, days, strike, spot)
+
+    def vols(self, asset: str, days, strike, spot) -> np.ndarray:
+        grid = self._grid(asset)
+        if grid is None:
+            return np.full(np.broadcast(days, strike, spot).shape, self.default_vol)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return _grid_vols(grid, days, strike, spot)
+
+    def atm_vols(self, assets: list, spots, days: float) -> np.ndarray:
+        """
+        ATM vol of each position (greeks.atm_strike of its spot) from its
+        asset's surface; default_vol without a surface or a finite spot.
+        """
+        spots = np.asarray(spots, dtype=float)
+        vols = np.full(len(assets), self.default_vol)
+        names = np.array([asset.upper() for asset in assets])
+        for asset in set(names.tolist()):
+            rows = np.flatnonzero((names == asset) & np.isfinite(spots) & (spots > 0))
+            if len(rows):
+                vols[rows] = self.vols(asset, days, atm_strike(spots[rows]), spots[rows])
+        return vols
+
+    def update(self, asset: str, quotes: dict, now: float = None):
+        asset = asset.upper()
+        surface = self._surfaces.get(asset)
+        if surface is None:
+            surface = self._surfaces[asset] = VolSurface()
+        surface.update(quotes, now)
+
+    async def refresh(self, asset: str) -> bool:
+        """Fetch asset's option quotes and update its surface; False if none came back"""
+        if self.fixture:
+            path = self.fixture.format(asset=asset.upper())
+            try:
+                quotes = load_option_quotes(path)
+            except OSError as e:
+                logger.warning(f"No option quotes fixture for {asset.upper()}: {e}")
+                return False
+        else:
+            fetch = self.fetch
+            if fetch is None:
+                from data_fetcher import get_deribit_option_quotes_async as fetch
+            quotes = await fetch(asset)
+        if not quotes or not quotes["instrument"]:
+            return False
+        # Solving and rebuilding takes milliseconds of NumPy; keep it off the event loop
+        await asyncio.to_thread(self.update, asset, quotes)
+        surface = self._surfaces[asset.upper()]
+        logger.info(f"Vol surface for {asset.upper()}: {len(quotes['instrument'])} quotes, {surface.solved} re-solved")
+        return True
+
+    async def run(self, assets, interval: float = VOL_REFRESH_INTERVAL):
+        """Refresh every asset's surface each interval until cancelled"""
+        logger.info("📈 Vol surface refresher started")
+        try:
+            while True:
+                for asset in assets:
+                    try:
+                        await self.refresh(asset)
+                    except Exception as e:
+                        logger.error(f"❌ Vol surface refresh failed for {asset}: {e}", exc_info=True)
+                await asyncio.sleep(interval)
+        except asyncio.CancelledError:
+            logger.info("🛑 Vol surface refresher cancelled")
+
+
+def load_option_quotes(path: str) -> dict:
+    """Option quotes from a saved get_book_summary_by_currency response"""
+    from data_fetcher import parse_deribit_options
+    with open(path, "r") as f:
+        return parse_deribit_options(json.load(f))
+
+
+def get_vol_surfaces() -> VolSurfaceCache:
+    global _surfaces
+    if _surfaces is None:
+        _surfaces = VolSurfaceCache()
+    return _surfaces
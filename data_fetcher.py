@@ -1,13 +1,38 @@
 import requests
+import aiohttp
+import asyncio
 import json
 import os
-from datetime import datetime
+import atexit
+import time
+from datetime import datetime, timezone
+import numpy as np
 from logger import get_logger
+from price_store import PriceStore, SOURCES
+from tick_log import TickLog
 
 logger = get_logger()
 
 CACHE_PATH = "cache/live_data.json"
 
+BYBIT_API = "https://api.bybit.com"
+DERIBIT_API = "https://www.deribit.com"
+
+# Shared aiohttp session settings
+REQUEST_TIMEOUT = 10  # seconds
+CONNECTION_LIMIT_PER_HOST = 8
+KEEPALIVE_TIMEOUT = 30  # seconds
+
+# Order book snapshots used for routing hedges
+BYBIT_BOOK_DEPTH = 200  # levels per side (Bybit linear allows up to 500)
+DERIBIT_BOOK_DEPTH = 1000  # Deribit accepts 1, 5, 10, 20, 50, 100, 1000 or 10000
+ORDER_BOOK_TTL = 2.0  # seconds a cached snapshot is reused
+
+_session = None
+_price_store = None
+_tick_log = None
+_order_books = {}  # asset -> {venue: {"bids", "asks", "timestamp"}}
+
 # Create cache folder if not exists
 os.makedirs("cache", exist_ok=True)
 
@@ -21,6 +46,37 @@ def fetch_with_proxy(url, proxy=None):
         logger.error(f"Request failed: {e}")
         return None
 
+async def get_session():
+    """Return the shared keep-alive session, creating it on first use"""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit_per_host=CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+    return _session
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+async def fetch_with_proxy_async(url, proxy=None):
+    try:
+        session = await get_session()
+        async with session.get(url, proxy=proxy) as res:
+            res.raise_for_status()
+            return await res.json(content_type=None)
+    except Exception as e:
+        logger.error(f"Request failed: {e!r}")
+        return None
+
 # def get_okx_price(symbol:str, proxy=None):
 #     try:
 #         url = f"https://www.okx.com/api/v5/market/ticker?instId={symbol}"
@@ -31,27 +87,191 @@ def fetch_with_proxy(url, proxy=None):
 #         return None
 
 def get_bybit_price(symbol:str, proxy=None):
+    return get_bybit_prices([symbol], proxy).get(symbol)
+
+def get_bybit_prices(symbols, proxy=None) -> dict:
+    """
+    Fetch last prices for several Bybit linear symbols in one request.
+
+    A single symbol is requested with a server-side filter; several symbols
+    share one full ticker snapshot that is parsed once.
+
+    Returns:
+        dict: symbol -> price (None when unavailable)
+    """
+    symbols = list(symbols)
     try:
-        url = "https://api.bybit.com/v5/market/tickers?category=linear"
-        data = fetch_with_proxy(url, proxy)
-        if data:
-            for item in data["result"]["list"]:
-                if item["symbol"] == symbol:
-                    return float(item["lastPrice"])
-        return None
+        data = fetch_with_proxy(_bybit_tickers_url(symbols), proxy)
+        return _parse_bybit_prices(data, symbols)
     except Exception as e:
         logger.error(f"Bybit fetch error: {e}")
-        return None
+        return dict.fromkeys(symbols)
 
 def get_deribit_price(symbol="BTC-PERPETUAL", proxy=None):
     try:
-        url = f"https://www.deribit.com/api/v2/public/ticker?instrument_name={symbol}"
+        url = f"{DERIBIT_API}/api/v2/public/ticker?instrument_name={symbol}"
         data = fetch_with_proxy(url, proxy)
         return float(data["result"]["last_price"]) if data else None
     except Exception as e:
         logger.error(f"Deribit fetch error: {e}")
         return None
 
+async def get_bybit_price_async(symbol: str, proxy=None):
+    return (await get_bybit_prices_async([symbol], proxy)).get(symbol)
+
+async def get_bybit_prices_async(symbols, proxy=None) -> dict:
+    symbols = list(symbols)
+    try:
+        data = await fetch_with_proxy_async(_bybit_tickers_url(symbols), proxy)
+        return _parse_bybit_prices(data, symbols)
+    except Exception as e:
+        logger.error(f"Bybit fetch error: {e}")
+        return dict.fromkeys(symbols)
+
+async def get_deribit_price_async(symbol="BTC-PERPETUAL", proxy=None):
+    try:
+        url = f"{DERIBIT_API}/api/v2/public/ticker?instrument_name={symbol}"
+        data = await fetch_with_proxy_async(url, proxy)
+        return float(data["result"]["last_price"]) if data else None
+    except Exception as e:
+        logger.error(f"Deribit fetch error: {e}")
+        return None
+
+def _bybit_tickers_url(symbols: list) -> str:
+    url = f"{BYBIT_API}/v5/market/tickers?category=linear"
+    if len(symbols) == 1:
+        url += f"&symbol={symbols[0]}"
+    return url
+
+def _parse_bybit_prices(data, symbols: list) -> dict:
+    prices = dict.fromkeys(symbols)
+    if data:
+        for item in data["result"]["list"]:
+            if item["symbol"] in prices:
+                prices[item["symbol"]] = float(item["lastPrice"])
+    return prices
+
+async def get_bybit_order_book_async(symbol: str, depth: int = BYBIT_BOOK_DEPTH, proxy=None):
+    try:
+        url = f"{BYBIT_API}/v5/market/orderbook?category=linear&symbol={symbol}&limit={depth}"
+        data = await fetch_with_proxy_async(url, proxy)
+        return _parse_bybit_book(data) if data else None
+    except Exception as e:
+        logger.error(f"Bybit order book error: {e}")
+        return None
+
+async def get_deribit_order_book_async(symbol: str, depth: int = DERIBIT_BOOK_DEPTH, proxy=None):
+    try:
+        url = f"{DERIBIT_API}/api/v2/public/get_order_book?instrument_name={symbol}&depth={depth}"
+        data = await fetch_with_proxy_async(url, proxy)
+        return _parse_deribit_book(data) if data else None
+    except Exception as e:
+        logger.error(f"Deribit order book error: {e}")
+        return None
+
+def _parse_bybit_book(data) -> dict:
+    """Bybit levels are ["price", "size"] strings with size in coins"""
+    result = data["result"]
+    return {
+        "bids": np.array(result["b"], dtype=float).reshape(-1, 2),
+        "asks": np.array(result["a"], dtype=float).reshape(-1, 2),
+    }
+
+def _parse_deribit_book(data) -> dict:
+    """Deribit perpetual amounts are USD contracts; convert them to coins"""
+    result = data["result"]
+    book = {}
+    for side in ("bids", "asks"):
+        levels = np.array(result[side], dtype=float).reshape(-1, 2)
+        levels[:, 1] /= np.where(levels[:, 0] > 0, levels[:, 0], np.nan)
+        book[side] = levels
+    return book
+
+async def update_order_books_async(asset: str, proxy=None) -> dict:
+    """
+    Fetch both venues' order books for asset concurrently and cache them.
+
+    Returns:
+        dict: venue -> {"bids", "asks", "timestamp"}, each side an (n, 2)
+            array of (price, size), best level first, sizes in coins;
+            venues that failed are left out
+    """
+    asset = asset.upper()
+    bybit, deribit = await asyncio.gather(
+        get_bybit_order_book_async(f"{asset}USDT", proxy=proxy),
+        get_deribit_order_book_async(f"{asset}-PERPETUAL", proxy=proxy),
+    )
+    now = time.time()
+    books = _order_books.setdefault(asset, {})
+    for venue, book in (("bybit", bybit), ("deribit", deribit)):
+        if book is not None:
+            book["timestamp"] = now
+            books[venue] = book
+    return get_cached_order_books(asset)
+
+def get_cached_order_books(asset: str, max_age: float = ORDER_BOOK_TTL) -> dict:
+    """Cached order books for asset that are at most max_age seconds old"""
+    cutoff = time.time() - max_age
+    return {
+        venue: book
+        for venue, book in _order_books.get(asset.upper(), {}).items()
+        if book["timestamp"] >= cutoff
+    }
+
+async def get_order_books_async(asset: str, max_age: float = ORDER_BOOK_TTL, proxy=None) -> dict:
+    """Order books for asset, refreshed only when the cached ones are stale"""
+    books = get_cached_order_books(asset, max_age)
+    if len(books) < 2:
+        books = await update_order_books_async(asset, proxy)
+    return books
+
+async def get_deribit_option_quotes_async(currency: str, proxy=None) -> dict:
+    """Mark prices of every listed Deribit option on currency, as parsed by parse_deribit_options"""
+    try:
+        url = f"{DERIBIT_API}/api/v2/public/get_book_summary_by_currency?currency={currency.upper()}&kind=option"
+        data = await fetch_with_proxy_async(url, proxy)
+        return parse_deribit_options(data) if data else None
+    except Exception as e:
+        logger.error(f"Deribit option quotes error: {e}")
+        return None
+
+def parse_deribit_options(data) -> dict:
+    """
+    Deribit book summaries (get_book_summary_by_currency) as arrays.
+
+    Instruments are named ASSET-DMMMYY-STRIKE-C/P and expire at 08:00 UTC.
+    Mark prices are quoted in coins, so they are converted to USD at the
+    summary's underlying (forward) price. Summaries without a mark or
+    underlying price are skipped.
+
+    Returns:
+        dict: instrument (list of names), expiry (epoch seconds), strike,
+            is_call, price (USD), forward -> np.ndarray
+    """
+    expiries = {}
+    rows = []
+    for summary in data["result"]:
+        try:
+            _, expiry_code, strike, kind = summary["instrument_name"].split("-")
+            mark, forward = float(summary["mark_price"]), float(summary["underlying_price"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        expiry = expiries.get(expiry_code)
+        if expiry is None:
+            expiry = expiries[expiry_code] = datetime.strptime(expiry_code, "%d%b%y").replace(
+                hour=8, tzinfo=timezone.utc
+            ).timestamp()
+        rows.append((summary["instrument_name"], expiry, float(strike), kind == "C", mark * forward, forward))
+
+    return {
+        "instrument": [row[0] for row in rows],
+        "expiry": np.array([row[1] for row in rows], dtype=float),
+        "strike": np.array([row[2] for row in rows], dtype=float),
+        "is_call": np.array([row[3] for row in rows], dtype=bool),
+        "price": np.array([row[4] for row in rows], dtype=float),
+        "forward": np.array([row[5] for row in rows], dtype=float),
+    }
+
 # def get_coingecko_price(coin_id="bitcoin"):
 #     try:
 #         url = f"https://api.coingecko.com/api/v3/simple/price?ids={coin_id}&vs_currencies=usd"
@@ -61,64 +281,100 @@ def get_deribit_price(symbol="BTC-PERPETUAL", proxy=None):
 #         logger.error(f"CoinGecko fetch error: {e}")
 #         return None
 
+def get_price_store() -> PriceStore:
+    """Process-wide price store, reloaded from the snapshot on first use"""
+    global _price_store
+    if _price_store is None:
+        _price_store = PriceStore(CACHE_PATH)
+        _price_store.load()
+        atexit.register(_price_store.flush)
+    return _price_store
+
+def get_tick_log() -> TickLog:
+    """Append-only archive of every tick; the price store only keeps recent ones"""
+    global _tick_log
+    if _tick_log is None:
+        _tick_log = TickLog(os.path.join(os.path.dirname(CACHE_PATH), "ticks"))
+        atexit.register(_tick_log.close)
+    return _tick_log
+
 def load_cached_data():
-    try:
-        with open(CACHE_PATH, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"BTC": {"latest": {}, "history": []}, "ETH": {"latest": {}, "history": []}}  # Initialize structure
+    """Full cache in the legacy layout; prefer get_price_store() on hot paths"""
+    data = get_price_store().to_dict()
+    for asset in ("BTC", "ETH"):
+        data.setdefault(asset, {"latest": {}, "history": []})  # Initialize structure
+    return data
 
 def update_cache(asset: str, proxy=None):
     asset = asset.upper()
-    cached_data = load_cached_data()
     
     # Get new prices
     new_data = {
         "bybit": get_bybit_price(f"{asset}USDT", proxy),
         "deribit": get_deribit_price(f"{asset}-PERPETUAL", proxy),
-        "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
     }
+    return _store_prices(asset, new_data)
 
-    # Skip if all APIs failed
-    if all(v is None for k, v in new_data.items() if k != "timestamp"):
-        logger.warning(f"All APIs failed for {asset}. Using cached data.")
-        return cached_data
-
-    # Initialize asset structure if missing
-    if asset not in cached_data:
-        cached_data[asset] = {"latest": {}, "history": []}
-    # Convert old format to new format if needed
-    elif "latest" not in cached_data[asset]:
-        cached_data[asset] = {
-            "latest": cached_data[asset],  # Move old data to latest
-            "history": []
+async def update_cache_async(asset: str, proxy=None):
+    """Non-blocking update_cache: both venues are queried concurrently"""
+    asset = asset.upper()
+    return (await update_caches_async([asset], proxy)).get(asset)
+
+async def update_caches_async(assets, proxy=None) -> dict:
+    """
+    Refresh several assets at once: one batched Bybit request for all of
+    them, plus one Deribit request per asset, all in flight concurrently.
+
+    Returns:
+        dict: asset -> latest prices
+    """
+    assets = [asset.upper() for asset in assets]
+
+    bybit_prices, *deribit_prices = await asyncio.gather(
+        get_bybit_prices_async([f"{asset}USDT" for asset in assets], proxy),
+        *(get_deribit_price_async(f"{asset}-PERPETUAL", proxy) for asset in assets),
+    )
+
+    latest = {}
+    for asset, deribit in zip(assets, deribit_prices):
+        new_data = {
+            "bybit": bybit_prices.get(f"{asset}USDT"),
+            "deribit": deribit,
         }
+        latest[asset] = _store_prices(asset, new_data)
+    return latest
 
-    # Archive previous "latest" to history (if exists and not empty)
-    if cached_data[asset]["latest"]:  # Now safe to access
-        cached_data[asset]["history"].append(cached_data[asset]["latest"])
+def archive_latest(asset: str) -> dict:
+    """Append the current (e.g. streamed) latest quotes to history without a REST call"""
+    asset = asset.upper()
+    latest = get_price_store().latest(asset)
+    return _store_prices(asset, {source: latest.get(source) for source in SOURCES})
 
-    # Keep last 1000 historical records
-    cached_data[asset]["history"] = cached_data[asset]["history"][-1000:]
+def _store_prices(asset: str, new_data: dict) -> dict:
+    """Record a tick in the price store and return the asset's latest prices"""
+    store = get_price_store()
 
-    # Update latest data
-    cached_data[asset]["latest"] = new_data
+    # Skip if all APIs failed
+    if all(v is None for v in new_data.values()):
+        logger.warning(f"All APIs failed for {asset}. Using cached data.")
+        return store.latest(asset)
 
-    # Save to file
+    ts_ns = time.time_ns()
+    latest = store.record(asset, new_data, ts_ns / 1e9)
     try:
-        with open(CACHE_PATH, "w") as f:
-            json.dump(cached_data, f, indent=2)
-        logger.info(f"Updated {asset} data successfully")
-    except Exception as e:
-        logger.error(f"Failed to save cache: {e}")
+        get_tick_log().append(asset, ts_ns, new_data)
+    except OSError as e:
+        logger.error(f"Failed to append {asset} tick: {e}")
+    logger.info(f"Updated {asset} data successfully")
+    return latest
 
-    return cached_data
 if __name__ == "__main__":
     # Uncomment and set your proxy if needed
     # proxy = "http://your-proxy-address:port"
     proxy = None
     
     data = update_cache(asset="ETH",proxy=proxy)
+    get_price_store().flush()
     if data:
         print(json.dumps(data, indent=2))
     else:
@@ -0,0 +1,201 @@
+"""
+Deterministic local exchange for exercising the hedge execution pipeline.
+
+OrderBook is a price-time priority limit order book; SimulatedVenue wraps
+one book per asset behind the VenueAdapter interface, seeds it with
+synthetic liquidity around the order's mark price and delays every request
+by a seeded latency, so runs are reproducible and never touch a live venue.
+"""
+import asyncio
+import bisect
+import random
+import time
+from collections import deque
+
+from hedge_engine import VenueAdapter, Fill
+
+DEFAULT_LATENCY = 0.02  # seconds per request
+DEFAULT_JITTER = 0.01  # up to this much extra latency, drawn from the venue's rng
+TAKER_FEE = 0.00075
+BOOK_LEVELS = 50  # price levels per side when (re)seeding a book
+LEVEL_SPACING_BPS = 1.0  # distance between levels
+LEVEL_NOTIONAL = 50_000.0  # average USD resting per level
+RESEED_DEVIATION = 0.01  # re-center the book when the mark moves this far from its mid
+
+
+class OrderBook:
+    """Limit order book for one instrument with FIFO queues per price level"""
+
+    def __init__(self):
+        # Sorted level keys per side with the best level last: bids by price,
+        # asks by negated price
+        self._keys = {"buy": [], "sell": []}
+        self._levels = {"buy": {}, "sell": {}}  # price -> deque of [order_id, size]
+        self._orders = {}  # order_id -> (side, price)
+
+    def __len__(self):
+        return len(self._orders)
+
+    def best(self, side: str):
+        keys = self._keys[side]
+        if not keys:
+            return None
+        return keys[-1] if side == "buy" else -keys[-1]
+
+    def levels(self, side: str) -> int:
+        return len(self._keys[side])
+
+    def mid(self):
+        bid, ask = self.best("buy"), self.best("sell")
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def depth(self, side: str, levels: int = 10) -> list:
+        """[(price, total size)] for the best levels on side"""
+        out = []
+        for key in reversed(self._keys[side][-levels:]):
+            price = key if side == "buy" else -key
+            out.append((price, sum(size for _, size in self._levels[side][price])))
+        return out
+
+    def add(self, order_id, side: str, price: float, size: float):
+        """Rest a limit order at the back of its price level"""
+        level = self._levels[side].get(price)
+        if level is None:
+            level = self._levels[side][price] = deque()
+            bisect.insort(self._keys[side], price if side == "buy" else -price)
+        level.append([order_id, size])
+        self._orders[order_id] = (side, price)
+
+    def cancel(self, order_id) -> bool:
+        entry = self._orders.pop(order_id, None)
+        if entry is None:
+            return False
+        side, price = entry
+        level = self._levels[side][price]
+        for i, (resting_id, _) in enumerate(level):
+            if resting_id == order_id:
+                del level[i]
+                break
+        if not level:
+            self._remove_level(side, price)
+        return True
+
+    def match(self, side: str, size: float, limit: float = None) -> list:
+        """
+        Take liquidity for an incoming order.
+
+        Args:
+            side (str): "buy" takes asks, "sell" takes bids.
+            size (float): Quantity to fill.
+            limit (float): Worst acceptable price (None for a market order).
+
+        Returns:
+            list: (price, size, maker order id) per fill, best price first
+        """
+        book_side = "sell" if side == "buy" else "buy"
+        keys = self._keys[book_side]
+        fills = []
+
+        while size > 0 and keys:
+            price = keys[-1] if book_side == "buy" else -keys[-1]
+            if limit is not None and (price > limit if side == "buy" else price < limit):
+                break
+
+            level = self._levels[book_side][price]
+            while size > 0 and level:
+                maker = level[0]
+                traded = min(size, maker[1])
+                fills.append((price, traded, maker[0]))
+                size -= traded
+                maker[1] -= traded
+                if maker[1] <= 0:
+                    level.popleft()
+                    del self._orders[maker[0]]
+            if not level:
+                self._remove_level(book_side, price)
+
+        return fills
+
+    def _remove_level(self, side: str, price: float):
+        del self._levels[side][price]
+        keys = self._keys[side]
+        key = price if side == "buy" else -price
+        del keys[bisect.bisect_left(keys, key)]
+
+
+class SimulatedVenue(VenueAdapter):
+    """
+    In-process venue backed by OrderBook, deterministic for a given seed.
+
+    Books are seeded with BOOK_LEVELS levels of synthetic liquidity around an
+    order's mark price, and re-seeded when the mark drifts more than
+    RESEED_DEVIATION from the book mid or a side is down to half its levels.
+    """
+
+    def __init__(self, name: str, seed: int = 0, latency: float = DEFAULT_LATENCY,
+                 jitter: float = DEFAULT_JITTER, fee_rate: float = TAKER_FEE):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.fee_rate = fee_rate
+        self.books = {}  # asset -> OrderBook
+        self._rng = random.Random(seed)
+        self._maker_ids = 0
+
+    async def place_order(self, order) -> list:
+        await asyncio.sleep(self._delay())
+        book = self._book_for(order.asset, order.mark_price)
+
+        fills = []
+        for price, size, _ in book.match(order.side, order.size, order.price):
+            fills.append(Fill(
+                order_id=order.id,
+                venue=self.name,
+                asset=order.asset,
+                side=order.side,
+                price=price,
+                size=size,
+                fee=price * size * self.fee_rate,
+                ts_ns=time.time_ns(),
+            ))
+
+        remaining = order.size - sum(fill.size for fill in fills)
+        if remaining > 0 and order.price is not None and order.time_in_force == "GTC":
+            book.add(order.id, order.side, order.price, remaining)
+        return fills
+
+    async def cancel_order(self, order) -> bool:
+        await asyncio.sleep(self._delay())
+        book = self.books.get(order.asset)
+        return book is not None and book.cancel(order.id)
+
+    def seed_book(self, asset: str, mid: float):
+        """Replace asset's book with fresh synthetic liquidity around mid"""
+        book = OrderBook()
+        step = mid * LEVEL_SPACING_BPS / 10_000
+        for i in range(1, BOOK_LEVELS + 1):
+            for side, price in (("buy", mid - i * step), ("sell", mid + i * step)):
+                self._maker_ids += 1
+                size = LEVEL_NOTIONAL / mid * self._rng.uniform(0.5, 1.5)
+                book.add(f"{self.name}-mm-{self._maker_ids}", side, round(price, 8), size)
+        self.books[asset] = book
+        return book
+
+    def _book_for(self, asset: str, mark: float) -> OrderBook:
+        book = self.books.get(asset)
+        if mark is None:
+            if book is None:
+                raise ValueError(f"{self.name}: no book for {asset} and no mark price to seed one")
+            return book
+
+        mid = book.mid() if book is not None else None
+        # Market makers step back in once hedges have eaten half a side
+        thin = mid is not None and min(book.levels("buy"), book.levels("sell")) < BOOK_LEVELS // 2
+        if mid is None or thin or abs(mid / mark - 1) > RESEED_DEVIATION:
+            book = self.seed_book(asset, mark)
+        return book
+
+    def _delay(self) -> float:
+        return self.latency + self._rng.uniform(0, self.jitter)
@@ -1,24 +1,218 @@
+import asyncio
+import itertools
 import logging
+import statistics
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime
-import random
 
 logger = logging.getLogger(__name__)
 
-def execute_hedge(asset: str, size: float, price: float):
-    logger.info(f"Executing hedge for {asset}: size={size}, price={price}")
-    
-    slippage_pct = random.uniform(-0.2, 0.2)
-    execution_price = price * (1 + slippage_pct / 100)
-
-    txn_cost = execution_price * size * 0.00075
-    timestamp = datetime.utcnow().isoformat()
-
-    return {
-        "asset": asset,
-        "size": size,
-        "original_price": round(price, 2),
-        "execution_price": round(execution_price, 2),
-        "slippage_pct": round(slippage_pct, 4),
-        "cost": round(txn_cost, 2),
-        "timestamp": timestamp
-    }
+MAX_SLIPPAGE_BPS = 50  # hedges are marketable limit orders at most this far through the mark
+LATENCY_HISTORY = 10_000  # latencies kept per venue for stats
+
+_order_ids = itertools.count(1)
+_pipeline = None
+
+
+@dataclass(slots=True)
+class Order:
+    asset: str
+    side: str  # "buy" or "sell"
+    size: float
+    venue: str
+    price: float = None  # limit price; None for a market order
+    time_in_force: str = "IOC"  # "IOC" cancels any unfilled rest, "GTC" rests it on the book
+    mark_price: float = None  # reference price at submission, for slippage
+    id: int = field(default_factory=lambda: next(_order_ids))
+    created_ns: int = field(default_factory=time.time_ns)
+
+
+@dataclass(slots=True)
+class Fill:
+    order_id: int
+    venue: str
+    asset: str
+    side: str
+    price: float
+    size: float
+    fee: float
+    ts_ns: int
+
+
+@dataclass(slots=True)
+class ExecutionReport:
+    order: Order
+    fills: list
+    latency_ns: int
+    error: str = None
+
+    @property
+    def filled(self) -> float:
+        return sum(fill.size for fill in self.fills)
+
+    @property
+    def notional(self) -> float:
+        return sum(fill.price * fill.size for fill in self.fills)
+
+    @property
+    def fees(self) -> float:
+        return sum(fill.fee for fill in self.fills)
+
+    @property
+    def avg_price(self):
+        filled = self.filled
+        return self.notional / filled if filled else None
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return "rejected"
+        if self.filled >= self.order.size * (1 - 1e-9):
+            return "filled"
+        return "partial" if self.fills else "unfilled"
+
+
+class VenueAdapter(ABC):
+    """Async interface every execution venue (live or simulated) implements"""
+
+    name = None
+
+    @abstractmethod
+    async def place_order(self, order: Order) -> list:
+        """Submit order and return the fills it received"""
+
+    @abstractmethod
+    async def cancel_order(self, order: Order) -> bool:
+        """Cancel whatever is left of a resting order; False if nothing was left"""
+
+
+class ExecutionPipeline:
+    """
+    Routes orders to venue adapters and tracks per-order latency.
+
+    Orders for different venues are submitted concurrently; each report
+    carries its own submit-to-fills latency, and recent latencies are kept
+    per venue for latency_stats().
+    """
+
+    def __init__(self, venues):
+        self.venues = {venue.name: venue for venue in venues}
+        self._latencies = {name: deque(maxlen=LATENCY_HISTORY) for name in self.venues}
+
+    async def submit(self, order: Order) -> ExecutionReport:
+        venue = self.venues[order.venue]
+        start = time.perf_counter_ns()
+        try:
+            fills = await venue.place_order(order)
+            error = None
+        except Exception as e:
+            logger.error(f"Order {order.id} on {order.venue} failed: {e!r}")
+            fills, error = [], repr(e)
+        latency = time.perf_counter_ns() - start
+        self._latencies[order.venue].append(latency)
+        return ExecutionReport(order, fills, latency, error)
+
+    async def submit_many(self, orders) -> list:
+        return await asyncio.gather(*(self.submit(order) for order in orders))
+
+    async def cancel(self, order: Order) -> bool:
+        return await self.venues[order.venue].cancel_order(order)
+
+    async def hedge(self, asset: str, size: float, price: float, side: str = "sell", plan=None) -> dict:
+        """
+        Execute a hedge across venues, split by plan or evenly.
+
+        Each leg is a marketable IOC limit order at most MAX_SLIPPAGE_BPS
+        through price, all legs in flight at once.
+
+        Args:
+            plan (RoutePlan): Per-venue sizes from order_router.route();
+                without one (or if it names no known venue) the hedge is
+                split evenly.
+
+        Returns:
+            dict: the hedge summary used by the bot (execution price is the
+                fill VWAP, size is the filled size) plus the per-leg reports
+        """
+        limit_factor = MAX_SLIPPAGE_BPS / 10_000
+        limit = price * (1 - limit_factor) if side == "sell" else price * (1 + limit_factor)
+        orders = []
+        if plan is not None:
+            orders = [order for order in plan.orders(limit, price) if order.venue in self.venues]
+            routed = sum(order.size for order in orders)
+            if orders and routed < size:
+                # Past the visible depth: scale the legs up in proportion to the route
+                for order in orders:
+                    order.size *= size / routed
+        if not orders:
+            leg = size / len(self.venues)
+            orders = [
+                Order(asset=asset, side=side, size=leg, venue=name, price=limit, mark_price=price)
+                for name in self.venues
+            ]
+        reports = await self.submit_many(orders)
+
+        filled = sum(report.filled for report in reports)
+        if filled <= 0:
+            errors = [report.error for report in reports if report.error]
+            raise RuntimeError(errors[0] if errors else f"No liquidity for {asset} within {MAX_SLIPPAGE_BPS} bps")
+
+        execution_price = sum(report.notional for report in reports) / filled
+        slippage_pct = (execution_price / price - 1) * 100
+        return {
+            "asset": asset,
+            "size": filled,
+            "original_price": round(price, 2),
+            "execution_price": round(execution_price, 2),
+            "slippage_pct": round(slippage_pct, 4),
+            "cost": round(sum(report.fees for report in reports), 2),
+            "latency_ms": round(max(report.latency_ns for report in reports) / 1e6, 2),
+            "route": {report.order.venue: report.filled for report in reports},
+            "timestamp": datetime.utcnow().isoformat(),
+            "reports": reports,
+        }
+
+    def latency_stats(self) -> dict:
+        """venue -> {count, p50_ms, p99_ms, max_ms} over recent orders"""
+        stats = {}
+        for name, latencies in self._latencies.items():
+            if not latencies:
+                continue
+            ordered = sorted(latencies)
+            stats[name] = {
+                "count": len(ordered),
+                "p50_ms": statistics.median(ordered) / 1e6,
+                "p99_ms": ordered[max(0, int(len(ordered) * 0.99) - 1)] / 1e6,
+                "max_ms": ordered[-1] / 1e6,
+            }
+        return stats
+
+
+def get_pipeline() -> ExecutionPipeline:
+    """Process-wide pipeline; runs against the local exchange simulator"""
+    global _pipeline
+    if _pipeline is None:
+        from exchange_sim import SimulatedVenue  # imports this module
+
+        _pipeline = ExecutionPipeline([SimulatedVenue("bybit", seed=1), SimulatedVenue("deribit", seed=2)])
+    return _pipeline
+
+
+async def execute_hedge(asset: str, size: float, price: float, side: str = "sell"):
+    """Route the hedge over the venues' cached order books, then execute it"""
+    logger.info(f"Executing hedge for {asset}: {side} size={size}, price={price}")
+    from data_fetcher import get_order_books_async
+    from order_router import route  # imports this module
+
+    plan = None
+    books = await get_order_books_async(asset)
+    if books:
+        plan = route(asset, side, size, books)
+        logger.info(
+            f"Routed {asset} hedge: {plan.sizes}, expected cost ${plan.expected_cost:,.2f}"
+            + (f", {plan.unfilled:.4f} beyond visible depth" if plan.unfilled else "")
+        )
+    return await get_pipeline().hedge(asset, size, price, side, plan=plan)
@@ -0,0 +1,133 @@
+"""
+Smart order routing for hedges across venues.
+
+route() merges the order books cached by data_fetcher into one ladder of
+fee-adjusted prices and takes the best levels, whichever venue they are on,
+until the hedge is filled. Every level's cost is independent of the others,
+so this greedy walk minimises fees plus slippage for the whole hedge; the
+result is one child order per venue for hedge_engine.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from hedge_engine import Order
+
+# Taker fees per venue for the perpetuals we hedge with
+TAKER_FEES = {"bybit": 0.00055, "deribit": 0.0005}
+DEFAULT_TAKER_FEE = 0.00075
+
+
+@dataclass(slots=True)
+class RoutePlan:
+    asset: str
+    side: str  # "buy" or "sell"
+    size: float  # requested size
+    reference_price: float  # best touch across venues when routed
+    sizes: dict = field(default_factory=dict)  # venue -> child size
+    limits: dict = field(default_factory=dict)  # venue -> worst level price taken
+    expected_price: float = None  # VWAP over all children, before fees
+    expected_fees: float = 0.0
+    expected_slippage: float = 0.0  # USD given up against reference_price
+    unfilled: float = 0.0  # size the books could not absorb
+
+    @property
+    def expected_cost(self) -> float:
+        return self.expected_fees + self.expected_slippage
+
+    def orders(self, limit: float = None, mark_price: float = None) -> list:
+        """
+        One IOC child order per venue.
+
+        Args:
+            limit (float): Limit price for every child; defaults to each
+                venue's worst planned level.
+            mark_price (float): Reference recorded on the orders for slippage.
+        """
+        return [
+            Order(
+                asset=self.asset,
+                side=self.side,
+                size=size,
+                venue=venue,
+                price=self.limits[venue] if limit is None else limit,
+                mark_price=self.reference_price if mark_price is None else mark_price,
+            )
+            for venue, size in self.sizes.items()
+        ]
+
+
+def route(asset: str, side: str, size: float, books: dict, fees: dict = None) -> RoutePlan:
+    """
+    Split an order across venues for the lowest expected fees plus slippage.
+
+    Args:
+        asset (str): Asset being traded.
+        side (str): "sell" takes bids, "buy" takes asks.
+        size (float): Quantity to route, in coins.
+        books (dict): venue -> {"bids", "asks"}, each side (price, size)
+            levels best first, as returned by data_fetcher.get_order_books_async
+            ((n, 2) arrays there; lists of pairs work too).
+        fees (dict): venue -> taker fee rate (defaults to TAKER_FEES).
+
+    Returns:
+        RoutePlan: child sizes and limits per venue and the expected cost
+    """
+    fees = TAKER_FEES if fees is None else fees
+    book_side = "bids" if side == "sell" else "asks"
+    sign = 1.0 if side == "sell" else -1.0  # higher is better after multiplying
+
+    venues, prices, sizes, venue_ids, fee_rates = [], [], [], [], []
+    for venue, book in books.items():
+        levels = np.asarray(book.get(book_side, ()), dtype=float).reshape(-1, 2)
+        if not len(levels):
+            continue
+        # No venue ever needs more depth than it takes to fill the whole size
+        # alone, so deep books are cut down before the merge
+        needed = np.searchsorted(np.cumsum(levels[:, 1]), size) + 1
+        levels = levels[:needed]
+        venues.append(venue)
+        prices.append(levels[:, 0])
+        sizes.append(levels[:, 1])
+        venue_ids.append(np.full(len(levels), len(venue_ids), dtype=np.intp))
+        fee_rates.append(np.full(len(levels), fees.get(venue, DEFAULT_TAKER_FEE)))
+
+    if not venues:
+        return RoutePlan(asset, side, size, None, unfilled=size)
+
+    # Best touch across venues; slippage is measured against it
+    reference = sign * float(max(sign * levels[0] for levels in prices))
+    prices = np.concatenate(prices)
+    sizes = np.concatenate(sizes)
+    venue_ids = np.concatenate(venue_ids)
+    fee_rates = np.concatenate(fee_rates)
+
+    # What each level is worth once the taker fee is paid, best first
+    effective = prices * (1 - sign * fee_rates)
+    order = np.argsort(-sign * effective, kind="stable")
+    prices, sizes, venue_ids, fee_rates = prices[order], sizes[order], venue_ids[order], fee_rates[order]
+
+    filled = np.cumsum(sizes)
+    last = min(int(np.searchsorted(filled, size)), len(filled) - 1)
+    taken = sizes[:last + 1].copy()
+    taken[-1] -= max(filled[last] - size, 0.0)
+    prices, venue_ids, fee_rates = prices[:last + 1], venue_ids[:last + 1], fee_rates[:last + 1]
+
+    per_venue = np.bincount(venue_ids, weights=taken, minlength=len(venues))
+    worst = np.full(len(venues), np.inf)
+    np.minimum.at(worst, venue_ids, sign * prices)
+
+    total = float(taken.sum())
+    notional = float(np.dot(prices, taken))
+
+    plan = RoutePlan(asset, side, size, reference)
+    for i, venue in enumerate(venues):
+        if per_venue[i] > 0:
+            plan.sizes[venue] = float(per_venue[i])
+            plan.limits[venue] = float(sign * worst[i])
+    plan.expected_price = notional / total if total else None
+    plan.expected_fees = float(np.dot(prices * fee_rates, taken))
+    plan.expected_slippage = sign * (reference * total - notional)
+    plan.unfilled = max(size - float(filled[-1]), 0.0)
+    return plan
+
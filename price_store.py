@@ -0,0 +1,248 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ("bybit", "deribit")
+HISTORY_SIZE = 1000  # Ticks kept in memory per asset (and in the snapshot)
+FLUSH_INTERVAL = 60  # Seconds between write-behind snapshots
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+TICK_DTYPE = np.dtype([("timestamp", "f8")] + [(source, "f8") for source in SOURCES])
+
+
+class PriceRing:
+    """
+    Fixed-capacity tick buffer for one asset.
+
+    Every tick is written twice, at ``i`` and ``i + capacity``, so the most
+    recent ``n`` ticks always form one contiguous slice and ``view()`` can hand
+    it out without copying.
+    """
+
+    def __init__(self, capacity: int = HISTORY_SIZE):
+        self.capacity = capacity
+        self._data = np.full(2 * capacity, np.nan, dtype=TICK_DTYPE)
+        self._head = 0  # Next write slot in [0, capacity)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, row: tuple):
+        self._data[self._head] = row
+        self._data[self._head + self.capacity] = row
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def view(self) -> np.ndarray:
+        """Read-only view of the buffered ticks, oldest first"""
+        end = self._head + self.capacity
+        view = self._data[end - self._count:end]
+        view.flags.writeable = False
+        return view
+
+
+class PriceStore:
+    """
+    Process-wide price cache: O(1) latest lookups, ring-buffered history and a
+    write-behind JSON snapshot in the ``live_data.json`` layout.
+    """
+
+    def __init__(self, path: str, capacity: int = HISTORY_SIZE):
+        self.path = path
+        self.capacity = capacity
+        self._rings = {}
+        self._latest = {}
+        self._listeners = []
+        self._quote_listeners = []
+        self._dirty = False
+
+    def add_listener(self, callback):
+        """Call ``callback(asset, ts, latest)`` after every recorded tick"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def add_quote_listener(self, callback):
+        """Like add_listener, but also called for streamed quotes that aren't archived"""
+        self._quote_listeners.append(callback)
+
+    def remove_quote_listener(self, callback):
+        if callback in self._quote_listeners:
+            self._quote_listeners.remove(callback)
+
+    def record(self, asset: str, prices: dict, ts: float = None) -> dict:
+        """Append one tick for asset and return it as the new latest entry"""
+        asset = asset.upper()
+        ts = time.time() if ts is None else ts
+
+        ring = self._rings.get(asset)
+        if ring is None:
+            ring = self._rings[asset] = PriceRing(self.capacity)
+        ring.append((ts,) + tuple(_to_float(prices.get(source)) for source in SOURCES))
+
+        latest = {source: prices.get(source) for source in SOURCES}
+        latest["timestamp"] = _format_ts(ts)
+        self._latest[asset] = latest
+        self._dirty = True
+
+        self._notify(self._listeners + self._quote_listeners, asset, ts, latest)
+        return latest
+
+    def update_quote(self, asset: str, source: str, price: float, ts: float = None) -> dict:
+        """
+        Update one venue's latest price without appending to history.
+
+        Used by streaming feeds, which deliver far more often than history is
+        sampled; the poller archives the latest quotes on its own cadence.
+        """
+        asset = asset.upper()
+        ts = time.time() if ts is None else ts
+
+        latest = dict(self._latest.get(asset, {}))
+        latest[source] = price
+        latest["timestamp"] = _format_ts(ts)
+        self._latest[asset] = latest
+        self._dirty = True
+
+        self._notify(self._quote_listeners, asset, ts, latest)
+        return latest
+
+    def _notify(self, listeners: list, asset: str, ts: float, latest: dict):
+        for listener in listeners:
+            try:
+                listener(asset, ts, latest)
+            except Exception as e:
+                logger.error(f"Price listener failed for {asset}: {e}", exc_info=True)
+
+    def latest(self, asset: str) -> dict:
+        return self._latest.get(asset.upper(), {})
+
+    def history(self, asset: str) -> np.ndarray:
+        """Zero-copy view of the asset's ticks (fields: timestamp, bybit, deribit)"""
+        ring = self._rings.get(asset.upper())
+        return ring.view() if ring is not None else np.empty(0, dtype=TICK_DTYPE)
+
+    @property
+    def assets(self) -> list:
+        return list(self._rings)
+
+    def to_dict(self) -> dict:
+        """Render the store in the legacy ``{"latest": ..., "history": [...]}`` layout"""
+        data = {}
+        for asset, ring in self._rings.items():
+            rows = ring.view()
+            data[asset] = {
+                "latest": self._latest.get(asset, {}),
+                "history": [_row_to_dict(row) for row in rows[:-1]],
+            }
+        return data
+
+    def load(self):
+        """Reload ticks from the JSON snapshot, if there is one"""
+        try:
+            with open(self.path, "r") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except json.JSONDecodeError as e:
+            logger.error(f"Corrupt price snapshot {self.path}: {e}")
+            return
+
+        for asset, asset_data in snapshot.items():
+            # Handle both old and new formats
+            if "latest" not in asset_data:
+                asset_data = {"latest": asset_data, "history": []}
+            entries = asset_data.get("history", []) + [asset_data["latest"]]
+            for entry in entries[-self.capacity:]:
+                if not entry:
+                    continue
+                try:
+                    ts = _parse_ts(entry["timestamp"])
+                except (KeyError, ValueError):
+                    continue
+                self.record(asset, entry, ts)
+
+        self._dirty = False
+        logger.info(f"Loaded price snapshot for {', '.join(self._rings) or 'no assets'}")
+
+    def flush(self):
+        """Write the snapshot atomically (temp file + rename) if anything changed"""
+        if not self._dirty:
+            return
+        # Cleared before the snapshot so ticks recorded meanwhile keep it dirty; restored if the write fails
+        self._dirty = False
+        if not _write_atomic(self.path, self.to_dict()):
+            self._dirty = True
+
+    async def run_flusher(self, interval: float = FLUSH_INTERVAL):
+        """Background task: snapshot to disk every interval, and once more on cancel"""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                if self._dirty:
+                    self._dirty = False
+                    snapshot = self.to_dict()
+                    if not await asyncio.to_thread(_write_atomic, self.path, snapshot):
+                        self._dirty = True  # retried on the next interval
+        except asyncio.CancelledError:
+            self.flush()
+            raise
+
+
+def _write_atomic(path: str, data: dict) -> bool:
+    """Write data as JSON via a synced temp file renamed over path; False if that failed"""
+    tmp_path = None
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False) as f:
+            tmp_path = f.name
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to save price snapshot: {e}")
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+        return False
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _row_to_dict(row) -> dict:
+    entry = {}
+    for source in SOURCES:
+        value = float(row[source])
+        entry[source] = None if math.isnan(value) else value
+    entry["timestamp"] = _format_ts(float(row["timestamp"]))
+    return entry
+
+
+def _format_ts(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def _parse_ts(value: str) -> float:
+    return datetime.strptime(value, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc).timestamp()
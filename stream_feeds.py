@@ -0,0 +1,225 @@
+"""
+WebSocket ticker streams for Bybit (v5 public linear) and Deribit (ticker.*).
+
+Every streamed last price goes straight into the shared PriceStore as a
+quote, so risk checks see moves within milliseconds instead of on the next
+30-second REST poll. Streams reconnect with exponential backoff; the market
+poller falls back to REST for any asset whose stream has gone quiet.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+
+import aiohttp
+
+from data_fetcher import get_session
+
+logger = logging.getLogger(__name__)
+
+BYBIT_WS_URL = "wss://stream.bybit.com/v5/public/linear"
+DERIBIT_WS_URL = "wss://www.deribit.com/ws/api/v2"
+
+RECONNECT_MIN = 1.0  # seconds
+RECONNECT_MAX = 60.0
+PING_INTERVAL = 20  # seconds between application-level pings
+STALE_AFTER = 15  # seconds without a message before an asset counts as stale
+
+
+class PriceStream:
+    """Base class: one WebSocket connection per venue, subscribed per asset"""
+
+    venue = None
+
+    def __init__(self, store, assets=(), url: str = None):
+        self.store = store
+        self.url = url
+        self.assets = {asset.upper() for asset in assets}
+        self.reconnects = 0
+        self.messages = 0
+        self._last_message = {}  # asset -> monotonic time of last price
+        self._ws = None
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def add_asset(self, asset: str):
+        """Subscribe to asset, immediately if connected, otherwise on (re)connect"""
+        asset = asset.upper()
+        if asset in self.assets:
+            return
+        self.assets.add(asset)
+        if self._ws is not None and not self._ws.closed:
+            asyncio.create_task(self._send(self.subscribe_message([asset])))
+
+    def remove_asset(self, asset: str):
+        """Unsubscribe from asset; it is left out of later (re)subscriptions too"""
+        asset = asset.upper()
+        if asset not in self.assets:
+            return
+        self.assets.discard(asset)
+        self._last_message.pop(asset, None)
+        if self._ws is not None and not self._ws.closed:
+            asyncio.create_task(self._send(self.unsubscribe_message([asset])))
+
+    def is_fresh(self, asset: str, max_age: float = STALE_AFTER) -> bool:
+        seen = self._last_message.get(asset.upper())
+        return seen is not None and time.monotonic() - seen <= max_age
+
+    async def run(self):
+        delay = RECONNECT_MIN
+        while True:
+            seen = self.messages
+            try:
+                session = await get_session()
+                async with session.ws_connect(self.url, heartbeat=PING_INTERVAL) as ws:
+                    self._ws = ws
+                    logger.info(f"📡 {self.venue} stream connected")
+                    for message in self.on_connect_messages():
+                        await ws.send_json(message)
+                    if self.assets:
+                        await ws.send_json(self.subscribe_message(sorted(self.assets)))
+
+                    pinger = asyncio.create_task(self._ping_loop(ws))
+                    pinger.add_done_callback(self._ping_done)
+                    try:
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                reply = self.handle(json.loads(msg.data))
+                                if reply is not None:
+                                    await ws.send_json(reply)
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                    finally:
+                        pinger.cancel()
+                logger.warning(f"{self.venue} stream closed by server")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"{self.venue} stream error: {e!r}")
+            finally:
+                self._ws = None
+
+            # Exponential backoff with jitter so venues don't reconnect in lockstep;
+            # a connection that delivered prices starts the backoff over
+            if self.messages > seen:
+                delay = RECONNECT_MIN
+            self.reconnects += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, RECONNECT_MAX)
+
+    def _on_price(self, asset: str, price: float):
+        self.messages += 1
+        self._last_message[asset] = time.monotonic()
+        self.store.update_quote(asset, self.venue, price)
+
+    async def _send(self, message: dict):
+        try:
+            await self._ws.send_json(message)
+        except Exception as e:
+            logger.warning(f"{self.venue} (un)subscribe failed: {e!r}")
+
+    def _ping_done(self, task: asyncio.Task):
+        """Retrieve the ping task's exception so a failed ping is logged, not lost"""
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"{self.venue} ping failed: {task.exception()!r}")
+
+    async def _ping_loop(self, ws):
+        message = self.ping_message()
+        if message is None:
+            return
+        while not ws.closed:
+            await asyncio.sleep(PING_INTERVAL)
+            await ws.send_json(message)
+
+    # Venue protocol hooks
+    def subscribe_message(self, assets: list) -> dict:
+        raise NotImplementedError
+
+    def unsubscribe_message(self, assets: list) -> dict:
+        raise NotImplementedError
+
+    def on_connect_messages(self) -> list:
+        return []
+
+    def ping_message(self):
+        return None
+
+    def handle(self, message: dict):
+        """Process one decoded frame; may return a reply to send back"""
+        raise NotImplementedError
+
+
+class BybitStream(PriceStream):
+    venue = "bybit"
+
+    def __init__(self, store, assets=(), url: str = BYBIT_WS_URL):
+        super().__init__(store, assets, url)
+
+    def subscribe_message(self, assets: list) -> dict:
+        return {"op": "subscribe", "args": [f"tickers.{asset}USDT" for asset in assets]}
+
+    def unsubscribe_message(self, assets: list) -> dict:
+        return {"op": "unsubscribe", "args": [f"tickers.{asset}USDT" for asset in assets]}
+
+    def ping_message(self):
+        return {"op": "ping"}
+
+    def handle(self, message: dict):
+        if not message.get("topic", "").startswith("tickers."):
+            return None
+        data = message.get("data", {})
+        symbol = data.get("symbol", "")
+        # Deltas only carry changed fields
+        if "lastPrice" in data and symbol.endswith("USDT"):
+            self._on_price(symbol[:-len("USDT")], float(data["lastPrice"]))
+        return None
+
+
+class DeribitStream(PriceStream):
+    venue = "deribit"
+
+    def __init__(self, store, assets=(), url: str = DERIBIT_WS_URL):
+        super().__init__(store, assets, url)
+        self._request_id = 0
+
+    def subscribe_message(self, assets: list) -> dict:
+        return self._rpc("public/subscribe", {"channels": self._channels(assets)})
+
+    def unsubscribe_message(self, assets: list) -> dict:
+        return self._rpc("public/unsubscribe", {"channels": self._channels(assets)})
+
+    def on_connect_messages(self) -> list:
+        return [self._rpc("public/set_heartbeat", {"interval": PING_INTERVAL})]
+
+    def handle(self, message: dict):
+        method = message.get("method")
+        if method == "heartbeat":
+            if message.get("params", {}).get("type") == "test_request":
+                return self._rpc("public/test", {})
+            return None
+        if method != "subscription":
+            return None
+
+        params = message.get("params", {})
+        data = params.get("data", {})
+        if params.get("channel", "").startswith("ticker.") and data.get("last_price") is not None:
+            asset = data.get("instrument_name", "").split("-")[0]
+            self._on_price(asset, float(data["last_price"]))
+        return None
+
+    @staticmethod
+    def _channels(assets: list) -> list:
+        return [f"ticker.{asset}-PERPETUAL.100ms" for asset in assets]
+
+    def _rpc(self, method: str, params: dict) -> dict:
+        self._request_id += 1
+        return {"jsonrpc": "2.0", "id": self._request_id, "method": method, "params": params}
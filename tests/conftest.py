@@ -0,0 +1,6 @@
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Same layout the bot runs with: top-level modules plus the flat bot/ package
+sys.path[:0] = [ROOT, os.path.join(ROOT, "bot")]
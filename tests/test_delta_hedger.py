@@ -0,0 +1,92 @@
+"""DeltaHedger only trades assets it has a price for"""
+import asyncio
+
+from delta_hedger import DeltaHedger
+from positions import Position
+
+
+class NullPoller:
+    def subscribe(self, asset, queue):
+        pass
+
+    def unsubscribe(self, asset, queue):
+        pass
+
+
+def test_rebalance_skips_assets_without_a_price():
+    async def scenario():
+        trades = []
+
+        async def rebalance(key, trade):
+            trades.append(trade)
+
+        hedger = DeltaHedger(NullPoller(), rebalance)
+        hedger.watch(1, Position("BTC", 2.0, 1e9, 117_000.0), band=0)
+        # Hedged short before the hedger has seen an ETH price
+        hedger.watch(1, Position("ETH", 10.0, 1e9, 3_000.0, hedge=5.0), band=0)
+
+        await hedger.evaluate("ETH", float("nan"))
+        await hedger.evaluate("ETH", 0.0)
+        assert trades == []
+
+        await hedger.evaluate("BTC", 117_000.0)
+        assert list(trades[0]) == ["BTC"]
+        units, price = trades[0]["BTC"]
+        assert units > 0 and price == 117_000.0
+        assert list(hedger.net_deltas(1)) == ["BTC"]
+        hedger.stop()
+
+    asyncio.run(scenario())
+
+
+def test_slow_rebalance_does_not_block_prices():
+    async def scenario():
+        release = asyncio.Event()
+        trades = []
+
+        async def rebalance(key, trade):
+            trades.append((key, sorted(trade)))
+            if key == "btc-user":
+                await release.wait()
+
+        hedger = DeltaHedger(NullPoller(), rebalance)
+        hedger.watch("btc-user", Position("BTC", 2.0, 1e9, 117_000.0), band=0)
+        hedger.watch("eth-user", Position("ETH", 10.0, 1e9, 3_000.0), band=0)
+        for update in (("BTC", 117_000.0), ("BTC", 118_000.0), ("ETH", 3_100.0)):
+            hedger._queue.put_nowait(update)
+        for _ in range(100):
+            if len(trades) == 2:
+                break
+            await asyncio.sleep(0.01)
+
+        # ETH was hedged while BTC's rebalance was still executing; BTC's second price only repriced
+        assert trades == [("btc-user", ["BTC"]), ("eth-user", ["ETH"])]
+        assert list(hedger._rebalancing) == ["BTC"] and hedger._prices[hedger._columns["BTC"]] == 118_000.0
+        release.set()
+        await asyncio.sleep(0.01)
+        assert not hedger._rebalancing and hedger.rebalances == 2
+        hedger.stop()
+
+    asyncio.run(scenario())
+
+
+def test_deltas_use_the_assets_surface_vol(monkeypatch):
+    import delta_hedger
+    from greeks import atm_strike, calculate_greeks_batch
+
+    class Surfaces:
+        def vol(self, asset, days, strike, spot):
+            return 1.2 if asset == "BTC" else 0.35
+
+    monkeypatch.setattr(delta_hedger, "get_vol_surfaces", Surfaces)
+
+    async def scenario():
+        hedger = DeltaHedger(NullPoller(), None)
+        hedger.watch(1, Position("BTC", 2.0, 1e9, 117_000.0), band=1e12)
+        await hedger.evaluate("BTC", 117_400.0)
+        expected = calculate_greeks_batch(117_400.0, atm_strike(117_400.0), delta_hedger.OPTION_DAYS, 1.2)["delta"]
+        units, _ = hedger.net_deltas(1)["BTC"]
+        assert units == 2.0 * float(expected)
+        hedger.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,121 @@
+"""
+greeks_kernel against scipy.special: the Cody erfc and every array pricing
+path, including the tails (|x| > 4) and both sides of the SMALL_ARRAY cutover.
+
+Tolerances: erfc to 1e-13 relative wherever the result isn't subnormal
+(scipy and libm themselves differ by ~6e-14 in the far tail), the normal
+CDF to as much again per 10 standard deviations squared; greeks to 1e-12
+of each greek's largest magnitude in the book, and far out-of-the-money
+prices to 1e-6 of their own value.
+"""
+import math
+
+import numpy as np
+import pytest
+
+scipy_special = pytest.importorskip("scipy.special")
+
+import greeks_kernel
+
+ERFC_TOLERANCE = 1e-13
+GREEKS_TOLERANCE = 1e-12
+SIZES = [1, greeks_kernel.SMALL_ARRAY - 1, greeks_kernel.SMALL_ARRAY, greeks_kernel.SMALL_ARRAY + 1, 2_000]
+
+
+def relative_error(values, reference):
+    normal = np.abs(reference) > 1e-300  # subnormal results carry few significant bits
+    return float(np.max(np.abs(values - reference)[normal] / np.abs(reference)[normal]))
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_erfc_matches_scipy(size):
+    rng = np.random.default_rng(size)
+    # Half the points in the tails, beyond the |x| > 4 branch
+    x = np.concatenate([rng.uniform(-4, 4, size - size // 2), rng.uniform(4, 27, size // 2) * rng.choice([-1, 1], size // 2)])
+    assert relative_error(greeks_kernel.erfc(x), scipy_special.erfc(x)) < ERFC_TOLERANCE
+
+
+def test_erfc_every_branch_and_edge():
+    x = np.concatenate([np.linspace(-30, 30, 60_001), [0.46875, -0.46875, 4.0, -4.0]])
+    assert relative_error(greeks_kernel.erfc(x), scipy_special.erfc(x)) < ERFC_TOLERANCE
+
+    edge = greeks_kernel.erfc(np.array([np.inf, -np.inf, np.nan] + [0.0] * greeks_kernel.SMALL_ARRAY))
+    assert edge[0] == 0 and edge[1] == 2 and np.isnan(edge[2]) and np.all(edge[3:] == 1)
+    assert np.isnan(greeks_kernel.erfc(np.array([np.nan]))[0])
+
+
+def test_norm_cdf_array_matches_ndtr():
+    x = np.linspace(-38, 8, 4_601)
+    ours, reference = greeks_kernel.norm_cdf_array(x), scipy_special.ndtr(x)
+    # Rounding x / sqrt(2) costs about x**2 ulps of relative accuracy in the lower tail
+    normal = reference > 1e-300
+    error = np.abs(ours - reference)[normal] / reference[normal]
+    assert np.all(error < ERFC_TOLERANCE * (1 + x[normal] ** 2 / 100))
+
+
+def reference_greeks(S, K, T, sigma, r, call):
+    """Black-Scholes on scipy's ndtr, the formulas the kernels implement"""
+    ndtr = scipy_special.ndtr
+    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+    d2 = d1 - sigma * np.sqrt(T)
+    pdf_d1 = np.exp(-0.5 * d1 * d1) / math.sqrt(2 * math.pi)
+    discounted = K * np.exp(-r * T)
+    decay = -S * pdf_d1 * sigma / (2 * np.sqrt(T))
+    return (
+        np.where(call, S * ndtr(d1) - discounted * ndtr(d2), discounted * ndtr(-d2) - S * ndtr(-d1)),
+        np.where(call, ndtr(d1), -ndtr(-d1)),
+        pdf_d1 / (S * sigma * np.sqrt(T)),
+        np.where(call, decay - r * discounted * ndtr(d2), decay + r * discounted * ndtr(-d2)) / 365,
+        S * pdf_d1 * np.sqrt(T) / 100,
+    )
+
+
+def make_book(n: int, seed: int = 11):
+    """Calls and puts from deep out of to deep in the money: d1 and d2 well past +-4"""
+    rng = np.random.default_rng(seed)
+    S = rng.uniform(1_000, 120_000, n)
+    K = S * np.exp(rng.normal(0, 0.6, n))
+    T = rng.integers(1, 366, n) / 365
+    sigma = rng.uniform(0.1, 2.0, n)
+    return S, K, T, sigma, np.full(n, 0.05), rng.random(n) < 0.5
+
+
+@pytest.fixture(params=["numba", "numpy + scipy ndtr", "numpy + Cody erfc"])
+def backend(request, monkeypatch):
+    """Route black_scholes_array through one backend"""
+    if request.param == "numba":
+        pytest.importorskip("numba")
+    monkeypatch.setattr(greeks_kernel, "JIT", request.param == "numba")
+    monkeypatch.setattr(greeks_kernel, "_ndtr",
+                        greeks_kernel.norm_cdf_array if request.param == "numpy + Cody erfc" else scipy_special.ndtr)
+    return request.param
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_black_scholes_array_matches_scipy(backend, size):
+    book = make_book(size, seed=size)
+    values = greeks_kernel.black_scholes_array(*book)
+    reference = reference_greeks(*book)
+    for name, value, expected in zip(("price", "delta", "gamma", "theta", "vega"), values, reference):
+        assert value.shape == expected.shape
+        error = np.max(np.abs(value - expected)) / max(np.max(np.abs(expected)), 1e-300)
+        assert error < GREEKS_TOLERANCE, (backend, name, error)
+
+
+def test_black_scholes_array_reaches_the_tails(backend):
+    book = make_book(2_000)
+    S, K, T, sigma, r, _ = book
+    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+    assert (d1 > 4).any() and (d1 < -4).any()
+    # Far out-of-the-money options keep their tiny values rather than rounding to 0
+    deep = reference_greeks(*book)[0] < 1e-6
+    price = greeks_kernel.black_scholes_array(*book)[0]
+    assert relative_error(price[deep], reference_greeks(*book)[0][deep]) < 1e-6
+
+
+def test_scalar_kernel_matches_the_array_kernel(backend):
+    book = make_book(greeks_kernel.SMALL_ARRAY)
+    arrays = greeks_kernel.black_scholes_array(*book)
+    for i in range(greeks_kernel.SMALL_ARRAY):
+        scalar = greeks_kernel.black_scholes(*(float(column[i]) for column in book[:5]), bool(book[5][i]))
+        np.testing.assert_allclose(scalar, [values[i] for values in arrays], rtol=1e-12, atol=1e-12)
@@ -0,0 +1,48 @@
+"""NotificationDispatcher retries transient Telegram errors and drops permanent ones"""
+import asyncio
+
+import pytest
+from telegram.error import BadRequest, Forbidden, NetworkError
+
+import notifier
+
+
+class FailingBot:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    sleep = asyncio.sleep
+    monkeypatch.setattr(notifier.asyncio, "sleep", lambda seconds: sleep(0))
+
+
+def deliver(bot):
+    async def scenario():
+        dispatcher = notifier.NotificationDispatcher(bot, global_rate=1_000, chat_rate=1_000)
+        dispatcher.send(1, "hello")
+        await dispatcher.drain()
+        dispatcher.stop()
+        return dispatcher
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("error", [BadRequest("Chat not found"), Forbidden("bot was blocked by the user")])
+def test_permanent_errors_are_not_retried(error):
+    bot = FailingBot(error, error)
+    dispatcher = deliver(bot)
+    assert bot.calls == 1 and dispatcher.sent == 0 and dispatcher.pending() == 0
+
+
+def test_network_errors_are_retried():
+    bot = FailingBot(NetworkError("connection reset"))
+    dispatcher = deliver(bot)
+    assert bot.calls == 2 and dispatcher.sent == 1
@@ -0,0 +1,41 @@
+"""RiskEvaluator keeps draining prices while breach handlers run"""
+import asyncio
+
+from risk_engine import RiskEvaluator
+
+
+class NullPoller:
+    def subscribe(self, asset, queue):
+        pass
+
+    def unsubscribe(self, asset, queue):
+        pass
+
+
+def test_slow_breach_handler_does_not_block_other_assets():
+    async def scenario():
+        release = asyncio.Event()
+        handled = []
+
+        async def on_breach(key, asset, price):
+            handled.append((key, asset))
+            if asset == "BTC":
+                await release.wait()
+
+        evaluator = RiskEvaluator(NullPoller(), on_breach)
+        evaluator.watch("btc-user", "BTC", 1.0, 100_000)
+        evaluator.watch("eth-user", "ETH", 1.0, 3_000)
+        evaluator._queue.put_nowait(("BTC", 117_000.0))
+        evaluator._queue.put_nowait(("ETH", 3_100.0))
+        for _ in range(100):
+            if len(handled) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert handled == [("btc-user", "BTC"), ("eth-user", "ETH")]
+        assert len(evaluator._handlers) == 1  # the BTC handler is still waiting
+
+        evaluator.stop()
+        await asyncio.sleep(0)
+        assert not evaluator._handlers
+
+    asyncio.run(scenario())
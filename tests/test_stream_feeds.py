@@ -0,0 +1,216 @@
+"""Stream clients against a local aiohttp WebSocket stand-in for the venues"""
+import asyncio
+import logging
+
+import pytest
+from aiohttp import web
+
+import data_fetcher
+import market_poller
+import stream_feeds
+from price_store import PriceStore
+
+TIMEOUT = 5
+
+
+class QuoteRecorder:
+    """Stands in for the PriceStore: keeps every streamed quote"""
+
+    def __init__(self):
+        self.quotes = []
+        self.changed = asyncio.Event()
+
+    def update_quote(self, asset, source, price, ts=None):
+        self.quotes.append((asset, source, price))
+        self.changed.set()
+
+    async def wait_for(self, count: int):
+        while len(self.quotes) < count:
+            self.changed.clear()
+            await asyncio.wait_for(self.changed.wait(), TIMEOUT)
+
+
+class BybitStandIn:
+    """
+    Bybit's public linear stream: records every frame per connection, sends
+    one ticker per subscribed symbol and, if drop_first is set, closes the
+    first connection right after.
+    """
+
+    def __init__(self, drop_first: bool = False):
+        self.drop_first = drop_first
+        self.connections = []  # list of received frames per connection
+        self.received = asyncio.Event()
+        self.url = None
+        self._runner = None
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/v5/public/linear", self.handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v5/public/linear"
+        return self
+
+    async def __aexit__(self, *exc):
+        await data_fetcher.close_session()
+        await self._runner.cleanup()
+
+    async def handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        frames = []
+        self.connections.append(frames)
+        first = len(self.connections) == 1
+        async for msg in ws:
+            frame = msg.json()
+            frames.append(frame)
+            self.received.set()
+            if frame.get("op") == "subscribe":
+                for topic in frame["args"]:
+                    symbol = topic.split(".", 1)[1]
+                    await ws.send_json({"topic": topic, "type": "snapshot",
+                                        "data": {"symbol": symbol, "lastPrice": "100.5"}})
+                if first and self.drop_first:
+                    await ws.close()
+        return ws
+
+    async def wait_for(self, predicate):
+        while not predicate():
+            self.received.clear()
+            await asyncio.wait_for(self.received.wait(), TIMEOUT)
+
+
+@pytest.fixture(autouse=True)
+def fast_reconnect(monkeypatch):
+    monkeypatch.setattr(stream_feeds, "RECONNECT_MIN", 0.01)
+
+
+def test_streamed_prices_reach_the_store():
+    async def scenario():
+        async with BybitStandIn() as server:
+            store = QuoteRecorder()
+            stream = stream_feeds.BybitStream(store, ["BTC"], url=server.url)
+            stream.start()
+            await store.wait_for(1)
+            stream.stop()
+        assert store.quotes == [("BTC", "bybit", 100.5)]
+        assert server.connections[0][0] == {"op": "subscribe", "args": ["tickers.BTCUSDT"]}
+        assert stream.is_fresh("BTC")
+
+    asyncio.run(scenario())
+
+
+def test_reconnects_and_resubscribes_every_asset():
+    async def scenario():
+        async with BybitStandIn(drop_first=True) as server:
+            store = QuoteRecorder()
+            stream = stream_feeds.BybitStream(store, ["BTC"], url=server.url)
+            stream.start()
+            await store.wait_for(1)
+            # Added while the first connection is being dropped: picked up on reconnect
+            stream.add_asset("ETH")
+            await server.wait_for(lambda: len(server.connections) >= 2 and server.connections[1])
+            await store.wait_for(3)
+            stream.stop()
+        assert stream.reconnects >= 1
+        assert server.connections[1][0] == {"op": "subscribe", "args": ["tickers.BTCUSDT", "tickers.ETHUSDT"]}
+        assert {quote[0] for quote in store.quotes[1:]} == {"BTC", "ETH"}
+
+    asyncio.run(scenario())
+
+
+def test_add_and_remove_asset_while_connected():
+    async def scenario():
+        async with BybitStandIn() as server:
+            store = QuoteRecorder()
+            stream = stream_feeds.BybitStream(store, ["BTC"], url=server.url)
+            stream.start()
+            await store.wait_for(1)
+            stream.add_asset("ETH")
+            await store.wait_for(2)
+            stream.remove_asset("BTC")
+            await server.wait_for(lambda: len(server.connections[0]) >= 3)
+            stream.stop()
+        frames = server.connections[0]
+        assert frames[1] == {"op": "subscribe", "args": ["tickers.ETHUSDT"]}
+        assert frames[2] == {"op": "unsubscribe", "args": ["tickers.BTCUSDT"]}
+        assert stream.assets == {"ETH"} and not stream.is_fresh("BTC")
+
+    asyncio.run(scenario())
+
+
+def test_failed_ping_is_logged(monkeypatch, caplog):
+    class BrokenPing(stream_feeds.BybitStream):
+        def ping_message(self):
+            return {"op": object()}  # not JSON-serializable, so the ping task fails
+
+    monkeypatch.setattr(stream_feeds, "PING_INTERVAL", 0.01)
+
+    def logged():
+        return any("ping failed" in record.message for record in caplog.records)
+
+    async def scenario():
+        async with BybitStandIn() as server:
+            store = QuoteRecorder()
+            stream = BrokenPing(store, ["BTC"], url=server.url)
+            stream.start()
+            await store.wait_for(1)
+            for _ in range(100):
+                if logged():
+                    break
+                await asyncio.sleep(0.01)
+            stream.stop()
+
+    with caplog.at_level(logging.WARNING, logger="stream_feeds"):
+        asyncio.run(scenario())
+    assert logged()
+
+
+def test_deribit_unsubscribe_message():
+    stream = stream_feeds.DeribitStream(QuoteRecorder())
+    message = stream.unsubscribe_message(["BTC"])
+    assert message["method"] == "public/unsubscribe"
+    assert message["params"] == {"channels": ["ticker.BTC-PERPETUAL.100ms"]}
+
+
+class FakeStream:
+    def __init__(self):
+        self.assets = set()
+
+    def add_asset(self, asset):
+        self.assets.add(asset)
+
+    def remove_asset(self, asset):
+        self.assets.discard(asset)
+
+    def is_fresh(self, asset):
+        return True
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def test_poller_unsubscribes_streams_after_last_watcher(monkeypatch, tmp_path):
+    store = PriceStore(str(tmp_path / "live_data.json"))
+    monkeypatch.setattr(market_poller, "get_price_store", lambda: store)
+    monkeypatch.setattr(market_poller, "archive_latest", lambda asset: None)
+
+    async def scenario():
+        stream = FakeStream()
+        poller = market_poller.MarketPoller(interval=60, streams=[stream])
+        first, second = asyncio.Queue(), asyncio.Queue()
+        poller.subscribe("BTC", first)
+        poller.subscribe("btc", second)
+        poller.unsubscribe("BTC", first)
+        assert stream.assets == {"BTC"}
+        poller.unsubscribe("BTC", second)
+        assert stream.assets == set() and poller.assets == []
+        poller.stop()
+
+    asyncio.run(scenario())
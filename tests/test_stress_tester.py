@@ -0,0 +1,18 @@
+"""simulate_stress_grid only prices calls and puts"""
+import pytest
+
+from stress_tester import simulate_stress_grid
+
+PARAMS = {"spot": 117_000.0, "strike": 120_000.0, "volatility": 0.6, "time_to_expiry": 30, "rate": 0.0}
+
+
+def test_unknown_option_type_raises():
+    with pytest.raises(ValueError):
+        simulate_stress_grid({**PARAMS, "option_type": "straddle"})
+
+
+def test_option_type_is_case_insensitive():
+    put = simulate_stress_grid({**PARAMS, "option_type": "PUT"})
+    call = simulate_stress_grid({**PARAMS, "option_type": "call"})
+    # Deltas of a put and a call on the same inputs differ by one
+    assert abs(put["greeks"][0] - call["greeks"][0] + 1).max() < 1e-9
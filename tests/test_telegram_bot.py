@@ -0,0 +1,73 @@
+"""Command handlers against a stand-in Telegram update and a temporary price store"""
+import asyncio
+import importlib
+import types
+
+import pytest
+
+import data_fetcher
+import greeks
+import var_engine
+from positions import Position
+from price_store import PriceStore
+
+
+class Message:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+@pytest.fixture
+def bot(monkeypatch, tmp_path):
+    """telegram_bot imported in a scratch directory, with an empty price store"""
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test-token")
+    monkeypatch.chdir(tmp_path)
+    store = PriceStore(str(tmp_path / "live_data.json"))
+    monkeypatch.setattr(data_fetcher, "_price_store", store)
+    # Fresh process-wide singletons, bound to the store above
+    for module, name in ((greeks, "_cache"), (var_engine, "_engine"), (var_engine, "_returns")):
+        monkeypatch.setattr(module, name, None)
+    telegram_bot = importlib.import_module("telegram_bot")
+    monkeypatch.setattr(telegram_bot, "active_monitors", {})
+    return telegram_bot, store
+
+
+def command(user_id: int = 1):
+    message = Message()
+    update = types.SimpleNamespace(effective_user=types.SimpleNamespace(id=user_id), message=message)
+    return update, types.SimpleNamespace(args=[]), message
+
+
+def test_portfolio_metrics_with_an_unpriced_asset(bot):
+    telegram_bot, store = bot
+    store.record("BTC", {"bybit": 117_000.0, "deribit": 117_010.0})
+    telegram_bot.active_monitors[1] = {"assets": {
+        "BTC": Position("BTC", 1.0, 500_000, 115_000.0),
+        "ETH": Position("ETH", 10.0, 100_000, 3_000.0),
+    }}
+    update, context, message = command()
+    asyncio.run(telegram_bot.portfolio_metrics(update, context))
+    reply = message.replies[-1]
+    assert "ETH: Live price unavailable" in reply
+    assert "BTC\n• Size: 1.0 @ $117010.0" in reply
+
+
+def test_atm_strike_of_an_unpriced_spot_is_nan():
+    assert greeks.atm_strike(117_000.4) == 117_000
+    assert greeks.atm_strike(float("nan")) != greeks.atm_strike(float("nan"))
+
+
+def test_stress_grid_rejects_an_unknown_option_type(bot):
+    telegram_bot, _ = bot
+    update, context, message = command()
+    context.args = ["BTC", "117000", "120000", "0.6", "30", "straddle"]
+    asyncio.run(telegram_bot.stress_grid_command(update, context))
+    assert message.replies[-1].startswith("Usage:\n/stress_grid")
+
+    context.args[5] = "PUT"
+    asyncio.run(telegram_bot.stress_grid_command(update, context))
+    assert message.replies[-1].startswith("🧮 Stress Grid for BTC PUT")
+
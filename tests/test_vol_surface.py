@@ -0,0 +1,114 @@
+"""implied_vol against known vols, and VolSurface interpolation on its grid"""
+import math
+
+import numpy as np
+import pytest
+
+import vol_surface
+from greeks import calculate_greeks_batch
+from vol_surface import MONEYNESS_GRID, VolSurface, VolSurfaceCache, implied_vol
+
+FORWARD = 117_000.0
+NOW = 1_700_000_000.0
+DAY = 86_400
+
+
+def forward_price(strike, days, vol, is_call):
+    """Undiscounted Black-Scholes on the forward, as Deribit marks are"""
+    return calculate_greeks_batch(FORWARD, strike, days, vol, 0.0, is_call)["price"]
+
+
+def test_implied_vol_recovers_known_vols():
+    # Within three standard deviations of the forward: prices well above float noise
+    strike = FORWARD * np.exp(np.linspace(-0.3, 0.3, 21))
+    days = np.array([30, 90, 180, 365] * 6)[:21]
+    vol = np.linspace(0.4, 1.5, 21)
+    is_call = strike >= FORWARD
+    solved = implied_vol(forward_price(strike, days, vol, is_call), FORWARD, strike, days, is_call)
+    np.testing.assert_allclose(solved, vol, atol=1e-7)
+
+
+def test_implied_vol_outside_the_no_arbitrage_bounds_is_nan():
+    intrinsic = FORWARD - 100_000.0
+    solved = implied_vol([intrinsic, FORWARD, -1.0], FORWARD, 100_000.0, 30, True)
+    assert np.isnan(solved).all()
+
+
+def test_deep_wings_fall_back_to_brentq(monkeypatch):
+    optimize = pytest.importorskip("scipy.optimize")
+    real_brentq = optimize.brentq
+    calls = []
+
+    def brentq(f, a, b, **kwargs):
+        calls.append((a, b))
+        return real_brentq(f, a, b, **kwargs)
+
+    monkeypatch.setattr(optimize, "brentq", brentq)
+    # Cut Newton short so the deep in- and out-of-the-money options are left unsettled
+    monkeypatch.setattr(vol_surface, "NEWTON_STEPS", 1)
+
+    strike = FORWARD * np.array([0.4, 0.6, 1.6, 2.5])
+    is_call = np.array([True, False, True, False])  # deep ITM call, deep OTM put, deep OTM call, deep ITM put
+    vol = np.array([0.9, 0.8, 0.7, 1.1])
+    solved = implied_vol(forward_price(strike, 30, vol, is_call), FORWARD, strike, 30, is_call)
+    assert calls
+    np.testing.assert_allclose(solved, vol, atol=1e-6)
+
+
+def quotes(smiles: dict) -> dict:
+    """Out-of-the-money quotes priced off {days: (log-moneyness points, vols)}"""
+    rows = []
+    for days, (moneyness, vols) in smiles.items():
+        for x, vol in zip(moneyness, vols):
+            strike = FORWARD * math.exp(x)
+            is_call = strike >= FORWARD
+            price = float(forward_price(strike, days, vol, is_call))
+            rows.append((f"BTC-{days}D-{strike:.0f}-{'C' if is_call else 'P'}", NOW + days * DAY, strike, is_call, price))
+    return {
+        "instrument": [row[0] for row in rows],
+        "expiry": np.array([row[1] for row in rows]),
+        "strike": np.array([row[2] for row in rows]),
+        "is_call": np.array([row[3] for row in rows]),
+        "price": np.array([row[4] for row in rows]),
+        "forward": np.full(len(rows), FORWARD),
+    }
+
+
+def test_interpolates_between_grid_points():
+    moneyness = np.array([-0.3, 0.0, 0.3])
+    surface = VolSurface()
+    surface.update(quotes({10: (moneyness, [0.6, 0.5, 0.55]), 40: (moneyness, [0.8, 0.7, 0.75])}), NOW)
+
+    # On an expiry, linear in log-moneyness between and across MONEYNESS_GRID points
+    step = MONEYNESS_GRID[1] - MONEYNESS_GRID[0]
+    x = 0.1 + step / 2
+    expected = 0.5 + (0.55 - 0.5) * x / 0.3
+    assert surface.vol(10, FORWARD * math.exp(x), FORWARD) == pytest.approx(expected, abs=1e-6)
+
+    # Between expiries, total variance is linear in time
+    t1, t2, t = 10 / 365, 40 / 365, 25 / 365
+    variance = 0.5**2 * t1 + (0.7**2 * t2 - 0.5**2 * t1) * (t - t1) / (t2 - t1)
+    assert surface.vol(25, FORWARD, FORWARD) == pytest.approx(math.sqrt(variance / t), abs=1e-6)
+
+    # Flat beyond the first and last expiry and the outermost strikes
+    assert surface.vol(1, FORWARD, FORWARD) == pytest.approx(0.5, abs=1e-6)
+    assert surface.vol(300, FORWARD * 0.2, FORWARD) == pytest.approx(0.8, abs=1e-6)
+
+    days, strike = np.array([10, 25, 300]), np.array([FORWARD * math.exp(x), FORWARD, FORWARD * 0.2])
+    np.testing.assert_allclose(surface.vols(days, strike, FORWARD),
+                               [surface.vol(d, k, FORWARD) for d, k in zip(days.tolist(), strike.tolist())])
+
+
+def test_cache_falls_back_without_a_live_expiry():
+    surfaces = VolSurfaceCache(default_vol=0.35)
+    assert surfaces.vol("BTC", 7, FORWARD, FORWARD) == 0.35
+
+    surfaces.update("btc", quotes({7: (np.array([0.0]), [0.6])}), NOW)
+    assert surfaces.vol("BTC", 7, FORWARD, FORWARD) == pytest.approx(0.6, abs=1e-6)
+    grid = surfaces.surface("BTC").grid
+
+    # Once every expiry has passed the grid is swapped for None in one step;
+    # a reader still holding the old grid sees it unchanged
+    surfaces.update("BTC", quotes({7: (np.array([0.0]), [0.6])}), NOW + 8 * DAY)
+    assert surfaces.surface("BTC") is None and surfaces.vol("BTC", 7, FORWARD, FORWARD) == 0.35
+    assert np.allclose(grid, 0.6)
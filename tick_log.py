@@ -0,0 +1,158 @@
+"""
+Append-only binary tick archive, one file per asset.
+
+Each record is fixed-width: int64 epoch nanoseconds followed by one float64
+per venue (NaN when a venue had no price). Reads memory-map the file as a
+NumPy structured array, so analytics can scan months of ticks without
+parsing anything.
+
+    python tick_log.py migrate [cache/live_data.json]
+"""
+import json
+import logging
+import os
+import struct
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TICK_LOG_DIR = "cache/ticks"
+SOURCES = ("bybit", "deribit")
+
+TICK_DTYPE = np.dtype([("timestamp", "<i8")] + [(source, "<f8") for source in SOURCES])
+_RECORD = struct.Struct("<q" + "d" * len(SOURCES))
+assert _RECORD.size == TICK_DTYPE.itemsize
+
+
+class TickLog:
+    """Per-asset append-only tick files under one directory"""
+
+    def __init__(self, directory: str = TICK_LOG_DIR):
+        self.directory = directory
+        self._files = {}
+
+    def path(self, asset: str) -> str:
+        return os.path.join(self.directory, f"{asset.upper()}.ticks")
+
+    def append(self, asset: str, ts_ns: int, prices: dict):
+        """Append one tick; visible to readers as soon as this returns"""
+        f = self._files.get(asset.upper()) or self._open(asset)
+        f.write(_pack(ts_ns, prices))
+        f.flush()
+
+    def read(self, asset: str, start_ns: int = None, end_ns: int = None) -> np.ndarray:
+        """
+        Memory-mapped ticks for asset, optionally limited to [start_ns, end_ns).
+
+        Returns:
+            np.ndarray: structured array with fields timestamp (ns), bybit, deribit
+        """
+        path = self.path(asset)
+        try:
+            count = os.path.getsize(path) // TICK_DTYPE.itemsize
+        except FileNotFoundError:
+            count = 0
+        if count == 0:
+            return np.empty(0, dtype=TICK_DTYPE)
+
+        ticks = np.memmap(path, dtype=TICK_DTYPE, mode="r", shape=(count,))
+        if start_ns is None and end_ns is None:
+            return ticks
+
+        timestamps = ticks["timestamp"]
+        lo = 0 if start_ns is None else np.searchsorted(timestamps, start_ns, side="left")
+        hi = count if end_ns is None else np.searchsorted(timestamps, end_ns, side="left")
+        return ticks[lo:hi]
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def _open(self, asset: str):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(asset)
+        f = open(path, "ab")
+
+        # Drop a torn record left by a crash so appends stay aligned
+        size = f.tell()
+        if size % TICK_DTYPE.itemsize:
+            logger.warning(f"Truncating partial record at end of {path}")
+            f.truncate(size - size % TICK_DTYPE.itemsize)
+            f.seek(0, os.SEEK_END)
+
+        self._files[asset.upper()] = f
+        return f
+
+
+def migrate_json_cache(json_path: str = "cache/live_data.json", directory: str = TICK_LOG_DIR) -> dict:
+    """
+    One-shot import of the legacy JSON cache into per-asset tick files.
+
+    Assets that already have a tick file are left alone, so running it twice
+    is harmless.
+
+    Returns:
+        dict: asset -> number of ticks written
+    """
+    with open(json_path, "r") as f:
+        cached = json.load(f)
+
+    os.makedirs(directory, exist_ok=True)
+    tick_log = TickLog(directory)
+    migrated = {}
+
+    for asset, asset_data in cached.items():
+        path = tick_log.path(asset)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            logger.info(f"{asset}: tick log already exists, skipping")
+            continue
+
+        # Handle both old and new formats
+        if "latest" not in asset_data:
+            asset_data = {"latest": asset_data, "history": []}
+        entries = asset_data.get("history", []) + [asset_data["latest"]]
+
+        records = []
+        for entry in entries:
+            try:
+                ts = datetime.strptime(entry["timestamp"], "%Y-%m-%d %H:%M:%S")
+            except (KeyError, TypeError, ValueError):
+                continue
+            ts_ns = int(ts.replace(tzinfo=timezone.utc).timestamp()) * 1_000_000_000
+            records.append((ts_ns, _pack(ts_ns, entry)))
+        records.sort(key=lambda record: record[0])
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(packed for _, packed in records))
+        os.replace(tmp_path, path)
+
+        migrated[asset.upper()] = len(records)
+        logger.info(f"{asset}: migrated {len(records)} ticks to {path}")
+
+    return migrated
+
+
+def _pack(ts_ns: int, prices: dict) -> bytes:
+    values = []
+    for source in SOURCES:
+        try:
+            values.append(float(prices.get(source)))
+        except (TypeError, ValueError):
+            values.append(float("nan"))
+    return _RECORD.pack(int(ts_ns), *values)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print(__doc__)
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    source = sys.argv[2] if len(sys.argv) > 2 else "cache/live_data.json"
+    for asset, count in migrate_json_cache(source).items():
+        print(f"{asset}: {count} ticks")